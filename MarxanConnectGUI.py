@@ -1,3 +1,6 @@
+# start the start up timer before anything heavy is imported
+from marxanconnect import startup
+
 # importing wx files
 import wx
 import wx.lib.agw.aui as aui
@@ -5,21 +8,12 @@ import wx.adv
 import wx.html2
 
 
-# import matplotlib
-import matplotlib
-
-matplotlib.use('WXAgg')
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
-from matplotlib.collections import PatchCollection
-
-# import spatial modules
-import geopandas as gpd
-from descartes import PolygonPatch
-import shapely
-import cartopy
+# import matplotlib and spatial modules (deferred until first used, see marxanconnect/lazy.py)
+from marxanconnect.lazy import matplotlib, pyplot as plt, backend_wxagg, cartopy, geopandas as gpd
 
 # import system helper modules
+import functools
+import multiprocessing
 import os
 import sys
 import pandas
@@ -50,12 +44,45 @@ else:
 
 sys.path.append(MCPATH)
 
-# import MarxanConnect python module
-import marxanconpy
+# import MarxanConnect python module (deferred until first used)
+from marxanconnect.lazy import marxanconpy
+import marxanconnect.dependencies
+import marxanconnect.logsink
+import marxanconnect.pipeline
+import marxanconnect.posthoc
+import marxanconnect.profiling
+import marxanconnect.trace
 
 with open(os.path.join(MCPATH, 'VERSION')) as version_file:
     MarxanConnectVersion = version_file.read().strip()
 
+startup.mark("imports")
+
+# the notebook page which holds each widget
+WIDGET_PAGES = {widget: page for page, widgets in gui.MarxanConnectGUI.page_widgets.items() for widget in widgets}
+
+
+def deferred_until_built(page):
+    """
+    Decorator for methods which update the widgets of a notebook page. Until the page has been built (the first time
+    its tab is selected) calls are recorded instead, and the latest call for each set of arguments is made when the page
+    is built (see MarxanConnectGUI.build_page).
+    :param page: the page name, or a function of the method's arguments which returns the page name
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            name = page(*args, **kwargs) if callable(page) else page
+            if name in self.built_pages:
+                return function(self, *args, **kwargs)
+            deferred = self.deferred_calls.setdefault(name, {})
+            key = (function.__name__,) + args
+            deferred.pop(key, None)
+            deferred[key] = (function, args, kwargs)
+        return wrapper
+    return decorator
+
+
 class MarxanConnectGUI(gui.MarxanConnectGUI):
     def __init__(self, parent):
         """
@@ -63,6 +90,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         """
         os.chdir(MCPATH)
         gui.MarxanConnectGUI.__init__(self, parent)
+        startup.mark("frame")
         # set the icon
         self.set_icon(frame=self, rootpath=MCPATH)
 
@@ -70,6 +98,22 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.log = LogForm(parent=self)
         print(MCPATH)
 
+        # rebuild only what changed (File menu)
+        self.update_all = wx.MenuItem(self.file, wx.ID_ANY, u"Update All" + u"\t" + u"Ctrl+U", wx.EmptyString,
+                                      wx.ITEM_NORMAL)
+        self.file.Append(self.update_all)
+        self.Bind(wx.EVT_MENU, self.on_update_all, id=self.update_all.GetId())
+
+        # stage timing window (Debug menu)
+        self.trace_form = TraceForm(parent=self)
+        self.trace_mode = wx.MenuItem(self.debug, wx.ID_ANY, u"Stage Timing" + u"\t" + u"Ctrl+T", wx.EmptyString,
+                                      wx.ITEM_NORMAL)
+        self.debug.Append(self.trace_mode)
+        self.Bind(wx.EVT_MENU, self.on_trace_mode, id=self.trace_mode.GetId())
+        self.profile_mode = wx.MenuItem(self.debug, wx.ID_ANY, u"Profile Next Action", wx.EmptyString, wx.ITEM_CHECK)
+        self.debug.Append(self.profile_mode)
+        self.Bind(wx.EVT_MENU, self.on_profile_mode, id=self.profile_mode.GetId())
+
         # set opening tab to Spatial Input (0)
         self.auinotebook.ChangeSelection(0)
 
@@ -84,22 +128,16 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         # set help page
         # self.on_metric_definition_choice(event=None) #currently disabled so that help appears blank/less intimidating
 
-        self.demo_matrixTypeRadioBox.SetItemToolTip(0, "In a probability matrix, each cell represents the probability of movement from site A (row) to site B (column). May or may not account for mortality. If there is no mortality, rows sum to 1")
-        self.demo_matrixTypeRadioBox.SetItemToolTip(1, "In a migration matrix, each cell represents the probability of a successful migrant in site B (column) originated in site A (row). Columns sum to 1.")
-        self.demo_matrixTypeRadioBox.SetItemToolTip(2, "In a flow matrix (often mislabeled as a flux matrix), each cell represents the number of elements/individuals moving from site A (row) to site B (column) per unit time.")
-
-        self.demo_matrixFormatRadioBox.SetItemToolTip(0,"Matrix format data has the connectivity values arranged is a square format (i.e.the same number of rows and columns). The row names are the donor sites and the column names are the recipient sites ")
-        self.demo_matrixFormatRadioBox.SetItemToolTip(1,"An Edge List has 3 columns: the donor sites ('id1'), the recipient sites ('id2'), and the connectivity values ('value')")
-        self.demo_matrixFormatRadioBox.SetItemToolTip(2,"An Edge List with Time has 4 columns: time ('time'), the donor sites ('id1'), the recipient sites ('id2'), and the connectivity values ('value')")
-        self.demo_matrixFormatRadioBox.SetItemToolTip(3,"An Edge List with Type has 4 columns: type ('type'), the donor sites ('id1'), the recipient sites ('id2'), and the connectivity values ('value')")
+        self.set_tooltips()
 
-        self.demo_rescale_edgeRadioBox.SetItemToolTip(0,"Rescales the connectivity matrix using a spatially weighted average where there is overlap. In areas with partial overlap, connectivity is assumed to be proportional to the overlap. For example, if a planning unit has a 50% overlap with connectivity data (i.e. half of the planning unit has connectivity data, and the other half does not), and the connectivity value is 10, the connectivity value is taken from a spatial average across that planning unit (i.e. a final connectivity value of 5).")
-        self.demo_rescale_edgeRadioBox.SetItemToolTip(1,"Rescales the connectivity matrix using a spatially weighted average where there is overlap. In areas with partial overlap, connectivity is assumed to be homogeneous. For example, if a planning unit has a 50% overlap with connectivity data (i.e. half of the planning unit has connectivity data, and the other half does not), and the connectivity value is 10, the connectivity value is considered homogenous across the planning unit (i.e. a final connectivity value of 10).")
+        # Either load or launch new project once the frame is shown
+        wx.CallAfter(self.launch_project)
 
-        self.demo_rescale_edgeRadioBox.GetItemToolTip(0).SetAutoPop(30000)
-        self.demo_rescale_edgeRadioBox.GetItemToolTip(1).SetAutoPop(30000)
-
-        # Either load or launch new project
+    def launch_project(self):
+        """
+        Loads the project given on the command line or launches a new project, then reports the start up timing
+        """
+        startup.mark("shown")
         if len(sys.argv) > 1:
             self.spatial = {}
             self.project = {}
@@ -122,6 +160,75 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             # self.project['filepaths']['projfile'] =r"C:\Users\daigl\Documents\GitHub\MarxanConnect\docs\tutorial\CF_demographic\tutorial.MarCon"
             # self.workingdirectory = os.path.dirname(self.project['filepaths']['projfile'])
             # self.load_project_function(launch=True)
+        startup.mark("project")
+        startup.report(version=MarxanConnectVersion)
+
+    @deferred_until_built('connectivityInput')
+    def set_tooltips(self):
+        self.demo_matrixTypeRadioBox.SetItemToolTip(0, "In a probability matrix, each cell represents the probability of movement from site A (row) to site B (column). May or may not account for mortality. If there is no mortality, rows sum to 1")
+        self.demo_matrixTypeRadioBox.SetItemToolTip(1, "In a migration matrix, each cell represents the probability of a successful migrant in site B (column) originated in site A (row). Columns sum to 1.")
+        self.demo_matrixTypeRadioBox.SetItemToolTip(2, "In a flow matrix (often mislabeled as a flux matrix), each cell represents the number of elements/individuals moving from site A (row) to site B (column) per unit time.")
+
+        self.demo_matrixFormatRadioBox.SetItemToolTip(0,"Matrix format data has the connectivity values arranged is a square format (i.e.the same number of rows and columns). The row names are the donor sites and the column names are the recipient sites ")
+        self.demo_matrixFormatRadioBox.SetItemToolTip(1,"An Edge List has 3 columns: the donor sites ('id1'), the recipient sites ('id2'), and the connectivity values ('value')")
+        self.demo_matrixFormatRadioBox.SetItemToolTip(2,"An Edge List with Time has 4 columns: time ('time'), the donor sites ('id1'), the recipient sites ('id2'), and the connectivity values ('value')")
+        self.demo_matrixFormatRadioBox.SetItemToolTip(3,"An Edge List with Type has 4 columns: type ('type'), the donor sites ('id1'), the recipient sites ('id2'), and the connectivity values ('value')")
+
+        self.demo_rescale_edgeRadioBox.SetItemToolTip(0,"Rescales the connectivity matrix using a spatially weighted average where there is overlap. In areas with partial overlap, connectivity is assumed to be proportional to the overlap. For example, if a planning unit has a 50% overlap with connectivity data (i.e. half of the planning unit has connectivity data, and the other half does not), and the connectivity value is 10, the connectivity value is taken from a spatial average across that planning unit (i.e. a final connectivity value of 5).")
+        self.demo_rescale_edgeRadioBox.SetItemToolTip(1,"Rescales the connectivity matrix using a spatially weighted average where there is overlap. In areas with partial overlap, connectivity is assumed to be homogeneous. For example, if a planning unit has a 50% overlap with connectivity data (i.e. half of the planning unit has connectivity data, and the other half does not), and the connectivity value is 10, the connectivity value is considered homogenous across the planning unit (i.e. a final connectivity value of 10).")
+
+        self.demo_rescale_edgeRadioBox.GetItemToolTip(0).SetAutoPop(30000)
+        self.demo_rescale_edgeRadioBox.GetItemToolTip(1).SetAutoPop(30000)
+
+# ##########################  notebook page functions ##################################################################
+
+    def build_pages(self):
+        """
+        Builds the first page with the frame, the other pages are built the first time their tab is selected (or one of
+        their widgets is used)
+        """
+        self.built_pages = set()
+        self.deferred_calls = {}
+        self.build_page(self.pages[0])
+        self.auinotebook.Bind(wx.aui.EVT_AUINOTEBOOK_PAGE_CHANGED, self.on_page_changed)
+
+    def build_page(self, page):
+        """
+        Builds the widgets of a notebook page and makes the calls which were deferred until it was built
+        """
+        if page in self.built_pages:
+            return
+        self.built_pages.add(page)
+        getattr(self, 'build_' + page)()
+        getattr(self, page).Layout()
+        for function, args, kwargs in self.deferred_calls.pop(page, {}).values():
+            function(self, *args, **kwargs)
+
+    def on_page_changed(self, event):
+        if event.GetSelection() != wx.NOT_FOUND:
+            panel = self.auinotebook.GetPage(event.GetSelection())
+            for page in self.pages:
+                if getattr(self, page) is panel:
+                    self.build_page(page)
+        event.Skip()
+
+    def __getattr__(self, name):
+        """
+        Builds the page of a widget which is used before its tab has been selected
+        """
+        page = WIDGET_PAGES.get(name)
+        if page is not None and 'built_pages' in self.__dict__ and page not in self.built_pages:
+            self.build_page(page)
+            return getattr(self, name)
+        raise AttributeError("'" + type(self).__name__ + "' object has no attribute '" + name + "'")
+
+    def get_calc_metrics_pu(self):
+        """
+        The 'Planning Units' metrics checkbox, or the project option if the Connectivity Metrics page has not been built
+        """
+        if 'connectivityMetrics' in self.built_pages:
+            return self.calc_metrics_pu.GetValue()
+        return self.project['options']['calc_metrics_pu']
 
     def set_icon(self, frame, rootpath):
         # set the icon
@@ -164,14 +271,13 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             self.posthocdefault = False
 
     def on_mwz( self, event ):
-        if not self.mwzdefault:
-            self.marxan_Radio.Hide()
-            self.marxanAnalysis.Layout()
-            self.mwzdefault = True
-        else:
-            self.marxan_Radio.Show()
-            self.marxanAnalysis.Layout()
-            self.mwzdefault = False
+        self.mwzdefault = not self.mwzdefault
+        self.show_mwz()
+
+    @deferred_until_built('marxanAnalysis')
+    def show_mwz(self):
+        self.marxan_Radio.Show(not self.mwzdefault)
+        self.marxanAnalysis.Layout()
 
 # ##########################  project managment functions ##############################################################
 
@@ -217,6 +323,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.colormap_metric_choices(2)
         self.colormap_metric_choices("pre-eval")
 
+    @marxanconnect.trace.traced(category='gui')
     def on_load_project(self, event):
         """
         Create and show the Open FileDialog to load a project
@@ -241,29 +348,12 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
 
     def load_project_function(self,launch=False):
         self.spatial = {}
-        self.project = marxanconpy.marcon.load_project(self.project['filepaths']['projfile'])
-        marxanconpy.marcon.validate_project(self.project)
+        self.project = marxanconnect.pipeline.load_project(self.project['filepaths']['projfile'], rootpath=MCPATH)
         if not launch:
             frame.SetTitle('Marxan Connect (Project: ' + self.project['filepaths']['projfilename'] + ')')
         else:
             self.SetTitle('Marxan Connect (Project: ' + self.project['filepaths']['projfilename'] + ')')
 
-        if 'MarxanConnect' in self.project['version']:
-            if self.project['version']['MarxanConnect'] != MarxanConnectVersion:
-                print("Warning: This project file was created with a different version of Marxan Connect. Attempting to "
-                      "update for compatibility")
-                self.project['version']['MarxanConnect'] = MarxanConnectVersion
-        else:
-            print("Warning: This project file was created with a different version of Marxan Connect. Attempting to "
-                  "update for compatibility")
-            self.project['version'] = {}
-            self.project['version']['marxanconpy'] = marxanconpy.__version__
-            self.project['version']['MarxanConnect'] = MarxanConnectVersion
-
-        self.project = marxanconpy.marcon.edit_working_directory(self.project,
-                                                                 self.workingdirectory,
-                                                                 "absolute")
-
         self.set_GUI_options()
 
         # set default file paths in GUI
@@ -276,12 +366,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.on_demo_matrixFormatRadioBox(event=None)
         self.on_demo_rescaleRadioBox(event=None)
         if self.project['options']['metricsCalculated']:
-            self.customize_spec.Enable(enable=True)
-            self.export_CF_files.Enable(enable=True)
-            self.export_BD_file.Enable(enable=True)
-            self.export_pudat.Enable(enable=True)
-            self.export_metrics.Enable(enable=True)
-            self.custom_spec_panel.SetToolTip(None)
+            self.enable_export()
         self.enable_metrics()
         self.enable_discrete()
         self.enable_postHoc()
@@ -294,10 +379,21 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.update_discrete_grid()
 
     def set_GUI_options(self):
-        # set default options
+        # set default options (the options of each page are set once it is built)
+        self.set_spatial_options()
+        self.set_connectivity_options()
+        self.set_metrics_GUI_options()
+        self.set_export_options()
+        self.set_marxan_options()
+        self.set_plotting_options()
+
+    @deferred_until_built('spatialInput')
+    def set_spatial_options(self):
         self.fa_status_radioBox.SetStringSelection(self.project['options']['fa_status'])
         self.aa_status_radioBox.SetStringSelection(self.project['options']['aa_status'])
 
+    @deferred_until_built('connectivityInput')
+    def set_connectivity_options(self):
         self.demo_PU_CM_progress.SetValue(self.project['options']['demo_pu_cm_progress'])
         self.demo_matrixTypeRadioBox.SetStringSelection(self.project['options']['demo_conmat_type'])
         self.demo_matrixFormatRadioBox.SetStringSelection(self.project['options']['demo_conmat_format'])
@@ -312,6 +408,8 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
                 self.land_type_choice.SetSelection(i)
         self.land_res_matrixTypeRadioBox.SetStringSelection(self.project['options']['land_res_matrixType'])
 
+    @deferred_until_built('connectivityMetrics')
+    def set_metrics_GUI_options(self):
         self.cf_demo_in_degree.SetValue(self.project['options']['demo_metrics']['in_degree'])
         self.cf_demo_out_degree.SetValue(self.project['options']['demo_metrics']['out_degree'])
         self.cf_demo_between_cent.SetValue(self.project['options']['demo_metrics']['between_cent'])
@@ -344,12 +442,16 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.calc_metrics_pu.SetValue(self.project['options']['calc_metrics_pu'])
         self.calc_metrics_cu.SetValue(self.project['options']['calc_metrics_cu'])
 
+    @deferred_until_built('exportMarxan')
+    def set_export_options(self):
         self.cf_export_radioBox.SetStringSelection(self.project['options']['cf_export'])
         self.spec_radio.SetStringSelection(self.project['options']['spec_set'])
         self.targets.SetValue(self.project['options']['targets'])
         self.BD_filecheck.SetValue(self.project['options']['bd_filecheck'])
         self.PUDAT_filecheck.SetValue(self.project['options']['pudat_filecheck'])
 
+    @deferred_until_built('marxanAnalysis')
+    def set_marxan_options(self):
         self.NUMREPS.SetValue(self.project['options']['NUMREPS'])
         self.SCENNAME.SetValue(self.project['options']['SCENNAME'])
         self.NUMITNS.SetValue(self.project['options']['NUMITNS'])
@@ -362,13 +464,23 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.marxanBit_Radio.SetStringSelection(self.project['options']['marxan_bit'])
         self.marxan_Radio.SetStringSelection(self.project['options']['marxan'])
 
-
+    @deferred_until_built('plottingOptions')
+    def set_plotting_options(self):
         self.PUSHP_filecheck.SetValue(self.project['options']['pushp_filecheck'])
         self.PUCSV_filecheck.SetValue(self.project['options']['pucsv_filecheck'])
         self.MAP_filecheck.SetValue(self.project['options']['map_filecheck'])
 
     def set_GUI_filepaths(self):
-        # set default file paths
+        # set default file paths (the file paths of each page are set once it is built)
+        self.set_spatial_filepaths()
+        self.set_connectivity_filepaths()
+        self.set_export_filepaths()
+        self.set_marxan_filepaths()
+        self.set_postHoc_filepaths()
+        self.set_plotting_filepaths()
+
+    @deferred_until_built('spatialInput')
+    def set_spatial_filepaths(self):
         # spatial input
         self.PU_file.SetPath(self.project['filepaths']['pu_filepath'])
         self.set_GUI_id_selection(self.PU_file_pu_id, self.project['filepaths']['pu_filepath'],
@@ -376,6 +488,8 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.FA_file.SetPath(self.project['filepaths']['fa_filepath'])
         self.AA_file.SetPath(self.project['filepaths']['aa_filepath'])
 
+    @deferred_until_built('connectivityInput')
+    def set_connectivity_filepaths(self):
         # connectivity input
         self.demo_CU_file.SetPath(self.project['filepaths']['demo_cu_filepath'])
         self.set_GUI_id_selection(self.demo_CU_file_pu_id, self.project['filepaths']['demo_cu_filepath'],
@@ -394,6 +508,8 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
 
         self.LP_file.SetPath(self.project['filepaths']['lp_filepath'])
 
+    @deferred_until_built('exportMarxan')
+    def set_export_filepaths(self):
         # Marxan metrics files
         self.orig_CF_file.SetPath(self.project['filepaths']['orig_cf_filepath'])
         self.CF_file.SetPath(self.project['filepaths']['cf_filepath'])
@@ -404,14 +520,20 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.orig_PUDAT_file.SetPath(self.project['filepaths']['orig_pudat_filepath'])
         self.PUDAT_file.SetPath(self.project['filepaths']['pudat_filepath'])
 
+    @deferred_until_built('marxanAnalysis')
+    def set_marxan_filepaths(self):
         # Marxan analysis
         self.inputdat_template_file.SetPath(self.project['filepaths']['marxan_template_input'])
         self.inputdat_file.SetPath(self.project['filepaths']['marxan_input'])
 
+    @deferred_until_built('postHocEvaluation')
+    def set_postHoc_filepaths(self):
         # Post-Hoc
         self.postHoc_file.SetPath(self.project['filepaths']['posthoc'])
         self.postHoc_shp_file.SetPath(self.project['filepaths']['posthoc_shp'])
 
+    @deferred_until_built('plottingOptions')
+    def set_plotting_filepaths(self):
         # Export plot data
         self.PUSHP_file.SetPath(self.project['filepaths']['pushp'])
         self.PUCSV_file.SetPath(self.project['filepaths']['pucsv'])
@@ -423,6 +545,9 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             choice.SetStringSelection(id)
 
     def set_metric_options(self):
+        # the project options are up to date until the Connectivity Metrics page is built
+        if 'connectivityMetrics' not in self.built_pages:
+            return
         self.project['options']['demo_metrics'] = {}
         self.project['options']['demo_metrics']['in_degree'] = self.cf_demo_in_degree.GetValue()
         self.project['options']['demo_metrics']['out_degree'] = self.cf_demo_out_degree.GetValue()
@@ -486,14 +611,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         frame.SetTitle('Marxan Connect (Project: ' + self.project['filepaths']['projfilename'] + ')')
 
     def save_project_gui(self):
-        projfile = self.project['filepaths']['projfile']
-        self.project = marxanconpy.marcon.edit_working_directory(self.project,
-                                                                              self.workingdirectory,
-                                                                              "relative")
-        marxanconpy.marcon.save_project(project=self.project,projfile=projfile)
-        self.project = marxanconpy.marcon.edit_working_directory(self.project,
-                                                                              self.workingdirectory,
-                                                                              "absolute")
+        marxanconnect.pipeline.save_project(self.project, projfile=self.project['filepaths']['projfile'])
 
 # ########################## html pop-up functions #####################################################################
 
@@ -541,6 +659,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
                            self.metric_definition_choice.GetStringSelection().lower().replace(" ", "-")))
 
 # ##########################  map plotting functions ###################################################################
+    @marxanconnect.trace.traced(category='gui')
     def on_plot_map_button(self, event):
         """
         Initiates map plotting. Creates a 'Plot' tab, plots the basemap (if desired) and calls 'draw_shapefiles' to plot
@@ -647,7 +766,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         crs = cartopy.crs.PlateCarree(central_longitude=(lonmin+lonmax)/2)
         self.plot.axes = self.plot.figure.gca(projection=crs)
         self.plot.axes.set_extent([lonmin, lonmax, latmin, latmax])
-        self.plot.canvas = FigureCanvas(self.plot, -1, self.plot.figure)
+        self.plot.canvas = backend_wxagg.FigureCanvasWxAgg(self.plot, -1, self.plot.figure)
         self.plot.sizer = wx.BoxSizer(wx.VERTICAL)
         self.plot.sizer.Add(self.plot.canvas, 1, wx.LEFT | wx.TOP | wx.GROW)
         self.plot.SetSizer(self.plot.sizer)
@@ -751,6 +870,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
                                                                 rotation = 30,
                                                                 ha='right')
 
+    @deferred_until_built('plottingOptions')
     def outline_shapefile_choices(self):
         choices = []
         if self.project['filepaths']['pu_filepath'] != "":
@@ -760,7 +880,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         if self.project['filepaths']['aa_filepath'] != "":
             choices.append("Avoidance Areas")
         if self.project['filepaths']['demo_cu_filepath'] != "":
-            if self.demo_rescaleRadioBox.GetStringSelection() != "Identical Grids":
+            if self.project['options']['demo_conmat_rescale'] != "Identical Grids":
                 choices.append("Demographic Units")
         if self.project['filepaths']['land_cu_filepath'] != "":
             choices.append("Landscape Units")
@@ -771,6 +891,11 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.poly_shp_choice1.SetSelection(0)
 
     def colormap_shapefile_choices(self):
+        self.plot_shapefile_choices()
+        self.preEval_shapefile_choices()
+
+    @deferred_until_built('plottingOptions')
+    def plot_shapefile_choices(self):
         choices = []
         if 'connectivityMetrics' in self.project:
             if 'best_solution' in self.project['connectivityMetrics'] or 'status' in self.project['connectivityMetrics']:
@@ -787,8 +912,9 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.metric_shp_choice1.SetItems(choices)
         self.metric_shp_choice1.SetSelection(0)
 
+    @deferred_until_built('preEvaluation')
+    def preEval_shapefile_choices(self):
         choices = []
-
         if 'connectivityMetrics' in self.project:
             if 'spec_demo_pu' in self.project['connectivityMetrics']:
                 choices.append("Planning Units (Demographic Data)")
@@ -803,6 +929,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
     def on_metric_shp_choice1(self, event=None):
         self.colormap_metric_choices(2)
 
+    @deferred_until_built(lambda lyr: 'plottingOptions' if lyr in (1, 2) else 'preEvaluation')
     def colormap_metric_choices(self, lyr):
         choices = []
         if lyr == 1:
@@ -952,6 +1079,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         return metric_type
 
 # ###########################  file management functions ###############################################################
+    @marxanconnect.trace.traced(category='gui')
     def on_PU_file(self, event):
         """
         Defines Planning Unit file path
@@ -959,10 +1087,8 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.temp = {}
         self.project['filepaths']['pu_filepath'] = self.PU_file.GetPath()
         if os.path.isfile(self.project['filepaths']['pu_filepath']):
-            self.spatial['pu_shp'] = gpd.GeoDataFrame.from_file(self.project['filepaths']['pu_filepath']).to_crs('+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs')
-            self.spatial['pu_proj'] = marxanconpy.spatial.get_appropriate_projection(self.spatial['pu_shp'], 'area')
-            self.spatial['pu_shp'] = self.spatial['pu_shp'].to_crs(self.spatial['pu_proj'])
-            self.temp['items'] = list(gpd.GeoDataFrame.from_file(self.project['filepaths']['pu_filepath']))
+            self.spatial['pu_shp'], self.spatial['pu_proj'] = marxanconnect.pipeline.load_pu_shp(self.project)
+            self.temp['items'] = list(self.spatial['pu_shp'])
             self.PU_file_pu_id.SetItems(self.temp['items'])
             if self.project['filepaths']['pu_file_pu_id'] in self.temp['items']:
                 self.PU_file_pu_id.SetStringSelection(self.project['filepaths']['pu_file_pu_id'])
@@ -980,42 +1106,30 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         """
         self.project['filepaths']['pu_file_pu_id'] = self.PU_file_pu_id.GetStringSelection()
 
+    @marxanconnect.trace.traced(category='gui')
     def on_FA_file(self, event):
         """
         Defines Focus Areas file path
         """
         self.project['filepaths']['fa_filepath'] = self.FA_file.GetPath()
-        if os.path.isfile(self.project['filepaths']['fa_filepath']):
-            if 'pu_shp' in self.spatial:
-                self.spatial['fa_shp'] = gpd.GeoDataFrame.from_file(self.project['filepaths']['fa_filepath']).to_crs(self.spatial['pu_proj'])
-                self.spatial['fa_shp']['diss'] = 1
-                self.spatial['fa_shp'] = self.spatial['fa_shp'].dissolve(by='diss')
-                self.spatial['pu_shp']['fa_included'] = 0
-                for index, purow in self.spatial['pu_shp'].iterrows():
-                    self.spatial['pu_shp'].loc[index,'fa_included'] = self.spatial[
-                        'fa_shp'].geometry.intersects(purow.geometry).bool()
+        marxanconnect.pipeline.include_area(self.spatial, 'fa', self.project['filepaths']['fa_filepath'])
         # enable metrics
         self.lock_pudat(self.project['filepaths']['orig_pudat_filepath'])
         self.enable_metrics()
 
+    @marxanconnect.trace.traced(category='gui')
     def on_AA_file(self, event):
         """
         Defines Avoidance Areas file path
         """
         self.project['filepaths']['aa_filepath'] = self.AA_file.GetPath()
-        if os.path.isfile(self.project['filepaths']['aa_filepath']):
-            if 'pu_shp' in self.spatial:
-                self.spatial['aa_shp'] = gpd.GeoDataFrame.from_file(self.project['filepaths']['aa_filepath']).to_crs(self.spatial['pu_proj'])
-                self.spatial['aa_shp']['diss'] = 1
-                self.spatial['aa_shp'] = self.spatial['aa_shp'].dissolve(by='diss')
-                self.spatial['pu_shp']['aa_included'] = 0
-                for index, purow in self.spatial['pu_shp'].iterrows():
-                    self.spatial['pu_shp'].loc[index,'aa_included'] = self.spatial['aa_shp'].geometry.intersects(purow.geometry).bool()
+        marxanconnect.pipeline.include_area(self.spatial, 'aa', self.project['filepaths']['aa_filepath'])
         # enable metrics
         self.lock_pudat(self.project['filepaths']['orig_pudat_filepath'])
         self.enable_metrics()
 
 
+    @marxanconnect.trace.traced(category='gui')
     def on_demo_CU_file(self, event):
         """
         Defines Connectivity Unit file path
@@ -1038,6 +1152,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         """
         self.project['filepaths']['demo_cu_file_pu_id'] = self.demo_CU_file_pu_id.GetStringSelection()
 
+    @marxanconnect.trace.traced(category='gui')
     def on_demo_CU_CM_file(self, event):
         """
         Defines demographic Connectivity Matrix file path
@@ -1051,6 +1166,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.check_matrix_list_format(format=self.demo_matrixFormatRadioBox.GetStringSelection(),
                                       filepath=self.demo_CU_CM_file.GetPath())
 
+    @marxanconnect.trace.traced(category='gui')
     def on_demo_PU_CM_file(self, event):
         """
         Defines Planning Unit scaled demographic Connectivity Matrix file path
@@ -1060,6 +1176,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.enable_metrics()
         self.enable_postHoc()
 
+    @marxanconnect.trace.traced(category='gui')
     def on_land_HAB_file(self, event):
         """
         Defines landscape habitat type file path
@@ -1094,23 +1211,19 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         """
         self.temp = {}
         self.project['filepaths']['land_res_filepath'] = self.land_RES_file.GetPath()
-        self.temp['items'] = list(gpd.GeoDataFrame.from_file(self.project['filepaths']['land_res_file_hab_id']))
+        self.temp['items'] = list(gpd.GeoDataFrame.from_file(self.project['filepaths']['land_res_filepath']))
         self.land_RES_file_res_id.SetItems(self.temp['items'])
         if self.project['filepaths']['land_res_file_hab_id'] in self.temp['items']:
             self.land_RES_file_res_id.SetStringSelection(self.project['filepaths']['land_res_file_hab_id'])
         else:
             self.land_RES_file_res_id.SetSelection(0)
-
-        self.land_RES_file_res_id.SetItems(
-            list(gpd.GeoDataFrame.from_file(self.project['filepaths']['land_res_filepath'])))
-        self.land_RES_file_res_id.SetSelection(0)
         self.on_land_RES_file_hab_id(event=None)
         self.outline_shapefile_choices()
         self.colormap_shapefile_choices()
 
     def on_land_RES_file_hab_id(self, event):
         """
-        Defines landscape Connectivity Unit file path
+        Defines the resistance column of the landscape resistance surface
         """
         self.project['filepaths']['land_res_file_hab_id'] = self.land_RES_file_res_id.GetStringSelection()
 
@@ -1127,6 +1240,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         # self.check_matrix_list_format(format=self.land_matrixFormatRadioBox.GetStringSelection(),
         #                               filepath=self.land_CU_CM_file.GetPath())
 
+    @marxanconnect.trace.traced(category='gui')
     def on_land_PU_CM_file(self, event):
         """
         Defines landscape Planning Unit scaled Connectivity Matrix file path
@@ -1239,10 +1353,12 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.project['options']['demo_conmat_type'] = self.demo_matrixTypeRadioBox.GetStringSelection()
         self.enable_metrics()
 
+    @deferred_until_built('connectivityInput')
     def on_demo_matrixFormatRadioBox(self, event):
         self.project['options']['demo_conmat_format'] = self.demo_matrixFormatRadioBox.GetStringSelection()
         self.enable_metrics()
 
+    @deferred_until_built('connectivityInput')
     def on_demo_rescaleRadioBox(self, event):
         """
         Hides unnecessary options if rescaling is not necessary
@@ -1283,6 +1399,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
     def on_demo_rescale_edgeRadioBox(self, event):
         self.project['options']['demo_conmat_rescale_edge'] = self.demo_rescale_edgeRadioBox.GetStringSelection()
 
+    @deferred_until_built('connectivityInput')
     def on_land_type_choice(self, event):
         """
         Hides unnecessary options if rescaling is not necessary
@@ -1292,7 +1409,6 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         if self.project['options']['land_conmat_type'] == "Resistance Surface":
             enable_hab = False
             enable_surface = True
-            marxanconpy.warn_dialog(message="This feature is not yet operational, please check back in the next version!")
         elif self.project['options']['land_conmat_type'] == "Connectivity Edge List with Habitat":
             enable_hab = False
             enable_surface = False
@@ -1376,12 +1492,42 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             self.log.Show()
         return
 
+    def on_profile_mode(self, event):
+        """
+        Profiles the next action (e.g. Calculate Metrics, Plot) and saves the profile next to the project file
+        """
+        if not self.profile_mode.IsChecked():
+            marxanconnect.profiling.disarm()
+            return
+        directory = os.path.dirname(self.project['filepaths'].get('projfile', ''))
+        if not os.path.isdir(directory):
+            directory = os.getcwd()
+        marxanconnect.profiling.arm(directory, on_saved=self.on_profile_saved)
+        print("Profiling the next action to " + directory)
+
+    def on_profile_saved(self, filepaths):
+        self.profile_mode.Check(False)
+        marxanconpy.warn_dialog("The profile of this action has been saved to:\n" + "\n".join(filepaths) +
+                                "\n\nPlease attach these files when reporting a slow action on GitHub.",
+                                "Profile Saved")
+
+    def on_trace_mode(self, event):
+        """
+        Shows/Hides the stage timing window.
+        """
+        if self.trace_form.IsShown():
+            self.trace_form.Hide()
+        else:
+            self.trace_form.refresh()
+            self.trace_form.Show()
+
+    @deferred_until_built('connectivityMetrics')
     def enable_metrics(self):
         if self.project['filepaths']['demo_pu_cm_filepath'] != "":
             demo_enable = True
             if self.project['filepaths']['fa_filepath'] != "":
                 demo_fa_enable = True
-                if self.demo_matrixFormatRadioBox.GetStringSelection() == "Edge List with Time":
+                if self.project['options']['demo_conmat_format'] == "Edge List with Time":
                     demo_fa_time_enable = True
                 else:
                     demo_fa_time_enable = False
@@ -1389,15 +1535,15 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
                 demo_fa_enable = False
                 demo_fa_time_enable = False
 
-            if self.demo_matrixTypeRadioBox.GetStringSelection() == "Probability":
+            if self.project['options']['demo_conmat_type'] == "Probability":
                 demo_prob_enable = True
             else:
                 demo_prob_enable = False
-            if self.demo_matrixTypeRadioBox.GetStringSelection() == "Migration":
+            if self.project['options']['demo_conmat_type'] == "Migration":
                 demo_mig_enable = True
             else:
                 demo_mig_enable = False
-            if self.demo_matrixTypeRadioBox.GetStringSelection() == "Flow":
+            if self.project['options']['demo_conmat_type'] == "Flow":
                 demo_ind_enable = True
             else:
                 demo_ind_enable = False
@@ -1479,6 +1625,14 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         else:
             self.calc_metrics.Enable(False)
 
+    def build_connectivityMetrics(self):
+        gui.MarxanConnectGUI.build_connectivityMetrics(self)
+        # the minimum planar graph boundary definition is built from the planning unit adjacency (see adjacency.py)
+        for checkbox in (self.bd_demo_min_plan_graph, self.bd_land_min_plan_graph):
+            checkbox.SetToolTip(u"Uses the connectivity between adjacent planning units (the minimum planar graph) as "
+                                u"the boundary definition")
+            checkbox.Show()
+
     def on_bd_land_conn_boundary(self, event):
         self.enable_calc_metrics()
         if self.bd_land_conn_boundary.GetValue():
@@ -1607,6 +1761,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.project['options']['map_filecheck'] = self.PUSHP_filecheck.GetValue()
 
 # ########################## rescaling and matrix generation ###########################################################
+    @marxanconnect.trace.traced(category='gui')
     def on_demo_rescale_button(self, event):
         """
         Rescales the connectivity matrix to match the scale of the planning units
@@ -1615,68 +1770,17 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             marxanconpy.warn_dialog(message="Rescaling of matrices is offered as a convenience function. It it up to the user to determine"
                              " if the rescaling is ecologically valid. We recommend acquiring connectivity data at the same"
                              " scale as the planning unit")
-
-            self.check_matrix_list_format(format=self.demo_matrixFormatRadioBox.GetStringSelection(),
-                                          filepath=self.project['filepaths']['demo_cu_cm_filepath'])
-            self.temp = {}
-            # create dict entry for connectivityMetrics
-
-            if 'connectivityMetrics' not in self.project:
-
-                self.project['connectivityMetrics'] = {}
-
-            self.temp['demo_pu_conmat'] = marxanconpy.spatial.rescale_matrix(
-                self.project['filepaths']['pu_filepath'],
-                self.project['filepaths']['pu_file_pu_id'],
-                self.project['filepaths']['demo_cu_filepath'],
-                self.project['filepaths']['demo_cu_file_pu_id'],
-                self.project['filepaths']['demo_cu_cm_filepath'],
-                matrixformat=self.project['options']['demo_conmat_format'],
-                edge=self.project['options']['demo_conmat_rescale_edge'],
-                progressbar=self.project['options']['demo_pu_cm_progress'])
-
-            if self.demo_matrixFormatRadioBox.GetStringSelection() == "Edge List with Time":
-                self.temp['demo_pu_conmat_time'] = self.temp['demo_pu_conmat'][
-                    self.temp['demo_pu_conmat']['time'] != 'mean'].copy().melt(id_vars=['time', 'id1'],
-                                                                               var_name='id2',
-                                                                               value_name='value').to_json(
-                    orient='split')
-                self.temp['demo_pu_conmat'] = self.temp['demo_pu_conmat'][
-                    self.temp['demo_pu_conmat']['time'] == 'mean'].drop(['id1', 'time'], axis=1).to_json(
-                    orient='split')
-                pandas.read_json(self.temp['demo_pu_conmat_time'],
-                                 orient='split').to_csv(
-                    self.project['filepaths']['demo_pu_cm_filepath'],
-                    index=False, header=True, sep=",")
-                pandas.read_json(self.temp['demo_pu_conmat'], orient='split').to_csv(
-                    str.replace(self.project['filepaths']['demo_pu_cm_filepath'], '.csv',
-                                '_mean_of_times.csv'),
-                    index=True, header=True, sep=",")
-
-            else:
-                self.temp['demo_pu_conmat'] = self.temp['demo_pu_conmat'].to_json(orient='split')
-                pandas.read_json(self.temp['demo_pu_conmat'],
-                                 orient='split').to_csv(
-                    self.project['filepaths']['demo_pu_cm_filepath'], index=True, header=True, sep=",")
+            self.project['options']['demo_conmat_format'] = self.demo_matrixFormatRadioBox.GetStringSelection()
+            marxanconnect.pipeline.rescale_demo(self.project)
         except:
             self.log.Show()
             raise
 
+    @marxanconnect.trace.traced(category='gui')
     def on_land_generate_button(self, event):
         try:
-            self.temp = {}
-            self.temp['land_pu_conmat'] = marxanconpy.spatial.habitatresistance2conmats(
-                buff=float(self.project['options']['land_hab_buff']),
-                hab_filepath=self.project['filepaths']['land_cu_filepath'],
-                hab_id=self.project['filepaths']['land_cu_file_hab_id'],
-                res_mat_filepath=self.project['filepaths']['land_res_mat_filepath'],
-                pu_filepath=self.project['filepaths']['pu_filepath'],
-                pu_id=self.project['filepaths']['pu_file_pu_id'],
-                res_type=self.project['options']['land_res_matrixType'],
-                progressbar=self.land_PU_CM_progress.GetValue())
-
-            pandas.read_json(self.temp['land_pu_conmat'], orient='split').to_csv(
-                self.project['filepaths']['land_pu_cm_filepath'], index=0, header=True, sep=",")
+            self.project['options']['land_pu_cm_progress'] = self.land_PU_CM_progress.GetValue()
+            marxanconnect.pipeline.generate_land(self.project)
         except:
             self.log.Show()
             raise
@@ -1687,77 +1791,24 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
 
     def check_matrix_list_format(self, format, filepath):
         # warn if matrix is wrong format
-        if format == "Matrix":
-            self.conmat = pandas.read_csv(filepath, index_col=0)
-        else:
-            if format == "Edge List":
-                self.ncol = 3
-                self.expected = numpy.array(['id1', 'id2', 'value'])
-            elif format == "Edge List with Type":
-                self.ncol = 4
-                self.expected = numpy.array(['type', 'id1', 'id2', 'value'])
-            elif format == "Edge List with Time":
-                self.ncol = 4
-                self.expected = numpy.array(['time', 'id1', 'id2', 'value'])
-            self.conmat = pandas.read_csv(filepath)
-            self.message = "See the Glossary for 'Data Formats' under 'Connectivity'."
-            self.warn = False
-            if not self.conmat.shape[1] == self.ncol:
-                self.message = self.message + " The " + format + " Data Format expects exactly " + str(self.ncol) + " columns, not " + \
-                               str(self.conmat.shape[1]) + " in the file."
-                self.warn = True
-
-            self.missing = [c not in self.conmat.columns for c in self.expected]
-            if any(self.missing):
-                self.message = self.message + " The " + format + " Data Format expects column header(s) '" + \
-                               str(self.expected[self.missing]) + \
-                               "' which may be missing in the file."
-                self.warn = True
-            if self.warn:
-                marxanconpy.warn_dialog(message=self.message)
-        return
+        marxanconnect.pipeline.check_matrix_list_format(format=format, filepath=filepath)
 
 # ##########################  metric related functions ################################################################
 
+    @marxanconnect.trace.traced(category='gui')
     def on_calc_metrics(self, event):
         """
         calculates the selected metrics
         """
         try:
-            print("Calculating Metrics")
-
             self.set_metric_options()
-
-            if not any(self.project['options']['land_metrics'].values()) and not any(
-                    self.project['options']['demo_metrics'].values()):
-                marxanconpy.warn_dialog(message="No metrics selected")
-                raise Exception("No metrics selected")
-
-            if not self.calc_metrics_pu.GetValue() and not self.calc_metrics_cu.GetValue():
-                marxanconpy.warn_dialog(message="No 'Units' selected for metric calculations.")
-                raise Exception("No 'Units' selected for metric calculations.")
-
-            marxanconpy.manipulation.calc_metrics(project=self.project,
-                                                  progressbar=True,
-                                                  calc_metrics_pu=self.calc_metrics_pu.GetValue(),
-                                                  calc_metrics_cu=self.calc_metrics_cu.GetValue())
-
-
-
-
-
-
-
+            self.project['options']['calc_metrics_pu'] = self.calc_metrics_pu.GetValue()
+            self.project['options']['calc_metrics_cu'] = self.calc_metrics_cu.GetValue()
+            marxanconnect.pipeline.calc_metrics(self.project, progressbar=True)
 
             # create initial spec
-            self.project['options']['metricsCalculated'] = True
             self.on_new_spec()
-            self.customize_spec.Enable(enable=True)
-            self.export_CF_files.Enable(enable=True)
-            self.export_BD_file.Enable(enable=True)
-            self.export_pudat.Enable(enable=True)
-            self.export_metrics.Enable(enable=True)
-            self.custom_spec_panel.SetToolTip(None)
+            self.enable_export()
             self.colormap_shapefile_choices()
             self.colormap_metric_choices(1)
             self.colormap_metric_choices(2)
@@ -1771,6 +1822,55 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         marxanconpy.warn_dialog("All calculations completed successfully.",
                                 "Calculations Successful")
 
+    @marxanconnect.trace.traced(category='gui')
+    def on_update_all(self, event):
+        """
+        rebuilds only the outputs (metrics, Marxan files, Marxan output and post-hoc evaluation) which are out of date
+        """
+        try:
+            self.set_metric_options()
+            self.project['options']['calc_metrics_pu'] = self.calc_metrics_pu.GetValue()
+            self.project['options']['calc_metrics_cu'] = self.calc_metrics_cu.GetValue()
+
+            # Marxan and the post-hoc evaluation are only updated once Marxan has been run
+            targets = ['inputdat']
+            if os.path.isfile(self.project['filepaths']['marxan_input']) and \
+                    marxanconnect.pipeline.run_index(self.project).has_output():
+                targets.append('posthoc')
+            rebuilt = marxanconnect.dependencies.update(
+                self.project, self.spatial, targets,
+                builders={'marxan_output': lambda project, spatial: self.on_run_marxan(event=None)})
+
+            if any(name.startswith('metric:') or name == 'discrete_features' for name in rebuilt):
+                self.on_new_spec()
+                self.enable_export()
+                self.colormap_shapefile_choices()
+                self.colormap_metric_choices(1)
+                self.colormap_metric_choices(2)
+                self.colormap_metric_choices("pre-eval")
+                self.update_discrete_grid()
+            if 'posthoc' in rebuilt:
+                self.enable_postHoc()
+
+        except:
+            print("Warning: Error in Update All")
+            self.log.Show()
+            raise
+        if rebuilt:
+            marxanconpy.warn_dialog("Updated: " + ", ".join(rebuilt), "Update Successful")
+        else:
+            marxanconpy.warn_dialog("Everything is up to date.", "Update Successful")
+
+    @deferred_until_built('exportMarxan')
+    def enable_export(self):
+        self.customize_spec.Enable(enable=True)
+        self.export_CF_files.Enable(enable=True)
+        self.export_BD_file.Enable(enable=True)
+        self.export_pudat.Enable(enable=True)
+        self.export_metrics.Enable(enable=True)
+        self.custom_spec_panel.SetToolTip(None)
+
+    @marxanconnect.trace.traced(category='gui')
     def on_export_metrics(self, event):
         self.on_export_CF_files(event=None, mute=True)
         self.on_export_BD_file(event=None, mute=True)
@@ -1778,165 +1878,39 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         marxanconpy.warn_dialog("All files exported successfully.",
                                 "Export Successful")
 
+    @marxanconnect.trace.traced(category='gui')
     def on_export_CF_files( self, event, mute=False ):
-        cf = {}
-        spec = {}
-        for type in ['spec_demo_pu', 'spec_land_pu']:
-            if type in self.project['connectivityMetrics']:
-                metrics = list(self.project['connectivityMetrics'][type])
-                approved = ['discrete']
-                metrics[:] = [m for m in metrics if any(a in m for a in approved)]
-                for k in metrics:
-                    cf[k] = self.project['connectivityMetrics'][type].copy().pop(k)
-
-        spec = pandas.read_json(self.project['spec_dat'], orient='split')
-        if len(cf) == 0:
-            marxanconpy.warn_dialog(message="No conservation features associated with planning units were calculated.")
-        else:
-            # Export or append feature files
-            if self.cf_export_radioBox.GetStringSelection() == "Export":
-                # export spec
-
-                spec.to_csv(self.project['filepaths']['spec_filepath'], index=0)
-                # export conservation features
-                cf['pu'] = gpd.GeoDataFrame.from_file(self.project['filepaths']['pu_filepath'])[self.project['filepaths']['pu_file_pu_id']]
-                try:
-                    cf['pu'] = cf['pu'].astype('int').astype('str')
-                except:
-                    cf['pu'] = cf['pu'].astype('str')
-                cf = pandas.DataFrame(cf).melt(id_vars=['pu'], var_name='name', value_name='amount')
-                cf = pandas.merge(cf, spec, how='outer', on='name')
-                cf = cf.rename(columns={'id': 'species'}).sort_values(['pu', 'species'])
-                cf = cf[cf['amount'] > 0]
-                cf = cf.sort_values(by=['pu'])
-                cf[['species', 'pu', 'amount']].to_csv(self.project['filepaths']['cf_filepath'], index=0)
-
-            elif self.cf_export_radioBox.GetStringSelection() == "Append":
-                # append
-                if os.path.isfile(self.project['filepaths']['orig_spec_filepath']):
-                    old_spec = marxanconpy.read_csv_tsv(self.project['filepaths']['orig_spec_filepath'])
-                else:
-                    marxanconpy.warn_dialog("Warning! File: " +
-                                            self.project['filepaths']['orig_spec_filepath'] +
-                                            " does not exist.")
-
-                if os.path.isfile(self.project['filepaths']['orig_cf_filepath']):
-                    old_cf = marxanconpy.read_csv_tsv(self.project['filepaths']['orig_cf_filepath'])
-                    try:
-                        old_cf['pu'] = old_cf['pu'].astype('int').astype('str')
-                    except:
-                        old_cf['pu'] = old_cf['pu'].astype('str')
-                else:
-                    marxanconpy.warn_dialog("Warning! File: " +
-                                            self.project['filepaths']['orig_cf_filepath'] +
-                                            " does not exist.")
-
-
-
-                # append spec
-                new_spec = spec.copy()
-                new_spec['id'] = new_spec['id'] + max(old_spec['id'])
-                pandas.concat([old_spec, new_spec],sort=False).fillna(0.0).to_csv(
-                    self.project['filepaths']['spec_filepath']
-                    , index=0)
-                # append conservation features
-                new_cf = cf.copy()
-                new_cf['pu'] = gpd.GeoDataFrame.from_file(self.project['filepaths']['pu_filepath'])[self.project['filepaths']['pu_file_pu_id']]
-                try:
-                    new_cf['pu'] = new_cf['pu'].astype('int').astype('str')
-                except:
-                    new_cf['pu'] = new_cf['pu'].astype('str')
-
-                new_cf = pandas.DataFrame(new_cf).melt(id_vars=['pu'], var_name='name', value_name='amount')
-                new_cf = pandas.merge(new_cf, new_spec, how='outer', on='name')
-                new_cf = new_cf.rename(columns={'id': 'species'})
-                new_cf = new_cf[new_cf['amount']>0]
-                pandas.concat([old_cf, new_cf[['species', 'pu', 'amount']]],sort=False).sort_values(['pu','species']).to_csv(
-                    self.project['filepaths']['cf_filepath'], index=0)
+        self.project['options']['cf_export'] = self.cf_export_radioBox.GetStringSelection()
+        marxanconnect.pipeline.export_cf_files(self.project, self.spatial)
 
         if not mute:
             marxanconpy.warn_dialog("Planning Unit versus Conservation Feature (i.e. puvspr.dat) and Conservation Feature (i.e. spec.dat) files exported successfully.",
                                     "Export Successful")
 
+    @marxanconnect.trace.traced(category='gui')
     def on_export_BD_file( self, event, mute=False):
-        if self.BD_filecheck.GetValue():
-            self.export_boundary_file(BD_filepath=self.project['filepaths']['bd_filepath'])
+        self.project['options']['bd_filecheck'] = self.BD_filecheck.GetValue()
+        marxanconnect.pipeline.export_bd_file(self.project)
         if not mute:
             marxanconpy.warn_dialog("Spatial Dependencies (i.e. boundary.dat) file exported successfully.",
                                     "Export Successful")
 
+    @marxanconnect.trace.traced(category='gui')
     def on_export_PUDAT( self, event, mute=False):
-        if self.PUDAT_filecheck.GetValue():
-            if os.path.isfile(self.project['filepaths']['orig_pudat_filepath']):
-                self.temp = {}
-                self.lock_pudat(self.project['filepaths']['orig_pudat_filepath'])
-                self.temp['pudat'] = marxanconpy.read_csv_tsv(self.project['filepaths']['orig_pudat_filepath'])
-                self.temp['pudat']['status'] = self.project['connectivityMetrics']['status']
-                self.temp['pudat'].to_csv(self.project['filepaths']['pudat_filepath'], index=0)
-            else:
-                marxanconpy.warn_dialog("Warning! File: " +
-                                        self.project['filepaths']['orig_pudat_filepath'] +
-                                        " does not exist.")
+        self.project['options']['pudat_filecheck'] = self.PUDAT_filecheck.GetValue()
+        marxanconnect.pipeline.export_pudat(self.project, self.spatial)
 
         if not mute:
             marxanconpy.warn_dialog("Planning Unit (i.e. pu.dat) file exported successfully.",
                                     "Export Successful")
 
     def export_boundary_file(self, BD_filepath):
-        multiple = len(self.project['connectivityMetrics']['boundary'].keys()) > 1
-
-        for k in self.project['connectivityMetrics']['boundary']:
-            # Export each selected boundary definition
-            if multiple:
-                pandas.read_json(self.project['connectivityMetrics']['boundary'][k],
-                                 orient='split').to_csv(str.replace(BD_filepath,
-                                                                    ".dat",
-                                                                    "_" + k + ".dat"),
-                                                        index=False)
-            else:
-                pandas.read_json(self.project['connectivityMetrics']['boundary'][k],
-                                 orient='split').to_csv(BD_filepath, index=False)
-
-        # warn when multiple boundary definitions
-        if multiple:
-            marxanconpy.warn_dialog(message="Multiple Boundary Definitions were selected. Boundary file names have been"
-                                     " edited to include type.", caption="Warning!")
+        marxanconnect.pipeline.export_boundary_file(self.project, BD_filepath)
 
     def lock_pudat(self, pudat_filepath):
         if os.path.isfile(pudat_filepath):
-            self.temp = {}
-            self.temp['pudat'] = marxanconpy.read_csv_tsv(pudat_filepath)
-            if os.path.isfile(self.project['filepaths']['fa_filepath']):
-                if self.fa_status_radioBox.GetStringSelection() == "Locked out":
-                    self.temp['pudat'].loc[numpy.array(self.spatial['pu_shp']['fa_included']), 'status'] = 3
-                if self.fa_status_radioBox.GetStringSelection() == "Locked in":
-                    self.temp['pudat'].loc[numpy.array(self.spatial['pu_shp']['fa_included']), 'status'] = 2
-
-            if os.path.isfile(self.project['filepaths']['aa_filepath']):
-                if self.aa_status_radioBox.GetStringSelection() == "Locked out":
-                    self.temp['pudat'].loc[numpy.array(self.spatial['pu_shp']['aa_included']), 'status'] = 3
-                if self.aa_status_radioBox.GetStringSelection() == "Locked in":
-                    self.temp['pudat'].loc[numpy.array(self.spatial['pu_shp']['aa_included']), 'status'] = 2
-
-            self.temp['all_metrics'] = []
-            if 'connectivityMetrics' in self.project:
-                if 'spec_demo_pu' in self.project['connectivityMetrics']:
-                    self.temp['all_metrics'] += self.project['connectivityMetrics']['spec_demo_pu']
-                if 'spec_land_pu' in self.project['connectivityMetrics']:
-                    self.temp['all_metrics'] += self.project['connectivityMetrics']['spec_land_pu']
-
-            for self.temp['metric'] in self.temp['all_metrics']:
-                if 'demo_pu' in self.temp['metric']:
-                    self.temp['metric_values'] = self.project['connectivityMetrics']['spec_demo_pu'][self.temp['metric']]
-                if 'land_pu' in self.temp['metric']:
-                    self.temp['metric_values'] = self.project['connectivityMetrics']['spec_land_pu'][self.temp['metric']]
-
-                if self.temp['metric'].endswith('lockout'):
-                    self.temp['pudat'].loc[numpy.array(self.temp['metric_values']) != 0, 'status'] = 3
-                if self.temp['metric'].endswith('lockin'):
-                    self.temp['pudat'].loc[numpy.array(self.temp['metric_values']) != 0, 'status'] = 2
-
-                self.project['connectivityMetrics']['status'] = self.temp['pudat']['status'].tolist()
+            marxanconnect.pipeline.lock_pudat(self.project, self.spatial)
+            if 'status' in self.project.get('connectivityMetrics', {}):
                 self.colormap_shapefile_choices()
                 self.colormap_metric_choices(1)
                 self.colormap_metric_choices(2)
@@ -1990,6 +1964,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             
         self.on_plot_freq(self.temp['metric'],metric_type)
             
+    @marxanconnect.trace.traced(category='gui')
     def on_plot_freq(self,metric,metric_type):
         # prepare plotting window
         if not hasattr(self, 'plot'):
@@ -2001,7 +1976,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
                     self.auinotebook.AddPage(self.plot, u"9) Plot", False, wx.NullBitmap)
         self.plot.figure = plt.figure(figsize=self.plot.GetClientSize() / wx.ScreenDC().GetPPI()[0])
         self.plot.axes = self.plot.figure.gca()
-        self.plot.canvas = FigureCanvas(self.plot, -1, self.plot.figure)
+        self.plot.canvas = backend_wxagg.FigureCanvasWxAgg(self.plot, -1, self.plot.figure)
         self.plot.sizer = wx.BoxSizer(wx.VERTICAL)
         self.plot.sizer.Add(self.plot.canvas, 1, wx.LEFT | wx.TOP | wx.GROW)
         self.plot.SetSizer(self.plot.sizer)
@@ -2143,6 +2118,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         event.GetEventObject().SetValue(True)
         self.enable_discrete()
 
+    @deferred_until_built('preEvaluation')
     def enable_discrete(self):
         if self.preEval_discrete_from_quartile.GetValue():
             self.preEval_discrete_from_quartile_radio.Enable(True)
@@ -2174,9 +2150,10 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         else:
             self.preEval_discrete_to_value_txtctrl.Enable(False)
 
+    @deferred_until_built('preEvaluation')
     def update_discrete_grid(self):
         self.all_types = []
-        if self.calc_metrics_pu.GetValue():
+        if self.get_calc_metrics_pu():
             if os.path.isfile(self.project['filepaths']['demo_pu_cm_filepath']):
                 self.all_types += ['demo_pu']
             if os.path.isfile(self.project['filepaths']['land_pu_cm_filepath']):
@@ -2220,78 +2197,14 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
 
 # ########################## marxan functions ##########################################################################
 
+    @marxanconnect.trace.traced(category='gui')
     def on_generate_inputdat( self, event ):
         """
         Generate the Marxan input file from the template
         :param event:
         :return:
         """
-        if self.project['filepaths']['marxan_template_input'] == 'Default':
-            with open(os.path.join(MCPATH, 'Marxan243','input_template.dat'), 'r', encoding="utf8") as file:
-                filedata = file.readlines()
-        else:
-            with open(self.project['filepaths']['marxan_template_input'], 'r', encoding="utf8") as file:
-                filedata = file.readlines()
-
-        if self.project['options']['inputdat_boundary'] == 'Asymmetric':
-            if not 'ASYMMETRICCONNECTIVITY  1\n' in filedata:
-                filedata.insert([index for index, line in enumerate(filedata) if line.startswith('NUMREPS')][0] + 1,
-                            'ASYMMETRICCONNECTIVITY  1\n')
-        else:
-            if 'ASYMMETRICCONNECTIVITY  1\n' in filedata:
-                filedata.remove('ASYMMETRICCONNECTIVITY  1\n')
-
-        # Replace the target string
-        pudat = []
-        for index, line in enumerate(filedata):
-            if line.startswith("INPUTDIR"):
-                inputdir = os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']),
-                                        line.replace('INPUTDIR ', '').replace('\n', ''))
-
-            if line.startswith("NUMREPS"):
-                line = 'NUMREPS ' + self.project['options']['NUMREPS'] + '\n'
-
-
-            if line.startswith("SCENNAME"):
-                line = 'SCENNAME ' + self.project['options']['SCENNAME'] + '\n'
-
-            if line.startswith("NUMITNS"):
-                line = 'NUMITNS ' + self.project['options']['NUMITNS'] + '\n'
-
-            if line.startswith("BLM"):
-                line = 'BLM ' + self.project['options']['CSM'] + '\n'
-
-            if line.startswith("PUVSPRNAME"):
-                if self.project['options']['marxan_CF'] == 'New':
-                    line = 'PUVSPRNAME ' + os.path.relpath(self.project['filepaths']['cf_filepath'],inputdir) + '\n'
-                else:
-                    line = 'PUVSPRNAME ' + os.path.relpath(self.project['filepaths']['orig_cf_filepath'],inputdir) + '\n'
-
-            if line.startswith("SPECNAME"):
-                if self.project['options']['marxan_CF'] == 'New':
-                    line = 'SPECNAME ' + os.path.relpath(self.project['filepaths']['spec_filepath'],inputdir) + '\n'
-                else:
-                    line = 'SPECNAME ' + os.path.relpath(self.project['filepaths']['orig_spec_filepath'],inputdir) + '\n'
-
-            if line.startswith("PUNAME"):
-                if self.project['options']['marxan_PU'] == 'New':
-                    line = 'PUNAME ' + os.path.relpath(self.project['filepaths']['pudat_filepath'],inputdir) + '\n'
-                else:
-                    line = 'PUNAME ' + os.path.relpath(self.project['filepaths']['orig_pudat_filepath'],inputdir) + '\n'
-
-            if line.startswith("BOUNDNAME"):
-                if self.project['options']['marxan_bound'] == 'New':
-                    line = 'BOUNDNAME ' + os.path.relpath(self.project['filepaths']['bd_filepath'],inputdir) + '\n'
-                elif self.project['options']['marxan_bound'] == 'Original':
-                    line = 'BOUNDNAME ' + os.path.relpath(self.project['filepaths']['orig_bd_filepath'],inputdir) + '\n'
-                else:
-                    line = '\n'
-
-
-            pudat.append(line)
-
-        with open(self.project['filepaths']['marxan_input'], 'w', encoding="utf8") as file:
-            file.writelines(pudat)
+        marxanconnect.pipeline.generate_inputdat(self.project, rootpath=MCPATH)
 
         marxanconpy.warn_dialog("The Marxan input file (i.e. input.dat) has been generated successfully.",
                                 "Operation Successful")
@@ -2315,6 +2228,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             os.system("open -t " + self.project['filepaths']['marxan_input'])
 
 
+    @marxanconnect.trace.traced(category='gui')
     def on_run_marxan(self, event):
         """
         Starts Marxan
@@ -2330,24 +2244,9 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
 
         if not 'connectivityMetrics' in self.project:
             self.project['connectivityMetrics'] = {}
-        self.temp = {}
 
-        # edit input file
-        # Read in the file
-        with open(self.project['filepaths']['marxan_input'], 'r', encoding="utf8") as file:
-            filedata = file.readlines()
-
-        for index, line in enumerate(filedata):
-            if line.startswith("INPUTDIR"):
-                inputdir = line.replace("INPUTDIR ", "").strip('\n')
-                inputdatdir = os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']), inputdir)
-                if not os.path.isdir(inputdir) and not os.path.isdir(inputdatdir):
-                    marxanconpy.warn_dialog(message="Warning: Marxan Input File has an invalid input directory " + line)
-            if line.startswith("OUTPUTDIR"):
-                inputdir = line.replace("OUTPUTDIR ", "").strip('\n')
-                inputdatdir = os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']), inputdir)
-                if not os.path.isdir(inputdir) and not os.path.isdir(inputdatdir):
-                    marxanconpy.warn_dialog(message="Warning: Marxan Input File has an invalid input directory " + line)
+        # check input file
+        marxanconnect.pipeline.check_inputdat(self.project)
 
         inputpath = os.path.dirname(self.project['filepaths']['marxan_input'])
         marxanpath = MCPATH
@@ -2360,16 +2259,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         if platform.system() == 'Windows':
             marxanconpy.warn_dialog(
                 "Please note: Marxan Connect will be unresponsive until the Marxan pop-up window has finished and has been closed.")
-            if self.project['options']['marxan'] == "Marxan":
-                if self.project['options']['marxan_bit']=="64-bit":
-                    marxan_exec = 'Marxan_x64.exe'
-                else:
-                    marxan_exec = 'Marxan.exe'
-            else:
-                if self.project['options']['marxan_bit']=="64-bit":
-                    marxan_exec = 'MarZone_x64.exe'
-                else:
-                    marxan_exec = 'MarZone.exe'
+            marxan_exec = marxanconnect.pipeline.marxan_executable(self.project)
 
             if " " in self.project['filepaths']['marxan_input']:
                 marxanconpy.warn_dialog("Marxan will likely fail to find the input file because the filepath contains "
@@ -2386,13 +2276,9 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
                 "Please note: Marxan Connect will be unresponsive until the Marxan pop-up window has finished. On macOS,"
                 "Marxan Connect does not provide 'live' updates on Marxan's progress. See the 'macOS Marxan feedback' "
                 "issue on our github page")
-            if self.project['options']['marxan'] == "Marxan":
-                if self.project['options']['marxan_bit']=="64-bit":
-                    marxan_exec = 'MarOpt_v243_Mac64'
-                else:
-                    marxan_exec = 'MarOpt_v243_Mac32'
-            else:
+            if self.project['options']['marxan'] != "Marxan":
                 marxanconpy.warn_dialog('Sorry, this experimental feature is only available for Windows at the monment')
+            marxan_exec = marxanconnect.pipeline.marxan_executable(self.project)
 
             if " " in self.project['filepaths']['marxan_input']:
                 marxanconpy.warn_dialog("Marxan will likely fail to find the input file because the filepath contains "
@@ -2406,14 +2292,7 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.load_marxan_output()
 
     def load_marxan_output(self):
-        if not('connectivityMetrics' in self.project):
-            self.project['connectivityMetrics'] = {}
-        
-        self.project['connectivityMetrics']['select_freq'] = marxanconpy.manipulation.get_marxan_output(self.project['filepaths']['marxan_input'],
-                                                              'Selection Frequency').iloc[:,1].tolist()
-        
-        self.project['connectivityMetrics']['best_solution'] = marxanconpy.manipulation.get_marxan_output(self.project['filepaths']['marxan_input'],
-                                                              'Best Solution').iloc[:,1].tolist()
+        marxanconnect.pipeline.load_marxan_output(self.project)
 
         # update plotting options
         self.colormap_shapefile_choices()
@@ -2422,53 +2301,24 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         self.enable_postHoc()
 
     def on_view_mvbest(self,event):
-        self.temp = {}
-        for line in open(self.project['filepaths']['marxan_input']):
-            if line.startswith('SCENNAME'):
-                self.temp['SCENNAME'] = line.replace('SCENNAME ', '').replace('\n', '')
-            elif line.startswith('OUTPUTDIR'):
-                self.temp['OUTPUTDIR'] = line.replace('OUTPUTDIR ', '').replace('\n', '')
-        mvbest = os.path.join(self.temp['OUTPUTDIR'],self.temp['SCENNAME']+'_mvbest')
-        if os.path.isfile(mvbest+".txt"):
-            file_viewer(parent=self, file=mvbest+".txt",title='mvbest')
-        elif os.path.isfile(mvbest+".csv"):
-            file_viewer(parent=self, file=mvbest+".csv",title='mvbest')
-        elif os.path.isfile(os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']),mvbest)+".txt"):
-            file_viewer(parent=self,
-                        file=os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']),mvbest)+".txt",
-            title='mvbest')
-        elif os.path.isfile(os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']),mvbest)+".csv"):
-            file_viewer(parent=self,
-                        file=os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']),mvbest)+".csv",
-                        title='mvbest')
-        else:
-            print("file not found")
+        self.on_view_output('mvbest')
 
     def on_view_sum(self,event):
-        self.temp = {}
-        for line in open(self.project['filepaths']['marxan_input']):
-            if line.startswith('SCENNAME'):
-                self.temp['SCENNAME'] = line.replace('SCENNAME ', '').replace('\n', '')
-            elif line.startswith('OUTPUTDIR'):
-                self.temp['OUTPUTDIR'] = line.replace('OUTPUTDIR ', '').replace('\n', '')
-        sumtxt = os.path.join(self.temp['OUTPUTDIR'], self.temp['SCENNAME'] + '_sum')
-        if os.path.isfile(sumtxt+".txt"):
-            file_viewer(parent=self, file=sumtxt+".txt", title='sum')
-        elif os.path.isfile(sumtxt+".csv"):
-            file_viewer(parent=self, file=sumtxt+".csv", title='sum')
-        elif os.path.isfile(os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']), sumtxt)+".txt"):
-            file_viewer(parent=self,
-                        file=os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']), sumtxt)+".txt",
-                        title='sum')
-        elif os.path.isfile(os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']), sumtxt)+".csv"):
-            file_viewer(parent=self,
-                        file=os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']), sumtxt)+".csv",
-                        title='sum')
-        else:
+        self.on_view_output('sum')
+
+    def on_view_output(self, output):
+        """
+        Opens a Marxan output file ('mvbest', 'sum', ...) in the file viewer
+        """
+        file = marxanconnect.pipeline.run_index(self.project).filepath(output)
+        if file is None:
             print("file not found")
+        else:
+            file_viewer(parent=self, file=file, title=output)
 
 # ########################## postHoc functions ##########################################################################
 
+    @deferred_until_built('postHocEvaluation')
     def enable_postHoc(self):
         self.set_postHoc_category_choice()
         if 'connectivityMetrics' in self.project:
@@ -2546,79 +2396,58 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         else:
             self.postHoc_percentage_slider.Enable(False)
 
+    def build_postHocEvaluation(self):
+        gui.MarxanConnectGUI.build_postHocEvaluation(self)
+        # batch evaluation button, next to "Calculate Post-Hoc"
+        self.calc_postHoc_batch = wx.Button(self.postHocEvaluation, wx.ID_ANY, u"Evaluate All Restarts",
+                                            wx.DefaultPosition, wx.DefaultSize, 0)
+        self.calc_postHoc_batch.SetToolTip(u"Evaluates the best solution, every Marxan restart and the selection "
+                                           u"frequency at 10% to 90% and exports the results to one table next to the "
+                                           u"post-hoc file")
+        self.calc_postHoc.GetContainingSizer().Add(self.calc_postHoc_batch, 0, wx.ALL, 5)
+        self.calc_postHoc_batch.Bind(wx.EVT_BUTTON, self.on_calc_postHoc_batch)
+        # selection frequency sweep button
+        self.calc_postHoc_sweep = wx.Button(self.postHocEvaluation, wx.ID_ANY, u"Selection Frequency Sweep",
+                                            wx.DefaultPosition, wx.DefaultSize, 0)
+        self.calc_postHoc_sweep.SetToolTip(u"Evaluates the selection frequency at every percentage from 0% to 100%, "
+                                           u"plots the results and exports them next to the post-hoc file")
+        self.calc_postHoc.GetContainingSizer().Add(self.calc_postHoc_sweep, 0, wx.ALL, 5)
+        self.calc_postHoc_sweep.Bind(wx.EVT_BUTTON, self.on_calc_postHoc_sweep)
+        # restart similarity button
+        self.calc_restart_similarity = wx.Button(self.postHocEvaluation, wx.ID_ANY, u"Restart Similarity",
+                                                 wx.DefaultPosition, wx.DefaultSize, 0)
+        self.calc_restart_similarity.SetToolTip(u"Compares the solutions of every Marxan restart, clusters similar "
+                                                u"solutions and reports the representative solution of each cluster")
+        self.calc_postHoc.GetContainingSizer().Add(self.calc_restart_similarity, 0, wx.ALL, 5)
+        self.calc_restart_similarity.Bind(wx.EVT_BUTTON, self.on_calc_restart_similarity)
+
+    def get_postHoc_context(self, category):
+        """
+        The post-hoc planning units, projections and connectivity graphs are kept between evaluations until the planning
+        unit or connectivity files change
+        """
+        filename, format = marxanconnect.pipeline.postHoc_connectivity(self.project, category)
+        key = [category, format, self.project['options'].get('postHoc_max_distance')]
+        for filepath in (self.project['filepaths']['pu_filepath'], filename):
+            key += [filepath, os.path.getmtime(filepath) if os.path.isfile(filepath) else None]
+        if getattr(self, 'postHoc_context_key', None) != key:
+            self.postHoc_context = marxanconnect.pipeline.postHoc_context(self.project, category)
+            self.postHoc_context_key = key
+        return self.postHoc_context
+
+    @marxanconnect.trace.traced(category='gui')
     def on_calc_postHoc(self, event):
-        self.project["postHoc"] = {}
-        if self.postHoc_category_choice.GetStringSelection() == "Landscape Data":
-            format = "Edge List with Habitat"
-            filename = self.project['filepaths']['land_pu_cm_filepath']
-        elif self.postHoc_category_choice.GetStringSelection() == "Demographic Data":
-            format = self.demo_matrixFormatRadioBox.GetStringSelection()
-            filename = self.project['filepaths']['demo_pu_cm_filepath']
-        else:
-            format = None
-            filename = "notarealfilename"
-
-        if self.postHoc_custom_choice.GetValue():        
-            solution = marxanconpy.read_csv_tsv(self.postHoc_custom_file.GetPath())
-        elif self.postHoc_output_choice.GetStringSelection()=="Selection Frequency":
-            for line in open(self.project['filepaths']['marxan_input']):
-                if line.startswith('NUMREPS'):
-                    NUMREPS = int(line.replace('NUMREPS ', '').replace('\n', ''))
-                    
-            solution = marxanconpy.manipulation.get_marxan_output(self.project['filepaths']['marxan_input'],
-                                                              self.postHoc_output_choice.GetStringSelection())
-            solution.iloc[:,1] = (solution.iloc[:,1]>(NUMREPS/100*self.postHoc_percentage_slider.GetValue())).astype(int)
-        else:
-            solution = marxanconpy.manipulation.get_marxan_output(self.project['filepaths']['marxan_input'],
-                                                              self.postHoc_output_choice.GetStringSelection())
-        
-        pu = gpd.GeoDataFrame.from_file(self.project['filepaths']['pu_filepath']).to_crs('+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs')
-        self.project["postHoc"]["min_dist"] = marxanconpy.posthoc.calc_postHoc_dist(pu,
-                                                         filename,
-                                                         format,
-                                                         IDs=solution.iloc[:,0].values,
-                                                         selectionIDs=solution[(solution.iloc[:,1].astype("str")=="1").values].iloc[:,0].values)
-        self.project["postHoc"]["clusters"] = marxanconpy.posthoc.calc_postHoc_clusters(pu,
-                                                               filename,
-                                                               format,
-                                                               IDs=solution.iloc[:,0].values,
-                                                               selectionIDs=solution[(solution.iloc[:,1].astype("str")=="1").values].iloc[:,0].values)
-        self.project["postHoc"]["areas"] = self.project["postHoc"]["clusters"].area
-        self.project["postHoc"]["fragmentation"] = marxanconpy.posthoc.calc_postHoc_frag(self.project["postHoc"]["clusters"])
-        
-        
-        # sum data
-        for line in open(self.project['filepaths']['marxan_input']):
-            if line.startswith('SCENNAME'):
-                SCENNAME = line.replace('SCENNAME ', '').replace('\n', '')
-            elif line.startswith('NUMREPS'):
-                NUMREPS = int(line.replace('NUMREPS ', '').replace('\n', ''))
-            elif line.startswith('OUTPUTDIR'):
-                OUTPUTDIR = line.replace('OUTPUTDIR ', '').replace('\n', '')
-
-        if not os.path.isdir(OUTPUTDIR):
-            OUTPUTDIR = os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']),OUTPUTDIR)
-            
-            
-        fn = os.path.join(OUTPUTDIR, SCENNAME + "_sum")
-        if os.path.isfile(fn + '.csv'):
-            file = marxanconpy.read_csv_tsv(fn + '.csv')
-        elif os.path.isfile(fn + '.txt'):
-            file = marxanconpy.read_csv_tsv(fn + '.txt')
+        if self.postHoc_custom_choice.GetValue():
+            custom_file = self.postHoc_custom_file.GetPath()
         else:
-            print('WARNING: ' + fn + ' not found')
-        
-        self.project["postHoc"]["sum_data"] = file.iloc[int(file[["Score"]].idxmin())]
-        
-        postHoc = marxanconpy.posthoc.calc_postHoc(pu,
-                                                   filename,
-                                                   format,
-                                                   IDs=solution.iloc[:,0].values,
-                                                   selectionIDs=solution[(solution.iloc[:,1].astype("str")=="1").values].iloc[:,0].values,
-                                                   sum_data=self.project["postHoc"]["sum_data"],
-                                                   min_dist=self.project["postHoc"]["min_dist"],
-                                                   fragmentation=self.project["postHoc"]["fragmentation"],
-                                                   postHoc_areas=self.project["postHoc"]["areas"])
+            custom_file = None
+        category = self.postHoc_category_choice.GetStringSelection()
+        postHoc = marxanconnect.pipeline.calc_postHoc(self.project,
+                                                      category=category,
+                                                      output=self.postHoc_output_choice.GetStringSelection(),
+                                                      percentage=self.postHoc_percentage_slider.GetValue(),
+                                                      custom_file=custom_file,
+                                                      context=self.get_postHoc_context(category))
         Cols = self.postHoc_grid.GetNumberCols()
         Rows = self.postHoc_grid.GetNumberRows()
         if Cols > 0 or Rows > 0:
@@ -2657,32 +2486,121 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         winx,winy = self.GetSize()
         if winy-y < 280:
             self.postHoc_grid.SetSize(x+20,winy-280)
-        self.project["postHoc"]["summary"] = postHoc.to_json(orient='split')
         self.enable_postHoc()
 
+    @marxanconnect.trace.traced(category='gui')
+    def on_calc_postHoc_batch(self, event):
+        category = self.postHoc_category_choice.GetStringSelection()
+        try:
+            batch = marxanconnect.pipeline.calc_postHoc_batch(self.project, category,
+                                                              context=self.get_postHoc_context(category))
+        except:
+            print("Warning: Error in batch post-hoc evaluation")
+            self.log.Show()
+            raise
+        marxanconpy.warn_dialog("Post-hoc evaluation of " + str(batch['Output'].nunique()) + " Marxan outputs exported "
+                                "to " + marxanconnect.pipeline.postHoc_batch_filepath(self.project),
+                                "Post-Hoc Evaluation Complete")
+
+    @marxanconnect.trace.traced(category='gui')
+    def on_calc_postHoc_sweep(self, event):
+        category = self.postHoc_category_choice.GetStringSelection()
+        try:
+            sweep = marxanconnect.pipeline.calc_postHoc_sweep(self.project, category,
+                                                              context=self.get_postHoc_context(category))
+        except:
+            print("Warning: Error in the selection frequency sweep")
+            self.log.Show()
+            raise
+        self.on_plot_sweep(sweep)
+
+    @marxanconnect.trace.traced(category='gui')
+    def on_calc_restart_similarity(self, event):
+        k = wx.GetNumberFromUser(u"Number of solution clusters", u"Clusters:", u"Restart Similarity", 5, 1, 100, self)
+        if k == -1:
+            return
+        try:
+            table, distances = marxanconnect.pipeline.calc_restart_similarity(self.project, k)
+        except:
+            print("Warning: Error in the restart similarity analysis")
+            self.log.Show()
+            raise
+        self.on_plot_restart_similarity(table, distances)
+        sizes = table['Cluster'].value_counts()
+        representatives = ["{} (cluster {}, {} restarts)".format(row.Restart, row.Cluster, sizes[row.Cluster])
+                           for row in table[table['Representative']].sort_values('Cluster').itertuples()]
+        marxanconpy.warn_dialog("Representative solutions: " + ", ".join(representatives) + ". Exported to " +
+                                marxanconnect.pipeline.postHoc_batch_filepath(self.project, "_similarity"),
+                                "Restart Similarity")
+
+    def new_plot_figure(self):
+        """
+        Creates the plot tab (if necessary) and a new figure on it
+        """
+        if not hasattr(self, 'plot'):
+            self.plot = wx.Panel(self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL)
+            for i in range(self.auinotebook.GetPageCount()):
+                if self.auinotebook.GetPageText(i) == "7) Plotting Options":
+                    self.auinotebook.AddPage(self.plot, u"8) Plot", False, wx.NullBitmap)
+                elif self.auinotebook.GetPageText(i) == "8) Plotting Options":
+                    self.auinotebook.AddPage(self.plot, u"9) Plot", False, wx.NullBitmap)
+        self.plot.figure = plt.figure(figsize=self.plot.GetClientSize() / wx.ScreenDC().GetPPI()[0])
+        self.plot.canvas = backend_wxagg.FigureCanvasWxAgg(self.plot, -1, self.plot.figure)
+        self.plot.sizer = wx.BoxSizer(wx.VERTICAL)
+        self.plot.sizer.Add(self.plot.canvas, 1, wx.LEFT | wx.TOP | wx.GROW)
+        self.plot.SetSizer(self.plot.sizer)
+        self.plot.Fit()
+
+    def show_plot_tab(self):
+        for i in range(self.auinotebook.GetPageCount()):
+            if self.auinotebook.GetPageText(i) == "8) Plot" or self.auinotebook.GetPageText(i) == "9) Plot":
+                self.auinotebook.ChangeSelection(i)
+
+    def on_plot_restart_similarity(self, table, distances):
+        """
+        Plots the restart distance matrix, with the restarts ordered by cluster
+        """
+        self.new_plot_figure()
+        order = numpy.lexsort((table['Distance to Representative'].values, table['Cluster'].values))
+        axes = self.plot.figure.gca()
+        image = axes.imshow(distances[numpy.ix_(order, order)], cmap='viridis', interpolation='nearest')
+        # cluster boundaries
+        for boundary in numpy.cumsum(table['Cluster'].value_counts().sort_index().values)[:-1] - 0.5:
+            axes.axhline(boundary, color='white', linewidth=0.5)
+            axes.axvline(boundary, color='white', linewidth=0.5)
+        axes.set_xlabel("Restart (ordered by cluster)")
+        axes.set_ylabel("Restart (ordered by cluster)")
+        self.plot.figure.colorbar(image, ax=axes, label="Jaccard Distance")
+        self.show_plot_tab()
+
+    def on_plot_sweep(self, sweep):
+        """
+        Plots each post-hoc metric of the selection frequency sweep against the percentage
+        """
+        self.new_plot_figure()
+
+        metrics = list(sweep['Metric'].unique())
+        columns = 2 if len(metrics) > 1 else 1
+        rows = int(numpy.ceil(len(metrics) / columns))
+        for i, metric in enumerate(metrics):
+            axes = self.plot.figure.add_subplot(rows, columns, i + 1)
+            for type, curve in sweep[sweep['Metric'] == metric].groupby('Type'):
+                axes.plot(curve['Percentage'], curve['Solution'],
+                          label=None if type in ("All", marxanconnect.posthoc.DEFAULT_TYPE) else type)
+            axes.set_xlabel("Selection Frequency (%)")
+            axes.set_ylabel(metric)
+            if any(axes.get_legend_handles_labels()[1]):
+                axes.legend()
+        self.plot.figure.tight_layout()
+        self.show_plot_tab()
+
+    @marxanconnect.trace.traced(category='gui')
     def on_export_postHoc( self, event ):
-        pandas.read_json(self.project["postHoc"]["summary"], orient='split').to_csv(self.project['filepaths']['posthoc'], index=0)
-        
+        marxanconnect.pipeline.export_postHoc(self.project)
+
+    @marxanconnect.trace.traced(category='gui')
     def on_export_postHoc_shp( self, event ):
-        self.temp = {}
-        self.temp['clusters'] = self.project["postHoc"]["clusters"]
-        if 'areas' in self.project['postHoc']:
-            self.temp['clusters'] = pandas.concat(
-                [self.temp['clusters'], pandas.DataFrame.from_dict(self.project['postHoc']['areas'])],
-                axis=1)
-            print(self.temp['clusters'].columns)
-            self.temp['clusters'].rename(columns={0:'areas'},inplace=True)
-            print(self.temp['clusters'].columns)
-        if 'min_dist' in self.project['postHoc']:
-            self.temp['clusters'] = pandas.concat(
-                [self.temp['clusters'], pandas.DataFrame.from_dict(self.project['postHoc']['min_dist'].min(axis=1))],
-                axis=1)
-            print(self.temp['clusters'].columns)
-            self.temp['clusters'].rename(columns={0:'min_dist'},inplace=True)
-            print(self.temp['clusters'].columns)
-        
-        print(self.temp['clusters'])
-        self.temp['clusters'].to_file(self.project['filepaths']['posthoc_shp'])
+        marxanconnect.pipeline.export_postHoc_shp(self.project)
 
     def set_postHoc_output_choice(self):
         if self.postHoc_output_choice.GetSelection()==-1:
@@ -2690,20 +2608,11 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         else:
             selection=self.postHoc_output_choice.GetSelection()
         if os.path.isfile(self.project['filepaths']['marxan_input']):
-            for line in open(self.project['filepaths']['marxan_input']):
-                if line.startswith('SCENNAME'):
-                    SCENNAME = line.replace('SCENNAME ', '').replace('\n', '')
-                if line.startswith('NUMREPS'):
-                    NUMREPS = int(line.replace('NUMREPS ', '').replace('\n', ''))
-                elif line.startswith('OUTPUTDIR'):
-                    OUTPUTDIR = line.replace('OUTPUTDIR ', '').replace('\n', '')
-                    
-            if not os.path.isdir(OUTPUTDIR):
-                OUTPUTDIR = os.path.join(os.path.dirname(self.project['filepaths']['marxan_input']),OUTPUTDIR)
-
-            fn = os.path.join(OUTPUTDIR, SCENNAME + "_best")
-            
-            if os.path.isfile(fn + '.csv') or os.path.isfile(fn + '.txt'):
+            index = marxanconnect.pipeline.run_index(self.project)
+            SCENNAME = index.SCENNAME
+            NUMREPS = index.NUMREPS
+
+            if index.has_output():
                 if self.postHoc_custom_choice.GetValue():
                     self.postHoc_output_choice.SetItems(['Custom Solution'])
                     self.postHoc_output_choice_txt.SetLabel("Output")
@@ -2726,10 +2635,12 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
     def on_postHoc_shp_file(self,event):
         self.project['filepaths']['posthoc_shp'] = self.postHoc_shp_file.GetPath()
         
+    @marxanconnect.trace.traced(category='gui')
     def on_plot_postHoc_spacing( self, event ):
         metric_type = "Distance to nearest cluster (km)"
         self.on_plot_freq(numpy.array(self.project["postHoc"]["min_dist"]).min(axis=1)/1000,metric_type)
         
+    @marxanconnect.trace.traced(category='gui')
     def on_plot_postHoc_sizes( self, event ):
         metric_type = "Cluster areas (km^2)"
         self.on_plot_freq(numpy.array(self.project["postHoc"]["areas"])/1000000,metric_type)
@@ -2743,10 +2654,16 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
             self.postHoc_custom_file.Enable(True)
             self.postHoc_category_choice.Enable(False)
             self.postHoc_output_choice.Enable(False)
+            self.calc_postHoc_batch.Enable(False)
+            self.calc_postHoc_sweep.Enable(False)
+            self.calc_restart_similarity.Enable(False)
         else:
             self.postHoc_custom_file.Enable(False)
             self.postHoc_category_choice.Enable(True)
             self.postHoc_output_choice.Enable(True)
+            self.calc_postHoc_batch.Enable(self.calc_postHoc.IsEnabled())
+            self.calc_postHoc_sweep.Enable(self.calc_postHoc.IsEnabled())
+            self.calc_restart_similarity.Enable(self.calc_postHoc.IsEnabled())
 
 
 # ###########################  spec grid popup functions ###############################################################
@@ -2767,62 +2684,22 @@ class MarxanConnectGUI(gui.MarxanConnectGUI):
         elif self.project['options']['spec_set'] == "Target":
             self.spec_frame.spec_grid.SetColLabelValue(1, "target")
 
-        self.all_types = []
-        if self.calc_metrics_pu.GetValue():
-            if os.path.isfile(self.project['filepaths']['demo_pu_cm_filepath']):
-                self.all_types += ['demo_pu']
-            if os.path.isfile(self.project['filepaths']['land_pu_cm_filepath']):
-                self.all_types += ['land_pu']
-        else:
+        if not self.get_calc_metrics_pu():
             marxanconpy.warn_dialog(message="'Planning Units' not selected for metric calculations.")
             return
 
-        for self.type in self.all_types:
-            metrics = list(self.project['connectivityMetrics']['spec_' + self.type])
-            approved = ['discrete']
-            metrics[:] = [m for m in metrics if any(a in m for a in approved)]
-
-            self.spec_frame.keys = metrics
-
-            targets = self.project['options']['targets'].split(',')
-            if len(targets) < len(metrics):
-                targets = numpy.resize(targets,len(metrics))
-                # marxanconpy.warn_dialog(
-                #     "There are more connectivity based conservation features than targets. Repeating given targets")
-            elif len(targets) > len(metrics):
-                targets = numpy.resize(targets, len(metrics))
-                # marxanconpy.warn_dialog(
-                #     "There are fewer connectivity based conservation features than targets. Selecting only first targets")
-
-            for j in range(len(self.spec_frame.keys)):
-                if j != self.spec_frame.spec_grid.GetNumberRows():
-                    i = self.spec_frame.spec_grid.GetNumberRows()
-                else:
-                    i=j
-                self.spec_frame.spec_grid.InsertRows(i)
-                self.spec_frame.spec_grid.SetCellValue(i, 0, str(i + 1))
-                self.spec_frame.spec_grid.SetCellValue(i, 1, str(float(targets[i])))
-                self.spec_frame.spec_grid.SetCellValue(i, 2, str(1000))
-                self.spec_frame.spec_grid.SetCellValue(i, 3, self.spec_frame.keys[j])
+        spec = marxanconnect.pipeline.new_spec(self.project)
+        self.spec_frame.keys = spec['name'].tolist()
+        for i in range(spec.shape[0]):
+            self.spec_frame.spec_grid.InsertRows(i)
+            for j in range(spec.shape[1]):
+                self.spec_frame.spec_grid.SetCellValue(i, j, str(spec.iloc[i, j]))
 
         self.spec_frame.spec_grid.AutoSize()
         w, h = self.spec_frame.spec_grid.GetSize()
         self.spec_frame.SetSize((w+16,h+75))
 
-        self.project['spec_dat'] = pandas.DataFrame(
-            numpy.full((self.spec_frame.spec_grid.GetNumberRows(), self.spec_frame.spec_grid.GetNumberCols()), None))
-
-        if self.project['options']['spec_set'] == "Proportion":
-            self.project['spec_dat'].columns = ["id", "prop", "spf", "name"]
-        elif self.project['options']['spec_set'] == "Target":
-            self.project['spec_dat'].columns = ["id", "target", "spf", "name"]
-
-
-        for c in range(self.spec_frame.spec_grid.GetNumberCols()):
-            for r in range(self.spec_frame.spec_grid.GetNumberRows()):
-                self.project['spec_dat'].iloc[r, c] = self.spec_frame.spec_grid.GetCellValue(r, c)
-
-        self.project['spec_dat'] = self.project['spec_dat'].to_json(orient='split')
+        self.project['spec_dat'] = spec.to_json(orient='split')
 
 class spec_customizer(gui.spec_customizer):
     def __init__(self, parent):
@@ -2958,11 +2835,15 @@ class file_viewer(wx.Dialog):
 # ########################## debug mode ################################################################################
 
 class RedirectText(object):
-    def __init__(self, aWxTextCtrl):
-        self.out = aWxTextCtrl
+    """
+    stdout/stderr for the debug console. Writes are buffered (see marxanconnect/logsink.py) and shown by LogForm on a
+    timer, so heavy logging does not flood the event queue.
+    """
+    def __init__(self, sink):
+        self.out = sink
 
     def write(self, string):
-        wx.CallAfter(self.out.WriteText, string)
+        self.out.write(string)
 
     def flush(self):
         # do nothing...
@@ -2976,32 +2857,131 @@ class LogForm(wx.Frame):
 
         # Add a panel
         panel = wx.Panel(self, wx.ID_ANY)
-        log = wx.TextCtrl(panel, wx.ID_ANY, size=(350, 350), style=wx.TE_MULTILINE | wx.TE_READONLY | wx.HSCROLL)
+        self.log = wx.TextCtrl(panel, wx.ID_ANY, size=(350, 350), style=wx.TE_MULTILINE | wx.TE_READONLY | wx.HSCROLL)
 
         # Add widgets to a sizer
         sizer = wx.BoxSizer(wx.VERTICAL)
-        sizer.Add(log, 1, wx.ALL | wx.EXPAND, 5)
+        sizer.Add(self.log, 1, wx.ALL | wx.EXPAND, 5)
         panel.SetSizer(sizer)
 
         # redirect text here
-        redir = RedirectText(log)
+        self.sink = marxanconnect.logsink.LogSink(marxanconnect.logsink.default_filepath())
+        redir = RedirectText(self.sink)
         sys.stdout = redir
         sys.stderr = redir
+        if self.sink.filepath:
+            print("Full log: " + self.sink.filepath)
+
+        # show the buffered text a batch at a time
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_timer, self.timer)
+        self.timer.Start(marxanconnect.logsink.INTERVAL)
+
+    def on_timer(self, event):
+        text = self.sink.drain()
+        if not text:
+            return
+        self.log.AppendText(text)
+        # keep the last HISTORY characters
+        excess = self.log.GetLastPosition() - marxanconnect.logsink.HISTORY
+        if excess > 0:
+            self.log.Remove(0, excess + marxanconnect.logsink.HISTORY // 10)
 
     def __close(self, event):
         self.Hide()
 
 
-# ##########################  run the GUI ##############################################################################
-app = wx.App(False)
+class TraceForm(wx.Frame):
+    """
+    Lists the wall time, CPU time, peak memory and inputs of the most recent GUI actions and the pipeline stages run by
+    each of them (see marxanconnect/trace.py), and exports them as a Chrome trace
+    """
+    COLUMNS = ((u"Stage", 260), (u"Wall (s)", 80), (u"CPU (s)", 80), (u"Peak RSS (MB)", 100), (u"Inputs", 320),
+               (u"Status", 100))
+
+    # the number of recent GUI actions listed
+    RUNS = 50
 
-# create an object of CalcFrame
-frame = MarxanConnectGUI(None)
-# show the frame
-frame.Show(True)
-# start the applications
-app.MainLoop()
+    def __init__(self, parent):
+        wx.Frame.__init__(self, parent, wx.ID_ANY, "Stage Timing", size=(960, 420))
+        self.Bind(wx.EVT_CLOSE, self.__close)
+        parent.set_icon(frame=self, rootpath=MCPATH)
 
-# stop the app
-app.Destroy()
+        panel = wx.Panel(self, wx.ID_ANY)
+        self.list = wx.ListCtrl(panel, wx.ID_ANY, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        for column, (label, width) in enumerate(self.COLUMNS):
+            self.list.InsertColumn(column, label, width=width)
+
+        refresh = wx.Button(panel, wx.ID_ANY, u"Refresh")
+        export = wx.Button(panel, wx.ID_ANY, u"Export Chrome Trace...")
+        clear = wx.Button(panel, wx.ID_ANY, u"Clear")
+        refresh.Bind(wx.EVT_BUTTON, lambda event: self.refresh())
+        export.Bind(wx.EVT_BUTTON, self.on_export)
+        clear.Bind(wx.EVT_BUTTON, self.on_clear)
+
+        buttons = wx.BoxSizer(wx.HORIZONTAL)
+        for button in (refresh, export, clear):
+            buttons.Add(button, 0, wx.ALL, 5)
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.list, 1, wx.ALL | wx.EXPAND, 5)
+        sizer.Add(buttons, 0, wx.ALIGN_RIGHT)
+        panel.SetSizer(sizer)
 
+    def refresh(self):
+        self.list.DeleteAllItems()
+        for record in marxanconnect.trace.recent(self.RUNS):
+            inputs = ", ".join(key + "=" + (self.format_size(value) if key.endswith('filepath') or
+                                            key == 'marxan_input' else str(value))
+                               for key, value in record['inputs'].items())
+            row = self.list.GetItemCount()
+            self.list.InsertItem(row, "    " * record['depth'] + record['name'])
+            self.list.SetItem(row, 1, "{:.3f}".format(record['wall']))
+            self.list.SetItem(row, 2, "{:.3f}".format(record['cpu']))
+            self.list.SetItem(row, 3, "" if record['peak_rss_mb'] is None else str(record['peak_rss_mb']))
+            self.list.SetItem(row, 4, inputs)
+            self.list.SetItem(row, 5, record['status'])
+
+    @staticmethod
+    def format_size(size):
+        for unit in ("B", "KB", "MB"):
+            if size < 1024:
+                return "{:.0f} {}".format(size, unit)
+            size /= 1024
+        return "{:.1f} GB".format(size)
+
+    def on_export(self, event):
+        dlg = wx.FileDialog(self, "Export Chrome Trace", wildcard="Chrome trace (*.json)|*.json",
+                            defaultFile="marxanconnect_trace.json", style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+        if dlg.ShowModal() == wx.ID_OK:
+            marxanconnect.trace.export_chrome_trace(dlg.GetPath())
+        dlg.Destroy()
+
+    def on_clear(self, event):
+        marxanconnect.trace.clear()
+        self.refresh()
+
+    def __close(self, event):
+        self.Hide()
+
+
+# ##########################  run the GUI ##############################################################################
+if __name__ == '__main__':
+    # the batch post-hoc evaluation starts worker processes
+    multiprocessing.freeze_support()
+    app = wx.App(False)
+
+    # create an object of CalcFrame
+    frame = MarxanConnectGUI(None)
+    # show the frame
+    frame.Show(True)
+    # start the applications
+    app.MainLoop()
+
+    # write what is left in the log buffer to the log file
+    if isinstance(sys.stdout, RedirectText):
+        sink = sys.stdout.out
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        sink.close()
+
+    # stop the app
+    app.Destroy()
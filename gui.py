@@ -5,6 +5,7 @@
 ## http://www.wxformbuilder.org/
 ##
 ## PLEASE DO *NOT* EDIT THIS FILE!
+## Notebook pages are built on demand, see marxanconnect/gui_pages.py
 ###########################################################################
 
 import wx
@@ -19,6 +20,76 @@ import wx.grid
 
 class MarxanConnectGUI ( wx.Frame ):
 
+	pages = ( "spatialInput", "connectivityInput", "connectivityMetrics", "preEvaluation", "exportMarxan",
+			"marxanAnalysis", "postHocEvaluation", "plottingOptions", )
+
+	page_widgets = {
+		"spatialInput": ( "pu_title", "PU_def", "PU_filetext", "PU_file", "PU_file_pu_id_txt", "PU_file_pu_id", "fa_title", "FA_def",
+			"FA_filetext", "FA_file", "fa_status_radioBox", "aa_title", "AA_def", "AA_filetext", "AA_file",
+			"aa_status_radioBox", ),
+		"connectivityInput": ( "con_input_def_txt", "con_input_def_txt1", "con_input_choice_txt", "conn_category_choicebook", "demographic",
+			"demo_CM_def", "demo_matrixTypeRadioBox", "demo_matrixFormatRadioBox", "demo_rescaleRadioBox",
+			"demo_rescale_edgeRadioBox", "demo_CU_CM_filetext", "demo_CU_CM_file", "demo_pucm_seperator",
+			"demo_PU_CM_outputtext", "demo_CU_filetext", "demo_CU_file", "demo_CU_file_pu_id_txt", "demo_CU_file_pu_id",
+			"demo_PU_CM_def", "demo_PU_CM_progress", "demo_PU_CM_filetext", "demo_PU_CM_file", "demo_rescale_button",
+			"landscape", "land_CM_def", "land_type_choice", "hab_res", "land_res_matrixTypeRadioBox",
+			"land_HAB_filetext", "land_HAB_file", "land_HAB_file_hab_id_txt", "land_HAB_file_hab_id",
+			"land_HAB_buff_txt", "land_HAB_buff", "land_HAB_thresh_txt", "land_HAB_thresh", "land_RES_mat_filetext",
+			"land_RES_mat_file", "resistance_mat_customize", "res_suf", "land_res_seperator", "land_res_text",
+			"land_RES_def", "land_RES_filetext", "land_RES_file", "land_res_file_res_id_txt", "land_RES_file_res_id",
+			"con_mat", "land_pucm_seperator", "demo_PUCM_text", "land_PU_CM_def", "land_PU_CM_progress",
+			"land_PU_CM_filetext", "land_PU_CM_file", "land_generate_button", "demo_LP_seperator", "demo_LP_text",
+			"demo_LP_def", "LP_def", "LP_file", ),
+		"connectivityMetrics": ( "cf_txt", "demo_cf_txt", "cf_demo_in_degree", "cf_demo_out_degree", "cf_demo_between_cent",
+			"cf_demo_eig_vect_cent", "cf_demo_google", "cf_demo_self_recruit", "cf_demo_local_retention",
+			"cf_demo_inflow", "cf_demo_outflow", "cf_demo_stochasticity", "cf_demo_fa_recipients", "cf_demo_fa_donors",
+			"cf_demo_aa_recipients", "cf_demo_aa_donors", "land_cf_txt", "cf_land_in_degree", "cf_land_out_degree",
+			"cf_land_between_cent", "cf_land_eig_vect_cent", "cf_land_google", "cf_land_self_recruit",
+			"cf_land_retention", "cf_land_import", "cf_land_outflux", "cf_land_stochasticity", "cf_land_fa_recipients",
+			"cf_land_fa_donors", "cf_land_aa_recipients", "cf_land_aa_donors", "metrics_seperator", "bd_txt",
+			"demo_bd_txt", "bd_demo_conn_boundary", "bd_demo_min_plan_graph", "land_bd_txt", "bd_land_conn_boundary",
+			"bd_land_min_plan_graph", "metric_definition_choice", "metric_definition_html", "m_staticText118",
+			"spacertext1", "calc_metrics", "metrics_for_txt", "calc_metrics_pu", "calc_metrics_cu", ),
+		"preEvaluation": ( "preEval_def_txt", "preEval_choice_txt", "preEval_metric_shp_txt", "preEval_metric_txt",
+			"preEval_metric_shp_choice", "preEval_metric_choice", "plot_freq_metric", "remove_metric",
+			"preEval_status_radio", "preEval_table_txt", "preEval_grid", "m_staticline12", "preEval_discrete_from_txt",
+			"preEval_discrete_from_quartile", "preEval_discrete_from_quartile_radio", "preEval_discrete_from_percentile",
+			"preEval_discrete_from_percentile_slider", "preEval_discrete_from_value",
+			"preEval_discrete_from_value_txtctrl", "m_staticline13", "preEval_discrete_to_txt",
+			"preEval_discrete_to_quartile", "preEval_discrete_to_quartile_radio", "preEval_discrete_to_percentile",
+			"preEval_discrete_to_percentile_slider", "preEval_discrete_to_value", "preEval_discrete_to_value_txtctrl",
+			"preEval_create_new", "m_staticline8", "preEval_choice_txt2", "discrete_grid", ),
+		"exportMarxan": ( "exportMarxan_def_txt", "m_staticline82", "preEval_choice_txt1", "cf_export_radioBox", "spec_radio",
+			"cf_export_txt", "orig_CF_file", "cf_export_txt1", "CF_file", "SPEC_filetxt", "orig_SPEC_file",
+			"SPEC_filetxt1", "SPEC_file", "custom_spec_panel", "customize_spec", "targets_txt", "targets",
+			"export_CF_files", "m_staticline811", "preEval_choice_txt11", "m_staticText142", "orig_BD_file",
+			"BD_filecheck", "BD_file", "export_BD_file", "m_staticline8111", "preEval_choice_txt111",
+			"orig_PUDAT_file_txt", "orig_PUDAT_file", "PUDAT_filecheck", "PUDAT_file", "export_pudat", "m_staticline16",
+			"export_metrics", ),
+		"marxanAnalysis": ( "marxan_logo_bitmap", "marxan_def", "inputdat_filetext", "inputdat_template_file", "default_input_template",
+			"NUMREPS_txt", "SCENNAME_txt", "NUMITNS_txt", "NUMREPS", "SCENNAME", "NUMITNS", "marxan_CF", "marxan_bound",
+			"inputdat_symmRadio", "csm_txt", "CSM", "marxan_PU", "marxan_Radio", "marxanBit_Radio", "generate_inputdat",
+			"m_staticline11", "inputdat_filetext", "inputdat_file", "customize_inpudat", "spacertextrunmarxan",
+			"run_marxan_button", "view_sum", "view_mvbest", ),
+		"postHocEvaluation": ( "postHoc_def_txt", "postHoc_choice_txt", "postHoc_custom_choice", "postHoc_custom_file",
+			"postHoc_category_choice_txt", "postHoc_output_choice_txt", "postHoc_percentage_slider_txt",
+			"postHoc_category_choice", "postHoc_output_choice", "postHoc_percentage_slider", "postHoc_grid",
+			"spacertext2", "plot_postHoc_sizes", "plot_postHoc_spacing", "calc_postHoc", "postHoc_export_txt",
+			"postHoc_file", "export_postHoc", "postHoc_shp_export_txt", "postHoc_shp_file", "export_postHoc_shp", ),
+		"plottingOptions": ( "mapoptions_txt", "bmap_plot_check", "bmap_landcol_txt", "bmap_lakecol_txt", "bmap_oceancol_txt",
+			"bmap_buffer_txt", "bmap_landcol", "bmap_lakecol", "bmap_oceancol", "bmap_buffer", "lyr1_plot_check",
+			"lyr1_choice", "metrics_opt", "metric_shp_txt", "metric_txt", "metric_lowcol_txt", "metric_shp_choice",
+			"metric_choice", "metric_lowcol", "metric_alpha_txt", "metric_legend_txt", "metric_hicol_txt",
+			"metric_alpha", "metric_legend", "metric_hicol", "poly_plot_opt", "poly_shp_txt", "poly_col_txt",
+			"poly_alpha_txt", "poly_shp_choice", "poly_col", "poly_alpha", "lyr2_plot_check", "lyr2_choice",
+			"metrics_opt1", "metric_shp_txt1", "metric_txt1", "metric_lowcol_txt1", "metric_shp_choice1",
+			"metric_choice1", "metric_lowcol1", "metric_alpha_txt1", "metric_legend_txt1", "metric_hicol_txt1",
+			"metric_alpha1", "metric_legend1", "metric_hicol1", "poly_plot_opt1", "poly_shp_txt1", "poly_col_txt1",
+			"poly_alpha_txt1", "poly_shp_choice1", "poly_col1", "poly_alpha1", "plot_map_button", "plot_opt_seperator",
+			"Export", "PUSHP_filecheck", "PUSHP_file", "PUCSV_filecheck", "PUCSV_file", "MAP_filecheck", "MAP_file",
+			"plot_export_button", ),
+	}
+
 	def __init__( self, parent ):
 		wx.Frame.__init__ ( self, parent, id = wx.ID_ANY, title = u"Marxan Connect", pos = wx.DefaultPosition, size = wx.Size( 1200,700 ), style = wx.DEFAULT_FRAME_STYLE|wx.TAB_TRAVERSAL )
 
@@ -85,6 +156,53 @@ class MarxanConnectGUI ( wx.Frame ):
 
 		self.auinotebook = wx.aui.AuiNotebook( self, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.aui.AUI_NB_TAB_EXTERNAL_MOVE|wx.aui.AUI_NB_TAB_MOVE|wx.aui.AUI_NB_TAB_SPLIT|wx.aui.AUI_NB_TOP|wx.aui.AUI_NB_WINDOWLIST_BUTTON )
 		self.spatialInput = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.spatialInput, u"1) Spatial Input", False, wx.NullBitmap )
+		self.connectivityInput = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.connectivityInput, u"2) Connectivity Input", False, wx.NullBitmap )
+		self.connectivityMetrics = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.connectivityMetrics, u"3) Connectivity Metrics", False, wx.NullBitmap )
+		self.preEvaluation = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.preEvaluation, u"4) Pre-Evaluation", False, wx.NullBitmap )
+		self.exportMarxan = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.exportMarxan, u"5) Marxan Files", False, wx.NullBitmap )
+		self.marxanAnalysis = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.marxanAnalysis, u"6) Run Marxan", False, wx.NullBitmap )
+		self.postHocEvaluation = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.postHocEvaluation, u"7) Post-Hoc Evaluation", True, wx.NullBitmap )
+		self.plottingOptions = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+		self.auinotebook.AddPage( self.plottingOptions, u"8) Plotting Options", False, wx.NullBitmap )
+
+		self.build_pages()
+
+		aui_sizer.Add( self.auinotebook, 1, wx.EXPAND, 5 )
+
+
+		self.SetSizer( aui_sizer )
+		self.Layout()
+
+		self.Centre( wx.BOTH )
+
+		# Connect Events
+		self.Bind( wx.EVT_MENU, self.on_new_project, id = self.new_project.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_save_project, id = self.save_project.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_save_project_as, id = self.save_project_as.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_load_project, id = self.load_project.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_github, id = self.github.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_debug_mode, id = self.debug_mode.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_glossary, id = self.glossary.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_tutorial, id = self.tutorial.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_contributing, id = self.contributing.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_license, id = self.license.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_about, id = self.about.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_getting_started, id = self.start.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_mwz, id = self.mwz.GetId() )
+		self.Bind( wx.EVT_MENU, self.on_posthoc, id = self.posthoc.GetId() )
+
+	def build_pages( self ):
+		for page in self.pages:
+			getattr( self, "build_" + page )()
+
+	def build_spatialInput( self ):
 		spatialMainSizer = wx.FlexGridSizer( 0, 1, 0, 0 )
 		spatialMainSizer.AddGrowableCol( 0 )
 		spatialMainSizer.AddGrowableRow( 1 )
@@ -248,8 +366,16 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.spatialInput.SetSizer( spatialMainSizer )
 		self.spatialInput.Layout()
 		spatialMainSizer.Fit( self.spatialInput )
-		self.auinotebook.AddPage( self.spatialInput, u"1) Spatial Input", False, wx.NullBitmap )
-		self.connectivityInput = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+
+		# Connect Events
+		self.PU_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_PU_file )
+		self.PU_file_pu_id.Bind( wx.EVT_CHOICE, self.on_PU_file_pu_id )
+		self.FA_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_FA_file )
+		self.fa_status_radioBox.Bind( wx.EVT_RADIOBOX, self.on_fa_status_radioBox )
+		self.AA_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_AA_file )
+		self.aa_status_radioBox.Bind( wx.EVT_RADIOBOX, self.on_aa_status_radioBox )
+
+	def build_connectivityInput( self ):
 		conn_input_mainsizer = wx.FlexGridSizer( 0, 1, 0, 0 )
 		conn_input_mainsizer.AddGrowableCol( 0 )
 		conn_input_mainsizer.AddGrowableRow( 3 )
@@ -618,7 +744,7 @@ class MarxanConnectGUI ( wx.Frame ):
 
 		land_res_def_sizer = wx.BoxSizer( wx.HORIZONTAL )
 
-		self.land_RES_def = wx.StaticText( self.res_suf, wx.ID_ANY, u"This feature is not yet operational, please check again in the next version.", wx.DefaultPosition, wx.DefaultSize, 0 )
+		self.land_RES_def = wx.StaticText( self.res_suf, wx.ID_ANY, u"Connectivity is generated from the least-cost paths between planning units across the resistance surface, where each polygon's cost is the value of its Resistance Column.", wx.DefaultPosition, wx.DefaultSize, 0 )
 		self.land_RES_def.Wrap( -1 )
 
 		land_res_def_sizer.Add( self.land_RES_def, 0, wx.ALL|wx.EXPAND, 5 )
@@ -769,8 +895,35 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.connectivityInput.SetSizer( conn_input_mainsizer )
 		self.connectivityInput.Layout()
 		conn_input_mainsizer.Fit( self.connectivityInput )
-		self.auinotebook.AddPage( self.connectivityInput, u"2) Connectivity Input", False, wx.NullBitmap )
-		self.connectivityMetrics = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+
+		# Connect Events
+		self.conn_category_choicebook.Bind( wx.EVT_CHOICEBOOK_PAGE_CHANGED, self.on_conn_category_choice )
+		self.demo_matrixTypeRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_matrixTypeRadioBox )
+		self.demo_matrixFormatRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_matrixFormatRadioBox )
+		self.demo_rescaleRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_rescaleRadioBox )
+		self.demo_rescale_edgeRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_rescale_edgeRadioBox )
+		self.demo_CU_CM_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_demo_CU_CM_file )
+		self.demo_CU_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_demo_CU_file )
+		self.demo_CU_file_pu_id.Bind( wx.EVT_CHOICE, self.on_demo_CU_file_pu_id )
+		self.demo_PU_CM_progress.Bind( wx.EVT_CHECKBOX, self.on_demo_PU_CM_progress )
+		self.demo_PU_CM_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_demo_PU_CM_file )
+		self.demo_rescale_button.Bind( wx.EVT_BUTTON, self.on_demo_rescale_button )
+		self.land_type_choice.Bind( wx.EVT_CHOICEBOOK_PAGE_CHANGED, self.on_land_type_choice )
+		self.land_res_matrixTypeRadioBox.Bind( wx.EVT_RADIOBOX, self.on_land_res_matrixTypeRadioBox )
+		self.land_HAB_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_HAB_file )
+		self.land_HAB_file_hab_id.Bind( wx.EVT_CHOICE, self.on_land_HAB_file_hab_id )
+		self.land_HAB_buff.Bind( wx.EVT_TEXT, self.on_land_HAB_buff )
+		self.land_HAB_thresh.Bind( wx.EVT_TEXT, self.on_land_HAB_thresh )
+		self.land_RES_mat_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_RES_mat_file )
+		self.resistance_mat_customize.Bind( wx.EVT_BUTTON, self.on_resistance_mat_customize )
+		self.land_RES_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_RES_file )
+		self.land_RES_file_res_id.Bind( wx.EVT_CHOICE, self.on_land_RES_file_hab_id )
+		self.land_PU_CM_progress.Bind( wx.EVT_CHECKBOX, self.on_land_PU_CM_progress )
+		self.land_PU_CM_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_PU_CM_file )
+		self.land_generate_button.Bind( wx.EVT_BUTTON, self.on_land_generate_button )
+		self.LP_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_LP_file )
+
+	def build_connectivityMetrics( self ):
 		metricsMainSizer = wx.FlexGridSizer( 0, 2, 0, 0 )
 		metricsMainSizer.AddGrowableCol( 1 )
 		metricsMainSizer.AddGrowableRow( 0 )
@@ -1037,8 +1190,39 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.connectivityMetrics.SetSizer( metricsMainSizer )
 		self.connectivityMetrics.Layout()
 		metricsMainSizer.Fit( self.connectivityMetrics )
-		self.auinotebook.AddPage( self.connectivityMetrics, u"3) Connectivity Metrics", False, wx.NullBitmap )
-		self.preEvaluation = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+
+		# Connect Events
+		self.cf_demo_in_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_out_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_between_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_eig_vect_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_google.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_self_recruit.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_local_retention.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_inflow.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_outflow.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_stochasticity.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_fa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_fa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_aa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_demo_aa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_in_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_out_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_between_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_eig_vect_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_google.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_fa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_fa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_aa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.cf_land_aa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
+		self.bd_demo_conn_boundary.Bind( wx.EVT_CHECKBOX, self.on_bd_demo_conn_boundary )
+		self.bd_demo_min_plan_graph.Bind( wx.EVT_CHECKBOX, self.on_bd_demo_min_plan_graph )
+		self.bd_land_conn_boundary.Bind( wx.EVT_CHECKBOX, self.on_bd_land_conn_boundary )
+		self.bd_land_min_plan_graph.Bind( wx.EVT_CHECKBOX, self.on_bd_land_min_plan_graph )
+		self.metric_definition_choice.Bind( wx.EVT_CHOICE, self.on_metric_definition_choice )
+		self.calc_metrics.Bind( wx.EVT_BUTTON, self.on_calc_metrics )
+
+	def build_preEvaluation( self ):
 		preEvalMainSizer = wx.FlexGridSizer( 0, 1, 0, 0 )
 		preEvalMainSizer.AddGrowableCol( 0 )
 		preEvalMainSizer.AddGrowableRow( 0 )
@@ -1362,8 +1546,21 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.preEvaluation.SetSizer( preEvalMainSizer )
 		self.preEvaluation.Layout()
 		preEvalMainSizer.Fit( self.preEvaluation )
-		self.auinotebook.AddPage( self.preEvaluation, u"4) Pre-Evaluation", False, wx.NullBitmap )
-		self.exportMarxan = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+
+		# Connect Events
+		self.preEval_metric_shp_choice.Bind( wx.EVT_CHOICE, self.on_preEval_metric_shp_choice )
+		self.preEval_metric_choice.Bind( wx.EVT_CHOICE, self.on_preEval_metric_choice )
+		self.plot_freq_metric.Bind( wx.EVT_BUTTON, self.on_plot_freq_metric )
+		self.remove_metric.Bind( wx.EVT_BUTTON, self.on_remove_metric )
+		self.preEval_discrete_from_quartile.Bind( wx.EVT_CHECKBOX, self.on_from_check )
+		self.preEval_discrete_from_percentile.Bind( wx.EVT_CHECKBOX, self.on_from_check )
+		self.preEval_discrete_from_value.Bind( wx.EVT_CHECKBOX, self.on_from_check )
+		self.preEval_discrete_to_quartile.Bind( wx.EVT_CHECKBOX, self.on_to_check )
+		self.preEval_discrete_to_percentile.Bind( wx.EVT_CHECKBOX, self.on_to_check )
+		self.preEval_discrete_to_value.Bind( wx.EVT_CHECKBOX, self.on_to_check )
+		self.preEval_create_new.Bind( wx.EVT_BUTTON, self.on_preEval_create_new )
+
+	def build_exportMarxan( self ):
 		exportMarxanMainSizer = wx.FlexGridSizer( 0, 1, 0, 0 )
 		exportMarxanMainSizer.AddGrowableCol( 0 )
 		exportMarxanMainSizer.AddGrowableRow( 0 )
@@ -1607,8 +1804,28 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.exportMarxan.SetSizer( exportMarxanMainSizer )
 		self.exportMarxan.Layout()
 		exportMarxanMainSizer.Fit( self.exportMarxan )
-		self.auinotebook.AddPage( self.exportMarxan, u"5) Marxan Files", False, wx.NullBitmap )
-		self.marxanAnalysis = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+
+		# Connect Events
+		self.cf_export_radioBox.Bind( wx.EVT_RADIOBOX, self.on_cf_export_radioBox )
+		self.spec_radio.Bind( wx.EVT_RADIOBOX, self.on_spec_radio )
+		self.orig_CF_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_CF_file )
+		self.CF_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_CF_file )
+		self.orig_SPEC_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_SPEC_file )
+		self.SPEC_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_SPEC_file )
+		self.customize_spec.Bind( wx.EVT_BUTTON, self.on_customize_spec )
+		self.targets.Bind( wx.EVT_TEXT, self.on_targets )
+		self.export_CF_files.Bind( wx.EVT_BUTTON, self.on_export_CF_files )
+		self.orig_BD_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_BD_file )
+		self.BD_filecheck.Bind( wx.EVT_CHECKBOX, self.on_BD_filecheck )
+		self.BD_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_BD_file )
+		self.export_BD_file.Bind( wx.EVT_BUTTON, self.on_export_BD_file )
+		self.orig_PUDAT_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_PUDAT_file )
+		self.PUDAT_filecheck.Bind( wx.EVT_CHECKBOX, self.on_PUDAT_filecheck )
+		self.PUDAT_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_PUDAT_file )
+		self.export_pudat.Bind( wx.EVT_BUTTON, self.on_export_PUDAT )
+		self.export_metrics.Bind( wx.EVT_BUTTON, self.on_export_metrics )
+
+	def build_marxanAnalysis( self ):
 		marxanMainSizer = wx.FlexGridSizer( 0, 1, 0, 0 )
 		marxanMainSizer.AddGrowableCol( 0 )
 		marxanMainSizer.AddGrowableRow( 0 )
@@ -1819,8 +2036,28 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.marxanAnalysis.SetSizer( marxanMainSizer )
 		self.marxanAnalysis.Layout()
 		marxanMainSizer.Fit( self.marxanAnalysis )
-		self.auinotebook.AddPage( self.marxanAnalysis, u"6) Run Marxan", False, wx.NullBitmap )
-		self.postHocEvaluation = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+
+		# Connect Events
+		self.inputdat_template_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_inputdat_template_file )
+		self.default_input_template.Bind( wx.EVT_BUTTON, self.on_default_input_template )
+		self.NUMREPS.Bind( wx.EVT_TEXT, self.on_NUMREPS )
+		self.SCENNAME.Bind( wx.EVT_TEXT, self.on_SCENNAME )
+		self.NUMITNS.Bind( wx.EVT_TEXT, self.on_NUMITNS )
+		self.marxan_CF.Bind( wx.EVT_RADIOBOX, self.on_marxan_CF )
+		self.marxan_bound.Bind( wx.EVT_RADIOBOX, self.on_marxan_bound )
+		self.inputdat_symmRadio.Bind( wx.EVT_RADIOBOX, self.on_inputdat_symmRadio )
+		self.CSM.Bind( wx.EVT_TEXT, self.on_CSM )
+		self.marxan_PU.Bind( wx.EVT_RADIOBOX, self.on_marxan_PU )
+		self.marxan_Radio.Bind( wx.EVT_RADIOBOX, self.on_marxan_Radio )
+		self.marxanBit_Radio.Bind( wx.EVT_RADIOBOX, self.on_marxanBit_Radio )
+		self.generate_inputdat.Bind( wx.EVT_BUTTON, self.on_generate_inputdat )
+		self.inputdat_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_inputdat_file )
+		self.customize_inpudat.Bind( wx.EVT_BUTTON, self.on_customize_inpudat )
+		self.run_marxan_button.Bind( wx.EVT_BUTTON, self.on_run_marxan )
+		self.view_sum.Bind( wx.EVT_BUTTON, self.on_view_sum )
+		self.view_mvbest.Bind( wx.EVT_BUTTON, self.on_view_mvbest )
+
+	def build_postHocEvaluation( self ):
 		postHocMainSizer = wx.FlexGridSizer( 0, 1, 0, 0 )
 		postHocMainSizer.AddGrowableCol( 0 )
 		postHocMainSizer.AddGrowableRow( 3 )
@@ -1992,8 +2229,21 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.postHocEvaluation.SetSizer( postHocMainSizer )
 		self.postHocEvaluation.Layout()
 		postHocMainSizer.Fit( self.postHocEvaluation )
-		self.auinotebook.AddPage( self.postHocEvaluation, u"7) Post-Hoc Evaluation", True, wx.NullBitmap )
-		self.plottingOptions = wx.Panel( self.auinotebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
+
+		# Connect Events
+		self.postHoc_custom_choice.Bind( wx.EVT_CHECKBOX, self.on_postHoc_custom_choice )
+		self.postHoc_custom_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_postHoc_custom_file )
+		self.postHoc_category_choice.Bind( wx.EVT_CHOICE, self.on_postHoc_category_choice )
+		self.postHoc_output_choice.Bind( wx.EVT_CHOICE, self.on_postHoc_output_choice )
+		self.plot_postHoc_sizes.Bind( wx.EVT_BUTTON, self.on_plot_postHoc_sizes )
+		self.plot_postHoc_spacing.Bind( wx.EVT_BUTTON, self.on_plot_postHoc_spacing )
+		self.calc_postHoc.Bind( wx.EVT_BUTTON, self.on_calc_postHoc )
+		self.postHoc_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_postHoc_file )
+		self.export_postHoc.Bind( wx.EVT_BUTTON, self.on_export_postHoc )
+		self.postHoc_shp_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_postHoc_shp_file )
+		self.export_postHoc_shp.Bind( wx.EVT_BUTTON, self.on_export_postHoc_shp )
+
+	def build_plottingOptions( self ):
 		plottingMainSizer = wx.FlexGridSizer( 15, 0, 0, 0 )
 		plottingMainSizer.AddGrowableCol( 0 )
 		plottingMainSizer.AddGrowableRow( 1 )
@@ -2380,149 +2630,8 @@ class MarxanConnectGUI ( wx.Frame ):
 		self.plottingOptions.SetSizer( plottingMainSizer )
 		self.plottingOptions.Layout()
 		plottingMainSizer.Fit( self.plottingOptions )
-		self.auinotebook.AddPage( self.plottingOptions, u"8) Plotting Options", False, wx.NullBitmap )
-
-		aui_sizer.Add( self.auinotebook, 1, wx.EXPAND, 5 )
-
-
-		self.SetSizer( aui_sizer )
-		self.Layout()
-
-		self.Centre( wx.BOTH )
 
 		# Connect Events
-		self.Bind( wx.EVT_MENU, self.on_new_project, id = self.new_project.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_save_project, id = self.save_project.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_save_project_as, id = self.save_project_as.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_load_project, id = self.load_project.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_github, id = self.github.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_debug_mode, id = self.debug_mode.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_glossary, id = self.glossary.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_tutorial, id = self.tutorial.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_contributing, id = self.contributing.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_license, id = self.license.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_about, id = self.about.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_getting_started, id = self.start.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_mwz, id = self.mwz.GetId() )
-		self.Bind( wx.EVT_MENU, self.on_posthoc, id = self.posthoc.GetId() )
-		self.PU_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_PU_file )
-		self.PU_file_pu_id.Bind( wx.EVT_CHOICE, self.on_PU_file_pu_id )
-		self.FA_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_FA_file )
-		self.fa_status_radioBox.Bind( wx.EVT_RADIOBOX, self.on_fa_status_radioBox )
-		self.AA_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_AA_file )
-		self.aa_status_radioBox.Bind( wx.EVT_RADIOBOX, self.on_aa_status_radioBox )
-		self.conn_category_choicebook.Bind( wx.EVT_CHOICEBOOK_PAGE_CHANGED, self.on_conn_category_choice )
-		self.demo_matrixTypeRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_matrixTypeRadioBox )
-		self.demo_matrixFormatRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_matrixFormatRadioBox )
-		self.demo_rescaleRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_rescaleRadioBox )
-		self.demo_rescale_edgeRadioBox.Bind( wx.EVT_RADIOBOX, self.on_demo_rescale_edgeRadioBox )
-		self.demo_CU_CM_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_demo_CU_CM_file )
-		self.demo_CU_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_demo_CU_file )
-		self.demo_CU_file_pu_id.Bind( wx.EVT_CHOICE, self.on_demo_CU_file_pu_id )
-		self.demo_PU_CM_progress.Bind( wx.EVT_CHECKBOX, self.on_demo_PU_CM_progress )
-		self.demo_PU_CM_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_demo_PU_CM_file )
-		self.demo_rescale_button.Bind( wx.EVT_BUTTON, self.on_demo_rescale_button )
-		self.land_type_choice.Bind( wx.EVT_CHOICEBOOK_PAGE_CHANGED, self.on_land_type_choice )
-		self.land_res_matrixTypeRadioBox.Bind( wx.EVT_RADIOBOX, self.on_land_res_matrixTypeRadioBox )
-		self.land_HAB_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_HAB_file )
-		self.land_HAB_file_hab_id.Bind( wx.EVT_CHOICE, self.on_land_HAB_file_hab_id )
-		self.land_HAB_buff.Bind( wx.EVT_TEXT, self.on_land_HAB_buff )
-		self.land_HAB_thresh.Bind( wx.EVT_TEXT, self.on_land_HAB_thresh )
-		self.land_RES_mat_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_RES_mat_file )
-		self.resistance_mat_customize.Bind( wx.EVT_BUTTON, self.on_resistance_mat_customize )
-		self.land_RES_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_RES_file )
-		self.land_RES_file_res_id.Bind( wx.EVT_CHOICE, self.on_land_RES_file_hab_id )
-		self.land_PU_CM_progress.Bind( wx.EVT_CHECKBOX, self.on_land_PU_CM_progress )
-		self.land_PU_CM_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_land_PU_CM_file )
-		self.land_generate_button.Bind( wx.EVT_BUTTON, self.on_land_generate_button )
-		self.LP_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_LP_file )
-		self.cf_demo_in_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_out_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_between_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_eig_vect_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_google.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_self_recruit.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_local_retention.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_inflow.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_outflow.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_stochasticity.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_fa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_fa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_aa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_demo_aa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_in_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_out_degree.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_between_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_eig_vect_cent.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_google.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_fa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_fa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_aa_recipients.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.cf_land_aa_donors.Bind( wx.EVT_CHECKBOX, self.enable_calc_metrics )
-		self.bd_demo_conn_boundary.Bind( wx.EVT_CHECKBOX, self.on_bd_demo_conn_boundary )
-		self.bd_demo_min_plan_graph.Bind( wx.EVT_CHECKBOX, self.on_bd_demo_min_plan_graph )
-		self.bd_land_conn_boundary.Bind( wx.EVT_CHECKBOX, self.on_bd_land_conn_boundary )
-		self.bd_land_min_plan_graph.Bind( wx.EVT_CHECKBOX, self.on_bd_land_min_plan_graph )
-		self.metric_definition_choice.Bind( wx.EVT_CHOICE, self.on_metric_definition_choice )
-		self.calc_metrics.Bind( wx.EVT_BUTTON, self.on_calc_metrics )
-		self.preEval_metric_shp_choice.Bind( wx.EVT_CHOICE, self.on_preEval_metric_shp_choice )
-		self.preEval_metric_choice.Bind( wx.EVT_CHOICE, self.on_preEval_metric_choice )
-		self.plot_freq_metric.Bind( wx.EVT_BUTTON, self.on_plot_freq_metric )
-		self.remove_metric.Bind( wx.EVT_BUTTON, self.on_remove_metric )
-		self.preEval_discrete_from_quartile.Bind( wx.EVT_CHECKBOX, self.on_from_check )
-		self.preEval_discrete_from_percentile.Bind( wx.EVT_CHECKBOX, self.on_from_check )
-		self.preEval_discrete_from_value.Bind( wx.EVT_CHECKBOX, self.on_from_check )
-		self.preEval_discrete_to_quartile.Bind( wx.EVT_CHECKBOX, self.on_to_check )
-		self.preEval_discrete_to_percentile.Bind( wx.EVT_CHECKBOX, self.on_to_check )
-		self.preEval_discrete_to_value.Bind( wx.EVT_CHECKBOX, self.on_to_check )
-		self.preEval_create_new.Bind( wx.EVT_BUTTON, self.on_preEval_create_new )
-		self.cf_export_radioBox.Bind( wx.EVT_RADIOBOX, self.on_cf_export_radioBox )
-		self.spec_radio.Bind( wx.EVT_RADIOBOX, self.on_spec_radio )
-		self.orig_CF_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_CF_file )
-		self.CF_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_CF_file )
-		self.orig_SPEC_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_SPEC_file )
-		self.SPEC_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_SPEC_file )
-		self.customize_spec.Bind( wx.EVT_BUTTON, self.on_customize_spec )
-		self.targets.Bind( wx.EVT_TEXT, self.on_targets )
-		self.export_CF_files.Bind( wx.EVT_BUTTON, self.on_export_CF_files )
-		self.orig_BD_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_BD_file )
-		self.BD_filecheck.Bind( wx.EVT_CHECKBOX, self.on_BD_filecheck )
-		self.BD_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_BD_file )
-		self.export_BD_file.Bind( wx.EVT_BUTTON, self.on_export_BD_file )
-		self.orig_PUDAT_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_orig_PUDAT_file )
-		self.PUDAT_filecheck.Bind( wx.EVT_CHECKBOX, self.on_PUDAT_filecheck )
-		self.PUDAT_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_PUDAT_file )
-		self.export_pudat.Bind( wx.EVT_BUTTON, self.on_export_PUDAT )
-		self.export_metrics.Bind( wx.EVT_BUTTON, self.on_export_metrics )
-		self.inputdat_template_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_inputdat_template_file )
-		self.default_input_template.Bind( wx.EVT_BUTTON, self.on_default_input_template )
-		self.NUMREPS.Bind( wx.EVT_TEXT, self.on_NUMREPS )
-		self.SCENNAME.Bind( wx.EVT_TEXT, self.on_SCENNAME )
-		self.NUMITNS.Bind( wx.EVT_TEXT, self.on_NUMITNS )
-		self.marxan_CF.Bind( wx.EVT_RADIOBOX, self.on_marxan_CF )
-		self.marxan_bound.Bind( wx.EVT_RADIOBOX, self.on_marxan_bound )
-		self.inputdat_symmRadio.Bind( wx.EVT_RADIOBOX, self.on_inputdat_symmRadio )
-		self.CSM.Bind( wx.EVT_TEXT, self.on_CSM )
-		self.marxan_PU.Bind( wx.EVT_RADIOBOX, self.on_marxan_PU )
-		self.marxan_Radio.Bind( wx.EVT_RADIOBOX, self.on_marxan_Radio )
-		self.marxanBit_Radio.Bind( wx.EVT_RADIOBOX, self.on_marxanBit_Radio )
-		self.generate_inputdat.Bind( wx.EVT_BUTTON, self.on_generate_inputdat )
-		self.inputdat_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_inputdat_file )
-		self.customize_inpudat.Bind( wx.EVT_BUTTON, self.on_customize_inpudat )
-		self.run_marxan_button.Bind( wx.EVT_BUTTON, self.on_run_marxan )
-		self.view_sum.Bind( wx.EVT_BUTTON, self.on_view_sum )
-		self.view_mvbest.Bind( wx.EVT_BUTTON, self.on_view_mvbest )
-		self.postHoc_custom_choice.Bind( wx.EVT_CHECKBOX, self.on_postHoc_custom_choice )
-		self.postHoc_custom_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_postHoc_custom_file )
-		self.postHoc_category_choice.Bind( wx.EVT_CHOICE, self.on_postHoc_category_choice )
-		self.postHoc_output_choice.Bind( wx.EVT_CHOICE, self.on_postHoc_output_choice )
-		self.plot_postHoc_sizes.Bind( wx.EVT_BUTTON, self.on_plot_postHoc_sizes )
-		self.plot_postHoc_spacing.Bind( wx.EVT_BUTTON, self.on_plot_postHoc_spacing )
-		self.calc_postHoc.Bind( wx.EVT_BUTTON, self.on_calc_postHoc )
-		self.postHoc_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_postHoc_file )
-		self.export_postHoc.Bind( wx.EVT_BUTTON, self.on_export_postHoc )
-		self.postHoc_shp_file.Bind( wx.EVT_FILEPICKER_CHANGED, self.on_postHoc_shp_file )
-		self.export_postHoc_shp.Bind( wx.EVT_BUTTON, self.on_export_postHoc_shp )
 		self.metric_shp_choice.Bind( wx.EVT_CHOICE, self.on_metric_shp_choice )
 		self.metric_shp_choice1.Bind( wx.EVT_CHOICE, self.on_metric_shp_choice1 )
 		self.plot_map_button.Bind( wx.EVT_BUTTON, self.on_plot_map_button )
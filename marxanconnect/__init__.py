@@ -0,0 +1,15 @@
+"""
+Marxan Connect helpers that do not depend on the wx frame.
+
+The GUI (MarxanConnectGUI.py) is a thin client on top of these modules; they can also be used on their own to process
+Marxan Connect projects (.MarCon files) without a display.
+"""
+import os
+import sys
+
+name = "marxanconnect"
+
+if getattr(sys, 'frozen', False):
+    MCPATH = sys._MEIPASS
+else:
+    MCPATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,150 @@
+"""
+Planning unit adjacency
+
+Finds which planning units share an edge, and the length of the shared edge, for the minimum planar graph and shared
+edge boundary definitions, without intersecting every pair of neighbouring polygons. The polygon boundaries are split
+into segments and identical segments (rounded to a tolerance) are matched by sorting, which is exact for tessellations
+whose neighbours share their vertices (grids, hexagons and most topologically clean shapefiles). The polygons whose
+boundary is not entirely matched (e.g. an edge along two neighbours at a T-junction, or the edge of the study area) are
+intersected with their neighbours found with a spatial index instead. Point planning units, which have no edges, are
+connected by the Delaunay triangulation of their centroids. Either way the adjacency graph is planar.
+
+Adjacencies are cached per planning unit file (and modification time), see pu_adjacency().
+"""
+import os
+
+import numpy
+import pandas
+
+from marxanconnect.lazy import geopandas as gpd, shapely
+
+# decimals the segment end points are rounded to before matching, and the part of a polygon's perimeter which may be
+# left unmatched before it is intersected with its neighbours
+DECIMALS = 6
+TOLERANCE = 1e-6
+
+cache = {}
+
+
+def segment_edges(geometry, decimals=DECIMALS):
+    """ Segment edges
+
+    :param geometry: the planning unit polygons (geopandas.GeoSeries or array of shapely geometries)
+    :param decimals: the decimals the segment end points are rounded to before they are matched
+    :return: (numpy.array, numpy.array, numpy.array) the row index of the first and second planning unit of each pair of
+    planning units sharing an edge (first < second) and the length of the shared edge
+    """
+    geometry = numpy.asarray(geometry)
+    boundaries = shapely.boundary(geometry)
+    lines, owner = shapely.get_parts(boundaries, return_index=True)
+    coords, line = shapely.get_coordinates(lines, return_index=True)
+    same = numpy.flatnonzero(line[1:] == line[:-1])
+    start, end = numpy.round(coords[same], decimals), numpy.round(coords[same + 1], decimals)
+    owner = owner[line[same]]
+    length = numpy.hypot(*(coords[same + 1] - coords[same]).T)
+
+    # segments in a canonical direction, so that the two sides of a shared edge are identical
+    flip = (start[:, 0] > end[:, 0]) | ((start[:, 0] == end[:, 0]) & (start[:, 1] > end[:, 1]))
+    start[flip], end[flip] = end[flip], start[flip]
+    order = numpy.lexsort((end[:, 1], end[:, 0], start[:, 1], start[:, 0]))
+    key = numpy.hstack([start, end])[order]
+    matched = numpy.flatnonzero((key[1:] == key[:-1]).all(axis=1))
+    i, j = owner[order[matched]], owner[order[matched + 1]]
+    length = length[order[matched]]
+    keep = i != j
+    i, j, length = i[keep], j[keep], length[keep]
+
+    # the polygons with unmatched edges are intersected with their neighbours instead
+    n = geometry.shape[0]
+    perimeter = shapely.length(boundaries)
+    shared = numpy.bincount(i, weights=length, minlength=n) + numpy.bincount(j, weights=length, minlength=n)
+    partial = numpy.flatnonzero(perimeter - shared > perimeter * TOLERANCE)
+    if partial.shape[0]:
+        keep = ~(numpy.isin(i, partial) | numpy.isin(j, partial))
+        first, second, shared = intersection_edges(geometry, partial)
+        i, j = numpy.concatenate([i[keep], first]), numpy.concatenate([j[keep], second])
+        length = numpy.concatenate([length[keep], shared])
+    return combine(numpy.minimum(i, j), numpy.maximum(i, j), length, n)
+
+
+def intersection_edges(geometry, subset=None):
+    """ Intersection edges
+
+    Slower than segment_edges() but also finds edges shared by polygons whose vertices do not match
+
+    :param geometry: the planning unit polygons (geopandas.GeoSeries or array of shapely geometries)
+    :param subset: the row index of the planning units whose neighbours are found (default: every planning unit)
+    :return: (numpy.array, numpy.array, numpy.array) see segment_edges()
+    """
+    geometry = numpy.asarray(geometry)
+    n = geometry.shape[0]
+    i, j = shapely.STRtree(geometry).query(geometry if subset is None else geometry[subset], predicate='intersects')
+    if subset is not None:
+        i = subset[i]
+    i, j = numpy.minimum(i, j)[i != j], numpy.maximum(i, j)[i != j]
+    i, j, _ = combine(i, j, numpy.zeros(i.shape[0]), n)
+    boundaries = shapely.boundary(geometry)
+    length = shapely.length(shapely.intersection(boundaries[i], boundaries[j]))
+    shared = length > 0
+    return i[shared], j[shared], length[shared]
+
+
+def delaunay_edges(geometry):
+    """ Delaunay edges
+
+    :param geometry: the planning units (geopandas.GeoSeries or array of shapely geometries)
+    :return: (numpy.array, numpy.array, numpy.array) the row index of the first and second planning unit of each edge of
+    the Delaunay triangulation of the planning unit centroids (first < second), and shared edge lengths of 0 (points do
+    not share edges)
+    """
+    centroids = shapely.centroid(numpy.asarray(geometry))
+    points = shapely.get_coordinates(centroids)
+    edges = shapely.get_parts(shapely.delaunay_triangles(shapely.multipoints(points), only_edges=True))
+    ends = shapely.get_coordinates(edges).reshape((-1, 2, 2))
+
+    # map the edge end points back to the planning units
+    lookup = pandas.Series(numpy.arange(points.shape[0]),
+                           index=pandas.MultiIndex.from_arrays([points[:, 0], points[:, 1]]))
+    lookup = lookup[~lookup.index.duplicated()]
+    i = lookup.reindex(pandas.MultiIndex.from_arrays([ends[:, 0, 0], ends[:, 0, 1]])).values
+    j = lookup.reindex(pandas.MultiIndex.from_arrays([ends[:, 1, 0], ends[:, 1, 1]])).values
+    return combine(numpy.minimum(i, j).astype('int64'), numpy.maximum(i, j).astype('int64'), numpy.zeros(i.shape[0]),
+                   points.shape[0])
+
+
+def combine(i, j, length, n):
+    """
+    :return: (numpy.array, numpy.array, numpy.array) the unique pairs (sorted) with the total length of each pair
+    """
+    pairs, inverse = numpy.unique(i.astype('int64') * n + j, return_inverse=True)
+    length = numpy.bincount(inverse.ravel(), weights=length, minlength=pairs.shape[0])
+    return pairs // n, pairs % n, length
+
+
+def planar_edges(geometry, method='segments'):
+    """ Planar edges
+
+    :param geometry: the planning units
+    :param method: 'segments' (see segment_edges()) or 'intersection' (see intersection_edges()) for polygons
+    :return: (numpy.array, numpy.array, numpy.array) the edges of the planar adjacency graph of the planning units (the
+    pairs sharing an edge for polygons or the Delaunay triangulation of points) and the length of the shared edges
+    """
+    if not numpy.isin(shapely.get_type_id(numpy.asarray(geometry)), (3, 6)).any():
+        return delaunay_edges(geometry)
+    elif method == 'intersection':
+        return intersection_edges(geometry)
+    return segment_edges(geometry)
+
+
+def pu_adjacency(pu_filepath, method='segments'):
+    """ Planning unit adjacency
+
+    :param pu_filepath: the planning unit shapefile
+    :param method: see planar_edges()
+    :return: (numpy.array, numpy.array, numpy.array) see planar_edges(), cached until the file is modified
+    """
+    key = (os.path.abspath(pu_filepath), os.path.getmtime(pu_filepath), method)
+    if key not in cache:
+        cache.clear()
+        cache[key] = planar_edges(gpd.read_file(pu_filepath).geometry, method)
+    return cache[key]
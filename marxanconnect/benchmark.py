@@ -0,0 +1,454 @@
+"""
+Pipeline benchmark
+
+Times each stage of the headless pipeline on the tutorial projects shipped in docs/tutorial (or any .MarCon files):
+loading the planning unit shapefile, flagging the focus/avoidance areas, rescaling, each connectivity metric on its
+own, the conservation feature, boundary and pu.dat exports, input.dat generation, the post-hoc evaluation and
+rendering a map of the planning units. Projects are copied to a working directory first, so the tutorial files are
+never modified.
+
+Larger inputs are made by tiling synthetic copies of a project (see scale_project()): the planning units, connectivity
+units and focus/avoidance areas are repeated side by side, the connectivity data is repeated along the diagonal (as an
+edge list, a 100x tiled matrix would not fit in memory) and the Marxan input and output files are repeated with offset
+planning unit IDs. The timings are printed, can be saved to a csv file and compared with a previous run::
+
+    python -m marxanconnect.benchmark --scale 1,10,100 --output benchmark.csv --baseline previous.csv
+"""
+import argparse
+import contextlib
+import glob
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+import numpy
+import pandas
+
+from marxanconnect import MCPATH, export, pipeline
+from marxanconnect.lazy import geopandas as gpd, marxanconpy
+
+TUTORIALS = os.path.join(MCPATH, 'docs', 'tutorial')
+
+SHAPEFILES = ('pu_filepath', 'demo_cu_filepath', 'land_cu_filepath', 'fa_filepath', 'aa_filepath',
+              'land_res_filepath')
+
+# the planning unit ID columns of the Marxan input files
+MARXAN_INPUT_IDS = {'pudat_filepath': ['id'], 'orig_pudat_filepath': ['id'],
+                    'cf_filepath': ['pu'], 'orig_cf_filepath': ['pu'],
+                    'bd_filepath': ['id1', 'id2'], 'orig_bd_filepath': ['id1', 'id2']}
+
+
+def tutorial_projects(directory=TUTORIALS):
+    """
+    :param directory: the tutorial directory
+    :return: list of the tutorial .MarCon files (without the 'no_connect' variants)
+    """
+    return sorted(p for p in glob.glob(os.path.join(directory, '*', '*.MarCon')) if 'no_connect' not in p)
+
+
+class StageTimer:
+    """ Stage timer
+
+    Records the wall time of each stage. A stage which raises an exception is recorded as failed and the benchmark
+    carries on with the next stage.
+    """
+
+    def __init__(self, project, scale, n_pu):
+        self.project = project
+        self.scale = scale
+        self.n_pu = n_pu
+        self.rows = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except Exception as e:
+            status = 'failed: ' + type(e).__name__
+            if str(e):
+                status += ': ' + str(e).splitlines()[0]
+            if os.environ.get('MARXANCONNECT_BENCHMARK_TRACEBACK'):
+                traceback.print_exc()
+        self.rows.append({'project': self.project, 'scale': self.scale, 'n_pu': self.n_pu, 'stage': name,
+                          'seconds': round(time.perf_counter() - start, 4), 'status': status})
+        print("    {:<40} {:9.3f} s  {}".format(name, self.rows[-1]['seconds'], status))
+
+    def skip(self, name, reason):
+        self.rows.append({'project': self.project, 'scale': self.scale, 'n_pu': self.n_pu, 'stage': name,
+                          'seconds': numpy.nan, 'status': 'skipped: ' + reason})
+
+
+# ##########################  synthetic copies #########################################################################
+
+def id_tiler(stride):
+    """
+    :param stride: the offset between the numeric IDs of two copies
+    :return: function(values, copy) offsetting numeric IDs by copy * stride, or suffixing other IDs with '_<copy>'
+    """
+    def tile(values, copy):
+        values = pandas.Series(values)
+        numeric = pandas.to_numeric(values, errors='coerce')
+        if numeric.notna().all() and (numeric % 1 == 0).all():
+            return (numeric.astype('int64') + copy * stride).values
+        if copy == 0:
+            return values.astype(str).values
+        return (values.astype(str) + "_" + str(copy)).values
+    return tile
+
+
+def tile_shapefile(filepath, offsets, id_column, tile_ids):
+    """ Tile shapefile
+
+    :param filepath: the shapefile, overwritten with the copies
+    :param offsets: list of the (x, y) translation of each copy
+    :param id_column: the ID column to offset, or None
+    :param tile_ids: see id_tiler()
+    :return: geopandas.GeoDataFrame the tiled shapefile
+    """
+    shp = gpd.read_file(filepath)
+    copies = []
+    for copy, (dx, dy) in enumerate(offsets):
+        tiled = shp.copy()
+        tiled.geometry = shp.geometry.translate(dx, dy)
+        if id_column in tiled.columns:
+            tiled[id_column] = tile_ids(shp[id_column], copy)
+        copies.append(tiled)
+    tiled = gpd.GeoDataFrame(pandas.concat(copies, ignore_index=True), crs=shp.crs)
+    tiled.to_file(filepath)
+    return tiled
+
+
+def tile_table(filepath, id_columns, factor, tile_ids):
+    """ Tile table
+
+    :param filepath: a comma or tab separated file, overwritten with the copies
+    :param id_columns: the ID columns to offset (the columns which are not in the file are ignored)
+    :param factor: the number of copies
+    :param tile_ids: see id_tiler()
+    :return:
+    """
+    delimiter = export.read_delimiter(filepath)
+    table = pandas.read_csv(filepath, sep=delimiter, dtype=str)
+    copies = []
+    for copy in range(factor):
+        tiled = table.copy()
+        for column in id_columns:
+            if column in tiled.columns:
+                tiled[column] = tile_ids(table[column], copy)
+        copies.append(tiled)
+    pandas.concat(copies, ignore_index=True).to_csv(filepath, sep=delimiter, index=False)
+
+
+def tile_connectivity(filepath, format, factor, tile_ids, ids=None):
+    """ Tile connectivity
+
+    Repeats the connectivity data along the diagonal. Matrices are positional (row i is the i-th unit of the
+    shapefile), so they are written as an edge list of the unit IDs.
+
+    :param filepath: the connectivity file, overwritten with the copies
+    :param format: The format of the connectivity file
+    :param factor: the number of copies
+    :param tile_ids: see id_tiler()
+    :param ids: for matrices, the IDs of the units of the original shapefile (in order)
+    :return: str the format of the tiled file
+    """
+    if format != "Matrix":
+        tile_table(filepath, ['id1', 'id2'], factor, tile_ids)
+        return format
+    matrix = pandas.read_csv(filepath, index_col=0).values
+    if ids is None:
+        ids = numpy.arange(matrix.shape[0])
+    ids = numpy.asarray(ids)
+    rows, columns = numpy.nonzero(matrix)
+    with open(filepath, 'w', newline='') as file:
+        header = True
+        for copy in range(factor):
+            tiled = tile_ids(ids, copy)
+            pandas.DataFrame({'id1': tiled[rows], 'id2': tiled[columns], 'value': matrix[rows, columns]}).to_csv(
+                file, index=False, header=header)
+            header = False
+    return "Edge List"
+
+
+def scale_project(projfile, factor, directory, rootpath=MCPATH):
+    """ Scale project
+
+    Copies a project directory and tiles its inputs and Marxan outputs factor times
+
+    :param projfile: the .MarCon project file
+    :param factor: the number of copies
+    :param directory: the directory for the scaled project
+    :param rootpath: The Marxan Connect directory
+    :return: str the scaled .MarCon project file
+    """
+    project = pipeline.load_project(projfile, rootpath)
+    source = os.path.dirname(project['filepaths']['projfile'])
+    shutil.copytree(source, directory, dirs_exist_ok=True)
+    for key, path in project['filepaths'].items():
+        if os.path.isabs(path) and os.path.commonpath([source, os.path.abspath(path)]) == source:
+            project['filepaths'][key] = os.path.join(directory, os.path.relpath(path, source))
+    project['filepaths']['projfile'] = os.path.join(directory, os.path.basename(projfile))
+    if factor == 1 or not os.path.isfile(project['filepaths']['pu_filepath']):
+        pipeline.save_project(project)
+        return project['filepaths']['projfile']
+
+    filepaths = project['filepaths']
+    pu = gpd.read_file(filepaths['pu_filepath'])
+    id_column = filepaths['pu_file_pu_id']
+    largest = pu.shape[0]
+    if id_column in pu.columns:
+        numeric = pandas.to_numeric(pu[id_column], errors='coerce')
+        if numeric.notna().all():
+            largest = max(largest, int(numeric.max()))
+    # numeric IDs are offset by a power of ten at least 10 times larger than the planning unit IDs and count
+    tile_ids = id_tiler(10 ** (len(str(largest)) + 1))
+
+    # copies side by side, in a square
+    minx, miny, maxx, maxy = pu.total_bounds
+    columns = math.ceil(math.sqrt(factor))
+    offsets = [((copy % columns) * (maxx - minx) * 1.1, (copy // columns) * (maxy - miny) * 1.1)
+               for copy in range(factor)]
+
+    units = {}
+    tiled = set()
+    for key in SHAPEFILES:
+        path = filepaths.get(key, '')
+        if os.path.isfile(path) and path.startswith(directory):
+            column = {'pu_filepath': id_column, 'demo_cu_filepath': filepaths.get('demo_cu_file_pu_id')}.get(key)
+            if path not in tiled:
+                original = gpd.read_file(path, ignore_geometry=True)
+                tile_shapefile(path, offsets, column, tile_ids)
+                tiled.add(path)
+                units[key] = original[column].values if column in original.columns else None
+
+    formats = {}
+    for key, format, ids in (('demo_pu_cm_filepath', project['options']['demo_conmat_format'], units['pu_filepath']),
+                             ('demo_cu_cm_filepath', project['options']['demo_conmat_format'],
+                              units.get('demo_cu_filepath')),
+                             ('land_pu_cm_filepath', "Edge List with Habitat", units['pu_filepath'])):
+        path = filepaths.get(key, '')
+        if os.path.isfile(path) and path.startswith(directory) and path not in tiled:
+            formats[key] = tile_connectivity(path, format, factor, tile_ids, ids)
+            tiled.add(path)
+    if 'Edge List' in (formats.get('demo_pu_cm_filepath'), formats.get('demo_cu_cm_filepath')):
+        project['options']['demo_conmat_format'] = "Edge List"
+
+    for key, id_columns in MARXAN_INPUT_IDS.items():
+        path = filepaths.get(key, '')
+        if os.path.isfile(path) and path.startswith(directory) and path not in tiled:
+            tile_table(path, id_columns, factor, tile_ids)
+            tiled.add(path)
+
+    # Marxan outputs with planning unit IDs (solutions, selection frequency)
+    if os.path.isfile(filepaths.get('marxan_input', '')) and filepaths['marxan_input'].startswith(directory):
+        index = pipeline.run_index(project)
+        for output, path in index.files.items():
+            if path.startswith(directory) and path not in tiled:
+                header = pandas.read_csv(path, sep=export.read_delimiter(path), nrows=0).columns
+                if 'planning_unit' in header or 'PUID' in header:
+                    tile_table(path, ['planning_unit', 'PUID'], factor, tile_ids)
+                    tiled.add(path)
+
+    pipeline.save_project(project)
+    return project['filepaths']['projfile']
+
+
+# ##########################  benchmark ################################################################################
+
+def selected_metrics(project, all_metrics=False):
+    """
+    :param project: the project dictionary
+    :param all_metrics: True to time every metric rather than those selected in the project
+    :return: list of the (type, metric) pairs to time ('demo' or 'land', metric option)
+    """
+    return [(type, metric) for type in ('demo', 'land')
+            for metric, selected in project['options'][type + '_metrics'].items() if selected or all_metrics]
+
+
+def render_map(project, spatial, filepath):
+    """ Render map
+
+    Renders the planning units, coloured by the best solution or the first connectivity metric, to an image file with
+    the Agg backend (the basemap of the GUI's map is not drawn)
+
+    :param project: the project dictionary
+    :param spatial: the spatial dictionary from pipeline.load_spatial()
+    :param filepath: the image filepath
+    :return:
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import pyplot
+
+    pu = spatial['pu_shp'].to_crs(pipeline.LONGLAT)
+    metrics = project.get('connectivityMetrics', {})
+    values = metrics.get('best_solution')
+    for type in ('spec_demo_pu', 'spec_land_pu'):
+        if values is None and metrics.get(type):
+            values = next(iter(metrics[type].values()))
+    figure, axes = pyplot.subplots(figsize=(8, 6))
+    if values is not None and len(values) == pu.shape[0]:
+        pu.assign(value=numpy.asarray(values, dtype='float64')).plot(column='value', ax=axes, legend=True)
+    else:
+        pu.plot(ax=axes, facecolor='none', edgecolor='black', linewidth=0.2)
+    figure.savefig(filepath, dpi=100)
+    pyplot.close(figure)
+
+
+def benchmark_project(projfile, scale=1, workdir=None, all_metrics=False, rootpath=MCPATH):
+    """ Benchmark project
+
+    :param projfile: the .MarCon project file
+    :param scale: the number of tiled copies (see scale_project())
+    :param workdir: the directory the project is copied to (a temporary directory by default)
+    :param all_metrics: True to time every metric rather than those selected in the project
+    :param rootpath: The Marxan Connect directory
+    :return: pandas.DataFrame one row per stage with the project, scale, number of planning units, stage, seconds and
+    status
+    """
+    pipeline.set_headless()
+    name = os.path.basename(os.path.dirname(os.path.abspath(projfile))) + "/" + os.path.basename(projfile)
+    cleanup = workdir is None
+    if cleanup:
+        workdir = tempfile.mkdtemp(prefix='marxanconnect_benchmark_')
+    cwd = os.getcwd()
+    try:
+        print(name + " x" + str(scale))
+        start = time.perf_counter()
+        copy = scale_project(projfile, scale, os.path.join(workdir, "x" + str(scale)), rootpath)
+        print("    {:<40} {:9.3f} s".format("(copy and scale)", time.perf_counter() - start))
+        project = pipeline.load_project(copy, rootpath)
+        os.chdir(os.path.dirname(copy))
+        project['options']['demo_pu_cm_progress'] = False
+        project['options']['land_pu_cm_progress'] = False
+        filepaths = project['filepaths']
+
+        n_pu = 0
+        if os.path.isfile(filepaths['pu_filepath']):
+            n_pu = gpd.read_file(filepaths['pu_filepath'], ignore_geometry=True).shape[0]
+        timer = StageTimer(name, scale, n_pu)
+
+        spatial = {}
+        with timer.stage('load planning units'):
+            spatial['pu_shp'], spatial['pu_proj'] = pipeline.load_pu_shp(project)
+        for area in ('fa', 'aa'):
+            if os.path.isfile(filepaths[area + '_filepath']):
+                with timer.stage(area + ' flags'):
+                    pipeline.include_area(spatial, area, filepaths[area + '_filepath'])
+
+        if project['options']['demo_conmat_rescale'] != "Identical Grids" and \
+                os.path.isfile(filepaths['demo_cu_cm_filepath']):
+            with timer.stage('rescale demographic'):
+                pipeline.rescale_demo(project)
+        if pipeline.has_land_inputs(project):
+            with timer.stage('generate landscape'):
+                pipeline.generate_land(project)
+
+        # each metric on its own
+        for type, metric in selected_metrics(project, all_metrics):
+            if not os.path.isfile(filepaths[type + '_pu_cm_filepath']):
+                timer.skip('metric ' + type + ' ' + metric, 'no ' + type + ' connectivity')
+                continue
+            with timer.stage('metric ' + type + ' ' + metric):
+                pipeline.calc_selected_metrics(project, [(type, metric)])
+        with timer.stage('lock pu.dat'):
+            pipeline.lock_pudat(project, spatial)
+
+        with timer.stage('export conservation features'):
+            pipeline.export_cf_files(project, spatial)
+        with timer.stage('export boundary'):
+            pipeline.export_bd_file(project)
+        with timer.stage('export pu.dat'):
+            pipeline.export_pudat(project, spatial)
+
+        with timer.stage('input.dat'):
+            pipeline.generate_inputdat(project, rootpath)
+
+        if os.path.isfile(filepaths['marxan_input']) and pipeline.run_index(project).has_output():
+            for category in pipeline.postHoc_categories(project):
+                with timer.stage('post-hoc ' + category):
+                    pipeline.calc_postHoc(project, category)
+                if timer.rows[-1]['status'] == 'ok':
+                    with timer.stage('post-hoc export'):
+                        pipeline.export_postHoc(project)
+        else:
+            timer.skip('post-hoc', 'no Marxan output')
+
+        if 'pu_shp' not in spatial:
+            timer.skip('map', 'no planning units')
+        else:
+            with timer.stage('map'):
+                render_map(project, spatial, os.path.join(os.path.dirname(copy), 'benchmark_map.png'))
+        return pandas.DataFrame(timer.rows)
+    finally:
+        os.chdir(cwd)
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, threshold=1.25):
+    """ Compare with a baseline
+
+    :param results: pandas.DataFrame from benchmark_project()
+    :param baseline: pandas.DataFrame of a previous benchmark
+    :param threshold: the ratio of the new to the baseline time above which a stage is flagged as a regression
+    :return: pandas.DataFrame the stages of both runs with their times, ratio and regression flag
+    """
+    keys = ['project', 'scale', 'stage']
+    merged = results.merge(baseline[keys + ['seconds']], on=keys, how='inner', suffixes=('', '_baseline'))
+    merged['ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['regression'] = merged['ratio'] > threshold
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of the Marxan Connect pipeline on the tutorial "
+                                                 "projects or other .MarCon files.")
+    parser.add_argument('projfiles', nargs='*', help=".MarCon project file(s) (default: the tutorial projects)")
+    parser.add_argument('--scale', default="1", help="comma separated numbers of tiled copies (e.g. 1,10,100)")
+    parser.add_argument('--all-metrics', action='store_true', help="time every metric, not only those selected")
+    parser.add_argument('--workdir', default=None, help="directory for the project copies (default: temporary)")
+    parser.add_argument('--output', default=None, help="csv file for the timings")
+    parser.add_argument('--baseline', default=None, help="csv file of a previous run to compare with")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio flagged as a regression (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    projfiles = args.projfiles or tutorial_projects()
+    results = []
+    for scale in [int(s) for s in args.scale.split(',') if s.strip()]:
+        for projfile in projfiles:
+            workdir = None
+            if args.workdir:
+                workdir = os.path.join(args.workdir, os.path.splitext(os.path.basename(projfile))[0] + "_" +
+                                       os.path.basename(os.path.dirname(os.path.abspath(projfile))))
+            try:
+                results.append(benchmark_project(projfile, scale, workdir, args.all_metrics))
+            except Exception:
+                print("Failed: " + projfile + "\n" + traceback.format_exc(), file=sys.stderr)
+    if not results:
+        return 1
+    results = pandas.concat(results, ignore_index=True)
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    print("\nTotal seconds by project and scale:")
+    print(results.groupby(['project', 'scale', 'n_pu'])['seconds'].sum().to_string())
+    if args.baseline:
+        comparison = compare(results, pandas.read_csv(args.baseline), args.threshold)
+        regressions = comparison[comparison['regression']]
+        print("\n" + str(regressions.shape[0]) + " stage(s) slower than " + str(args.threshold) + "x the baseline")
+        if regressions.shape[0]:
+            print(regressions[['project', 'scale', 'stage', 'seconds_baseline', 'seconds', 'ratio']].to_string())
+            return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
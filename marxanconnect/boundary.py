@@ -0,0 +1,140 @@
+"""
+Marxan boundary file generation
+
+Builds the connectivity boundary definition (boundary.dat) directly from the planning unit connectivity file. Only the
+nonzero connections are kept, a connectivity matrix is read a block of rows at a time, and the rows are written to disk
+in chunks, so the time and file size depend on the number of connections rather than on the square of the number of
+planning units.
+
+The minimum planar graph definition keeps only the connections between planning units which are adjacent in the planar
+graph of the planning units (see adjacency.py and Fall et al. 2007). The shared edge definition is the spatial boundary
+of the planning units, the length of the edge each pair of adjacent planning units share.
+"""
+import numpy
+import pandas
+
+from marxanconnect import matrixstore
+from marxanconnect.export import CHUNKSIZE, pu_sort_keys
+
+
+def read_edges(filename, format, chunksize=CHUNKSIZE):
+    """ Read edges
+
+    Reads the nonzero connections of a connectivity file, from its binary store (see matrixstore.py) if it can be
+    stored. Edge lists with several values per connection (one per time, type or habitat) are averaged, as when the
+    boundary is calculated from the connectivity metrics.
+
+    :param filename: filename of the connectivity data
+    :param format: The format of the connectivity file (i.e. "Matrix", "Edge List", "Edge List with Type", "Edge List
+    with Time", "Edge List with Habitat")
+    :param chunksize: the number of matrix rows read at a time
+    :return: (numpy.array, numpy.array, numpy.array, numpy.array) the planning unit IDs (as str), the index of the
+    source and destination planning unit of each connection in the IDs, and the connectivity values
+    """
+    store = matrixstore.load(filename, format)
+    if store is not None:
+        return store.edges()
+    if format == "Matrix":
+        ids = None
+        id1, id2, value = [], [], []
+        for chunk in pandas.read_csv(filename, index_col=0, chunksize=chunksize):
+            if ids is None:
+                ids = pandas.Index(chunk.columns.astype(str))
+            values = chunk.values
+            rows, columns = numpy.nonzero(values)
+            id1.append(ids.get_indexer(chunk.index.astype(str))[rows])
+            id2.append(columns)
+            value.append(values[rows, columns])
+        id1 = numpy.concatenate(id1)
+        if (id1 < 0).any():
+            raise ValueError(filename + " does not have the same planning units in its rows and columns")
+        return numpy.asarray(ids), id1, numpy.concatenate(id2), numpy.concatenate(value)
+
+    edges = pandas.read_csv(filename, usecols=['id1', 'id2', 'value'], dtype={'id1': str, 'id2': str})
+    if format != "Edge List":
+        edges = edges.groupby(['id1', 'id2'], sort=False)['value'].mean().reset_index()
+    edges = edges[edges['value'] != 0]
+    codes, ids = pandas.factorize(pandas.concat([edges['id1'], edges['id2']], ignore_index=True))
+    n = edges.shape[0]
+    return numpy.asarray(ids, dtype='str'), codes[:n], codes[n:], edges['value'].values
+
+
+def connectivity_boundary(ids, id1, id2, value, symmetric=True):
+    """ Connectivity boundary
+
+    :param ids: the planning unit IDs
+    :param id1: the index of the source planning unit of each connection in ids
+    :param id2: the index of the destination planning unit of each connection in ids
+    :param value: the connectivity values
+    :param symmetric: if True, each pair of planning units is listed once, with the sum of the connectivity in both
+    directions (Marxan applies a symmetric boundary in both directions). If False, each direction is listed separately
+    (for ASYMMETRICCONNECTIVITY)
+    :return: pandas.DataFrame with the id1, id2 and boundary columns sorted by id1 then id2
+    """
+    keep = numpy.flatnonzero((value != 0) & ~numpy.isnan(value))
+    id1, id2, value = id1[keep], id2[keep], value[keep]
+
+    # rank the planning units in their sort order so that the pairs can be sorted and combined as integers
+    order = numpy.argsort(pu_sort_keys(ids), kind='stable')
+    rank = numpy.empty(order.shape[0], dtype='int64')
+    rank[order] = numpy.arange(order.shape[0])
+    a, b = rank[id1], rank[id2]
+    if symmetric:
+        a, b = numpy.minimum(a, b), numpy.maximum(a, b)
+    pairs, inverse = numpy.unique(a * order.shape[0] + b, return_inverse=True)
+    boundary = numpy.bincount(inverse.ravel(), weights=value, minlength=pairs.shape[0])
+    sorted_ids = numpy.asarray(ids)[order]
+    return pandas.DataFrame({'id1': sorted_ids[pairs // order.shape[0]],
+                             'id2': sorted_ids[pairs % order.shape[0]],
+                             'boundary': boundary})
+
+
+def planar_connections(ids, id1, id2, value, pu_ids, planar):
+    """ Planar connections
+
+    :param ids, id1, id2, value: the connections (see read_edges())
+    :param pu_ids: the planning unit IDs, in the order of the planning unit shapefile
+    :param planar: (numpy.array, numpy.array, numpy.array) the row indices of the planning units at each end of the
+    edges of the planar graph and the shared edge lengths (see adjacency.pu_adjacency())
+    :return: (numpy.array, numpy.array, numpy.array, numpy.array) the connections along the edges of the planar graph
+    """
+    first, second, _ = planar
+    index = pandas.Index(ids).get_indexer(numpy.asarray(pu_ids).astype(str))
+    a, b = index[first], index[second]
+    valid = (a >= 0) & (b >= 0)
+    a, b = a[valid].astype('int64'), b[valid].astype('int64')
+    n = len(ids)
+    keep = numpy.isin(id1.astype('int64') * n + id2, numpy.concatenate([a * n + b, b * n + a]))
+    return ids, id1[keep], id2[keep], value[keep]
+
+
+def shared_edge_boundary(pu_ids, planar):
+    """ Shared edge boundary
+
+    :param pu_ids: the planning unit IDs, in the order of the planning unit shapefile
+    :param planar: the edges of the planar graph and the shared edge lengths (see adjacency.pu_adjacency())
+    :return: pandas.DataFrame with the id1, id2 and boundary (shared edge length) columns sorted by id1 then id2
+    """
+    first, second, length = planar
+    return connectivity_boundary(numpy.asarray(pu_ids).astype(str), first, second, length)
+
+
+def write_connectivity_boundary(filename, format, filepath, symmetric=True, pu_ids=None, planar=None,
+                                chunksize=CHUNKSIZE):
+    """ Write connectivity boundary
+
+    :param filename: filename of the planning unit connectivity data
+    :param format: The format of the connectivity file
+    :param filepath: the boundary.dat filepath
+    :param symmetric: see connectivity_boundary()
+    :param pu_ids: for the minimum planar graph, the planning unit IDs in the order of the planning unit shapefile
+    :param planar: for the minimum planar graph, the edges of the planar graph (see adjacency.pu_adjacency())
+    :param chunksize: the number of rows read and written at a time
+    :return: int the number of rows written
+    """
+    edges = read_edges(filename, format, chunksize)
+    if planar is not None:
+        edges = planar_connections(*edges, pu_ids, planar)
+    boundary = connectivity_boundary(*edges, symmetric=symmetric)
+    boundary.to_csv(filepath, index=False, chunksize=chunksize)
+    return boundary.shape[0]
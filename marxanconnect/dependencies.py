@@ -0,0 +1,307 @@
+"""
+Incremental pipeline
+
+Tracks which of a project's artifacts (the planning unit layer, the focus/avoidance area flags, the planning unit
+connectivity, each connectivity metric, the discrete metrics, spec.dat, puvspr.dat, boundary.dat, pu.dat, input.dat,
+the Marxan output and the post-hoc evaluation) are out of date, so that "Update All" only recomputes what changed.
+
+Each artifact is a node of a dependency graph (see graph()) with the input files, options and project data it is made
+from and the nodes it depends on. Its fingerprint is a hash of the size and modification time of its files, the values
+of its options and project data (e.g. the discrete metrics, which can be added in the GUI without changing any option)
+and the fingerprints of its upstream nodes; the fingerprint is recorded in project['dependencies'] when the node is
+built. A node is stale when its fingerprint differs from the recorded one, so changing a file or an option (or
+rebuilding an upstream node) marks the node and everything downstream of it as stale, and update() rebuilds only the
+stale nodes, in order.
+"""
+import collections
+import hashlib
+import json
+import os
+
+from marxanconnect import pipeline, trace
+
+# the nodes built by update() by default (with the nodes they depend on)
+DEFAULT_TARGETS = ('inputdat',)
+
+
+class Node:
+    """ Node
+
+    An artifact of the pipeline
+    """
+
+    def __init__(self, name, build, files=(), values=(), options=(), upstream=(), memory=None, state=None):
+        """
+        :param name: the node name
+        :param build: function(project, spatial) building the artifact
+        :param files: the project['filepaths'] keys of the files the artifact is made from (or written to)
+        :param values: the project['filepaths'] keys which are not files (e.g. ID column names)
+        :param options: the project['options'] keys (nested options as 'demo_metrics.google')
+        :param upstream: the names of the nodes the artifact is made from
+        :param memory: for artifacts held in memory, the spatial dictionary key which has to exist
+        :param state: function(project) returning the project data the artifact is made from (or written to) which
+        are neither files nor options (e.g. the discrete metrics)
+        """
+        self.name = name
+        self.build = build
+        self.files = files
+        self.values = values
+        self.options = options
+        self.upstream = upstream
+        self.memory = memory
+        self.state = state
+
+
+def option(project, key):
+    value = project['options']
+    for part in key.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def file_state(filepath):
+    """
+    :return: list the filepath, size and modification time, or only the filepath if the file does not exist
+    """
+    if isinstance(filepath, str) and os.path.isfile(filepath):
+        return [filepath, os.path.getsize(filepath), os.path.getmtime(filepath)]
+    return [filepath]
+
+
+def fingerprint(project, node, fingerprints):
+    """ Fingerprint
+
+    :param project: the project dictionary
+    :param node: Node
+    :param fingerprints: the current fingerprints of the upstream nodes
+    :return: str
+    """
+    filepaths = project['filepaths']
+    state = [[file_state(filepaths.get(key, '')) for key in node.files],
+             [filepaths.get(key, '') for key in node.values],
+             [option(project, key) for key in node.options],
+             [fingerprints[name] for name in node.upstream]]
+    if node.state is not None:
+        state.append(node.state(project))
+    if node.name == 'marxan_output' and os.path.isfile(filepaths['marxan_input']):
+        index = pipeline.run_index(project)
+        index.refresh()
+        state.append([file_state(f) for f in sorted(index.files.values())])
+    return hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def discrete_state(project):
+    """
+    :return: dict of the values of the discrete metrics (including the 'lockin'/'lockout' metrics) by type and name
+    """
+    return {key: {name: values for name, values in metrics.items() if 'discrete' in name}
+            for key, metrics in project.get('connectivityMetrics', {}).items()
+            if key.startswith('spec_') and isinstance(metrics, dict)}
+
+
+def spec_state(project):
+    return project.get('spec_dat')
+
+
+# ##########################  builds ###################################################################################
+
+def build_pu_layer(project, spatial):
+    spatial.clear()
+    if os.path.isfile(project['filepaths']['pu_filepath']):
+        spatial['pu_shp'], spatial['pu_proj'] = pipeline.load_pu_shp(project)
+
+
+def build_area(area):
+    def build(project, spatial):
+        for key in [k for k in spatial if k.startswith(area + '_')]:
+            del spatial[key]
+        if 'pu_shp' in spatial:
+            spatial['pu_shp'] = spatial['pu_shp'].drop(columns=area + '_included', errors='ignore')
+        pipeline.include_area(spatial, area, project['filepaths'][area + '_filepath'])
+    return build
+
+
+def build_demo_pu_matrix(project, spatial):
+    if project['options']['demo_conmat_rescale'] != "Identical Grids" and \
+            os.path.isfile(project['filepaths']['demo_cu_cm_filepath']):
+        pipeline.rescale_demo(project)
+
+
+def build_land_pu_matrix(project, spatial):
+    if pipeline.has_land_inputs(project):
+        pipeline.generate_land(project)
+
+
+def build_metric(type, metric):
+    def build(project, spatial):
+        pipeline.calc_selected_metrics(project, [(type, metric)])
+    return build
+
+
+def build_discrete_features(project, spatial):
+    pipeline.prune_metrics(project)
+    pipeline.rediscretize(project)
+
+
+def build_spec(project, spatial):
+    if 'connectivityMetrics' in project:
+        project['spec_dat'] = pipeline.new_spec(project).to_json(orient='split')
+
+
+def build_puvspr(project, spatial):
+    if 'spec_dat' in project:
+        pipeline.export_cf_files(project, spatial)
+
+
+def build_bound(project, spatial):
+    pipeline.export_bd_file(project)
+
+
+def build_pudat(project, spatial):
+    if project['options']['pudat_filecheck']:
+        pipeline.export_pudat(project, spatial)
+    else:
+        pipeline.lock_pudat(project, spatial)
+
+
+def build_posthoc(project, spatial):
+    pipeline.calc_postHoc_categories(project)
+
+
+def graph(project):
+    """ Graph
+
+    :param project: the project dictionary
+    :return: collections.OrderedDict of the Nodes by name, in build order
+    """
+    nodes = collections.OrderedDict()
+
+    def add(node):
+        nodes[node.name] = node
+
+    add(Node('pu_layer', build_pu_layer, files=('pu_filepath',), values=('pu_file_pu_id',),
+             memory='pu_shp' if os.path.isfile(project['filepaths']['pu_filepath']) else None))
+    for area in ('fa', 'aa'):
+        add(Node(area + '_flags', build_area(area), files=(area + '_filepath',), upstream=('pu_layer',),
+                 memory=area + '_shp' if os.path.isfile(project['filepaths'][area + '_filepath']) else None))
+    add(Node('demo_pu_matrix', build_demo_pu_matrix,
+             files=('demo_cu_filepath', 'demo_cu_cm_filepath', 'demo_pu_cm_filepath'), values=('demo_cu_file_pu_id',),
+             options=('demo_conmat_format', 'demo_conmat_rescale', 'demo_conmat_rescale_edge'),
+             upstream=('pu_layer',)))
+    add(Node('land_pu_matrix', build_land_pu_matrix,
+             files=('land_cu_filepath', 'land_res_mat_filepath', 'land_res_filepath', 'land_pu_cm_filepath'),
+             values=('land_cu_file_hab_id', 'land_res_file_hab_id'),
+             options=('land_conmat_type', 'land_res_matrixType', 'land_hab_buff', 'land_res_cellsize'),
+             upstream=('pu_layer',)))
+
+    metrics = []
+    for type in ('demo', 'land'):
+        for metric, selected in project['options'][type + '_metrics'].items():
+            if not selected or not os.path.isfile(project['filepaths'][type + '_pu_cm_filepath']):
+                continue
+            upstream = ('pu_layer', type + '_pu_matrix')
+            if metric.startswith(('fa_', 'aa_')):
+                upstream += (metric[:2] + '_flags',)
+            options = ('calc_metrics_pu', 'calc_metrics_cu', type + '_metrics.' + metric)
+            options += ('demo_conmat_type',) if type == 'demo' else ('land_hab_thresh',)
+            add(Node('metric:' + type + ':' + metric, build_metric(type, metric), files=('lp_filepath',),
+                     options=options, upstream=upstream))
+            metrics.append('metric:' + type + ':' + metric)
+
+    add(Node('discrete_features', build_discrete_features,
+             options=('demo_metrics', 'land_metrics'), upstream=tuple(metrics), state=discrete_state))
+    add(Node('spec', build_spec, options=('spec_set', 'targets'), upstream=('discrete_features',), state=spec_state))
+    add(Node('puvspr', build_puvspr, files=('orig_cf_filepath', 'orig_spec_filepath', 'cf_filepath', 'spec_filepath'),
+             options=('cf_export',), upstream=('spec', 'pu_layer')))
+    add(Node('bound', build_bound,
+             files=('orig_bd_filepath', 'bd_filepath'),
+             options=('bd_filecheck', 'bd_shared_edge', 'demo_metrics', 'land_metrics'),
+             upstream=('pu_layer', 'demo_pu_matrix', 'land_pu_matrix') + tuple(metrics)))
+    add(Node('pudat', build_pudat, files=('orig_pudat_filepath', 'pudat_filepath'),
+             options=('pudat_filecheck', 'fa_status', 'aa_status'),
+             upstream=('fa_flags', 'aa_flags', 'discrete_features')))
+    add(Node('inputdat', lambda project, spatial: pipeline.generate_inputdat(project),
+             files=('marxan_template_input', 'marxan_input'),
+             options=('NUMREPS', 'SCENNAME', 'NUMITNS', 'CSM', 'marxan_CF', 'marxan_bound', 'marxan_PU',
+                      'inputdat_boundary'),
+             upstream=('puvspr', 'bound', 'pudat')))
+    add(Node('marxan_output', lambda project, spatial: pipeline.run_marxan(project),
+             options=('marxan', 'marxan_bit'), upstream=('inputdat',)))
+    add(Node('posthoc', build_posthoc, files=('posthoc',),
+             upstream=('marxan_output', 'demo_pu_matrix', 'land_pu_matrix')))
+    return nodes
+
+
+def required(nodes, targets):
+    """
+    :return: set of the target node names and every node they depend on
+    """
+    needed = set()
+    pending = [t for t in targets if t in nodes]
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(nodes[name].upstream)
+    return needed
+
+
+def status(project, spatial=None, targets=None):
+    """ Status
+
+    :param project: the project dictionary
+    :param spatial: the spatial dictionary (the in-memory nodes are stale if they are missing from it)
+    :param targets: the node names of interest (default: every node)
+    :return: collections.OrderedDict of whether each node is stale, in build order. A node is stale if it, or any of the
+    nodes it depends on, changed since it was built.
+    """
+    nodes = graph(project)
+    recorded = project.get('dependencies', {})
+    needed = required(nodes, targets or nodes.keys())
+    fingerprints = {}
+    stale = collections.OrderedDict()
+    for name, node in nodes.items():
+        fingerprints[name] = fingerprint(project, node, fingerprints)
+        if name in needed:
+            missing = spatial is not None and node.memory is not None and node.memory not in spatial
+            stale[name] = missing or recorded.get(name) != fingerprints[name] or \
+                any(stale.get(up, False) for up in node.upstream)
+    return stale
+
+
+def update(project, spatial=None, targets=DEFAULT_TARGETS, builders=None):
+    """ Update
+
+    Rebuilds the stale nodes needed for the targets, in order
+
+    :param project: the project dictionary
+    :param spatial: the spatial dictionary (updated), see pipeline.load_spatial()
+    :param targets: the node names to bring up to date (with the nodes they depend on)
+    :param builders: dict of functions(project, spatial) replacing the build of some nodes (e.g. the GUI runs Marxan
+    in a console window)
+    :return: list of the rebuilt node names
+    """
+    if spatial is None:
+        spatial = {}
+    nodes = graph(project)
+    needed = required(nodes, targets)
+    recorded = project.setdefault('dependencies', {})
+    fingerprints = {}
+    rebuilt = []
+    for name, node in nodes.items():
+        current = fingerprint(project, node, fingerprints)
+        missing = node.memory is not None and node.memory not in spatial
+        if name in needed and (missing or recorded.get(name) != current or
+                               any(up in rebuilt for up in node.upstream)):
+            print("Updating " + name)
+            with trace.span('update ' + name):
+                (builders or {}).get(name, node.build)(project, spatial)
+            rebuilt.append(name)
+            # the fingerprint after the build includes the files it wrote
+            current = fingerprint(project, node, fingerprints)
+            recorded[name] = current
+        fingerprints[name] = current
+    for name in list(recorded):
+        if name not in nodes:
+            del recorded[name]
+    return rebuilt
@@ -0,0 +1,142 @@
+"""
+Marxan conservation feature file export
+
+Builds the puvspr.dat rows for the discrete connectivity metrics directly from the metric arrays. Only the nonzero
+(species, pu, amount) rows are created, already sorted by planning unit then species, instead of melting a dense planning
+unit by feature table and filtering it afterwards. When appending to an original puvspr.dat, the new rows are merged
+into it in one sequential pass rather than loading and sorting the whole file.
+"""
+import os
+
+import numpy
+import pandas
+
+CHUNKSIZE = 100000
+
+
+def pu_sort_keys(pu):
+    """ Planning unit sort keys
+
+    :param pu: array of planning unit IDs
+    :return: numpy.array of the IDs as integers (sorted numerically) or, if they are not all integers, as strings
+    """
+    pu = numpy.asarray(pu)
+    try:
+        return pu.astype('int64')
+    except (ValueError, TypeError):
+        return pu.astype('str')
+
+
+def feature_triples(features, pu_ids, spec):
+    """ Conservation feature triples
+
+    Builds the puvspr.dat rows of the conservation features from their amount in each planning unit. Features which are
+    not listed in spec.dat and amounts which are not positive are left out.
+
+    :param features: dict of the feature name: array of the feature amount in each planning unit
+    :param pu_ids: array of the planning unit IDs, in the same order as the feature amounts
+    :param spec: spec.dat as a pandas.DataFrame with the 'id' and 'name' of each feature
+    :return: pandas.DataFrame with the species, pu and amount columns sorted by pu then species
+    """
+    species_ids = dict(zip(spec['name'], spec['id']))
+    pu_ids = numpy.asarray(pu_ids)
+    species, pu, amount = [numpy.empty(0, dtype='int64')], [numpy.empty(0, dtype='int64')], [numpy.empty(0)]
+    for name, values in features.items():
+        if name not in species_ids:
+            continue
+        values = numpy.asarray(values, dtype='float64')
+        if values.shape[0] != pu_ids.shape[0]:
+            raise ValueError("Feature '" + name + "' has " + str(values.shape[0]) + " values for " +
+                             str(pu_ids.shape[0]) + " planning units")
+        nonzero = numpy.flatnonzero(values > 0)
+        species.append(numpy.full(nonzero.shape[0], species_ids[name], dtype='int64'))
+        pu.append(nonzero)
+        amount.append(values[nonzero])
+
+    species = numpy.concatenate(species)
+    pu = numpy.concatenate(pu)
+    amount = numpy.concatenate(amount)
+    order = numpy.lexsort((species, pu_sort_keys(pu_ids)[pu]))
+    return pandas.DataFrame({'species': species[order], 'pu': pu_ids[pu[order]], 'amount': amount[order]})
+
+
+def write_puvspr(triples, filepath, chunksize=CHUNKSIZE):
+    """ Write puvspr.dat
+
+    :param triples: pandas.DataFrame with the species, pu and amount columns (see feature_triples())
+    :param filepath: the puvspr.dat filepath
+    :param chunksize: the number of rows written at a time
+    :return:
+    """
+    triples[['species', 'pu', 'amount']].to_csv(filepath, index=False, chunksize=chunksize)
+
+
+class NotSortedError(ValueError):
+    """ The original puvspr.dat is not sorted by planning unit (see append_puvspr()) """
+
+
+def read_delimiter(filepath):
+    """ Read delimiter
+
+    Marxan files are comma separated, or tab separated if the header has only one comma separated column (see
+    marxanconpy.read_csv_tsv)
+
+    :param filepath: Filepath for file in question
+    :return: str ',' or '\\t'
+    """
+    with open(filepath, 'r') as file:
+        header = file.readline()
+    if len(header.split(',')) < 2:
+        return '\t'
+    return ','
+
+
+def append_puvspr(orig_filepath, triples, filepath, chunksize=CHUNKSIZE):
+    """ Append to puvspr.dat
+
+    Merges the new conservation feature rows into an original puvspr.dat which is sorted by planning unit, reading the
+    original one chunk at a time so that memory use does not depend on its size. For each planning unit, the original
+    rows are written before the new rows (whose species IDs follow the original ones). The merged file is written next
+    to filepath and only replaces it once the merge is complete.
+
+    :param orig_filepath: the original puvspr.dat filepath
+    :param triples: the new rows, a pandas.DataFrame with the species, pu and amount columns sorted by pu (see
+    feature_triples())
+    :param filepath: the merged puvspr.dat filepath (can be the same as orig_filepath)
+    :param chunksize: the number of rows of the original file read at a time
+    :return:
+    :raises NotSortedError: if the original file is not sorted by planning unit
+    """
+    delimiter = read_delimiter(orig_filepath)
+    triples = triples[['species', 'pu', 'amount']].reset_index(drop=True)
+    new_keys = pu_sort_keys(triples['pu'])
+    temp_filepath = filepath + '.tmp'
+    position = 0
+    previous = None
+    try:
+        with open(temp_filepath, 'w', newline='') as file:
+            header = True
+            for chunk in pandas.read_csv(orig_filepath, sep=delimiter, chunksize=chunksize):
+                chunk = chunk[['species', 'pu', 'amount']]
+                keys = pu_sort_keys(chunk['pu'])
+                if keys.dtype.kind != new_keys.dtype.kind:
+                    raise NotSortedError("The planning unit IDs of " + orig_filepath +
+                                         " and the planning unit shapefile are not of the same type")
+                if (previous is not None and keys[0] < previous) or (keys[1:] < keys[:-1]).any():
+                    raise NotSortedError(orig_filepath + " is not sorted by planning unit")
+                previous = keys[-1]
+
+                # new rows with a planning unit before the end of this chunk, the new rows of the last planning unit
+                # wait for the next chunk since it can contain more original rows for that planning unit
+                end = numpy.searchsorted(new_keys, previous, side='left')
+                merged = pandas.concat([chunk, triples.iloc[position:end]], ignore_index=True)
+                order = numpy.argsort(numpy.concatenate([keys, new_keys[position:end]]), kind='stable')
+                merged.iloc[order].to_csv(file, index=False, header=header)
+                header = False
+                position = end
+            triples.iloc[position:].to_csv(file, index=False, header=header)
+    except:
+        if os.path.isfile(temp_filepath):
+            os.remove(temp_filepath)
+        raise
+    os.replace(temp_filepath, filepath)
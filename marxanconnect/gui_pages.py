@@ -0,0 +1,130 @@
+"""
+Split the wxFormBuilder frame into pages which can be built on demand
+
+wxFormBuilder generates one MarxanConnectGUI.__init__ which builds every notebook page. This script rewrites gui.py so
+that __init__ only creates the (empty) page panels, and each page's widgets and event bindings are created by its own
+build_<page>() method. gui.MarxanConnectGUI.build_pages() builds every page, so the generated class behaves as before;
+MarxanConnectGUI.py overrides it to build each page the first time its tab is selected.
+
+Run this after regenerating gui.py from MarxanConnect.fbp:
+
+    python -m marxanconnect.gui_pages gui.py
+"""
+import re
+import sys
+
+MARKER = "## Notebook pages are built on demand, see marxanconnect/gui_pages.py\n"
+
+PAGE_START = re.compile(r'^\t\tself\.(\w+) = wx\.Panel\( self\.auinotebook,')
+PAGE_END = re.compile(r'^\t\tself\.auinotebook\.AddPage\( self\.(\w+),')
+ASSIGNMENT = re.compile(r'^\t\tself\.(\w+) = ')
+BIND = re.compile(r'^\t\tself\.(\w+)\.Bind\(')
+
+
+def wrap(names, indent, width=110):
+    """ Wrap a list of names in a python tuple over several lines
+
+    :param names: list of str
+    :param indent: the indentation of the continuation lines
+    :param width: the maximum line length
+    :return: str
+    """
+    lines = []
+    line = ''
+    for name in names:
+        item = '"' + name + '", '
+        if len(line) + len(item) > width:
+            lines.append(line.rstrip())
+            line = ''
+        line += item
+    lines.append(line.rstrip())
+    return '( ' + ('\n' + indent).join(lines) + ' )'
+
+
+def split_pages(source, classname='MarxanConnectGUI'):
+    """ Split pages
+
+    :param source: The gui.py source generated by wxFormBuilder
+    :param classname: The frame containing the notebook
+    :return: str the rewritten source
+    """
+    if MARKER in source:
+        return source
+    lines = source.splitlines(keepends=True)
+    start = lines.index('class ' + classname + ' ( wx.Frame ):\n')
+    init = lines.index('\tdef __init__( self, parent ):\n', start)
+    end = next(i for i in range(init + 1, len(lines)) if lines[i].startswith('\tdef '))
+
+    pages = []
+    body = {}
+    widgets = {}
+    init_lines = []
+    page = None
+    for line in lines[init:end]:
+        if page is None:
+            match = PAGE_START.match(line)
+            init_lines.append(line)
+            if match:
+                page = match.group(1)
+                pages.append(page)
+                body[page] = []
+                widgets[page] = []
+            continue
+        match = PAGE_END.match(line)
+        if match and match.group(1) == page:
+            init_lines.append(line)
+            page = None
+            continue
+        body[page].append(line)
+        match = ASSIGNMENT.match(line)
+        if match:
+            widgets[page].append(match.group(1))
+
+    # move the event bindings of each page's widgets to the page builder
+    owner = {w: p for p in pages for w in widgets[p]}
+    binds = {p: [] for p in pages}
+    kept = []
+    for line in init_lines:
+        match = BIND.match(line)
+        if match and match.group(1) in owner:
+            binds[owner[match.group(1)]].append(line)
+        else:
+            kept.append(line)
+
+    # build the pages where the last page used to be added to the notebook
+    last = max(i for i, line in enumerate(kept) if PAGE_END.match(line))
+    kept.insert(last + 1, '\n\t\tself.build_pages()\n')
+
+    methods = ['\tdef build_pages( self ):\n',
+               '\t\tfor page in self.pages:\n',
+               '\t\t\tgetattr( self, "build_" + page )()\n',
+               '\n']
+    for p in pages:
+        methods.append('\tdef build_' + p + '( self ):\n')
+        methods.extend(body[p])
+        if binds[p]:
+            methods.append('\n\t\t# Connect Events\n')
+            methods.extend(binds[p])
+        methods.append('\n')
+
+    attributes = ['\tpages = ' + wrap(pages, '\t\t\t') + '\n', '\n', '\tpage_widgets = {\n']
+    for p in pages:
+        attributes.append('\t\t"' + p + '": ' + wrap(widgets[p], '\t\t\t') + ',\n')
+    attributes.extend(['\t}\n', '\n'])
+
+    header = lines[:start]
+    header.insert(header.index('## PLEASE DO *NOT* EDIT THIS FILE!\n') + 1, MARKER)
+    return ''.join(header + [lines[start], '\n'] + attributes + kept + methods + lines[end:])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    filename = argv[0] if argv else 'gui.py'
+    with open(filename, 'r', encoding="utf8") as file:
+        source = file.read()
+    with open(filename, 'w', encoding="utf8") as file:
+        file.write(split_pages(source))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""
+Landscape connectivity
+
+Generates the landscape "Edge List with Habitat" from a habitat type shapefile, as
+marxanconpy.spatial.habitatresistance2conmats(): planning units whose buffers intersect are joined by the line between
+their centroids if more than half of the line crosses habitat. The resistance of the line for each habitat type is the
+length of the line in each habitat it crosses (scaled to the length of the line) weighted by the resistance matrix
+("Least-Cost Path") or not ("Euclidean Distance"). The connectivity between two planning units for a habitat type is the
+inverse square of the least-cost path between them, divided by the largest total connectivity of a planning unit and
+weighted at each end by the proportion of the planning unit's habitat of that type.
+
+habitatresistance2conmats() tests every pair of planning units and intersects each line with every habitat type in
+Python. Here, the planning units within the buffer distance of each other are found with a spatial index, each line is
+only intersected with the habitat types it crosses, and the least-cost paths are found with Dijkstra's algorithm from a
+block of source planning units at a time on the sparse graph of neighbouring planning units. The habitat areas, lines
+and paths are computed in a pool of worker processes for large landscapes. The paths of a habitat type are collected in
+a temporary memory-mapped file next to the output (with the total connectivity of each planning unit), and the
+connectivity is then normalised and written to file one habitat type and block of planning units at a time, so the
+memory used does not grow with the square of the number of planning units.
+"""
+import multiprocessing
+import os
+
+import numpy
+import pandas
+
+from marxanconnect import trace
+from marxanconnect.export import CHUNKSIZE
+from marxanconnect.lazy import geopandas as gpd, igraph, marxanconpy, shapely
+
+# planning units (or pairs of planning units) per task, and the landscapes below which everything is computed in this
+# process
+TILE = 5000
+MIN_PARALLEL = 1000
+
+# the number of source planning units per task, and the most least-cost paths found per task
+SOURCES = 100
+BLOCK = 5000000
+
+LONGLAT = '+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs'
+
+# the temporary file of the least-cost paths, next to the output
+SUFFIX = '.paths.tmp.npy'
+
+
+# ##########################  inputs ####################################################################################
+
+def read_layers(pu_filepath, pu_id, hab_filepath, hab_id):
+    """ Read layers
+
+    :return: dict the planning units (sorted by ID) and habitat types (dissolved and sorted by type) in the equal-area
+    ('pu_area', 'hab_area') and equidistant ('pu_distance', 'hab_distance') projections of the planning units
+    """
+    pu = gpd.read_file(pu_filepath).to_crs(LONGLAT).sort_values(pu_id).reset_index(drop=True)
+    hab = gpd.read_file(hab_filepath).to_crs(LONGLAT).dissolve(by=hab_id).reset_index().sort_values(hab_id)
+    area_proj = marxanconpy.spatial.get_appropriate_projection(pu, 'area')
+    dist_proj = marxanconpy.spatial.get_appropriate_projection(pu, 'distance')
+    return {'pu_area': pu.to_crs(area_proj), 'pu_distance': pu.to_crs(dist_proj),
+            'hab_area': hab.to_crs(area_proj), 'hab_distance': hab.to_crs(dist_proj)}
+
+
+def read_resistance(res_mat_filepath, res_type, habtypes):
+    """ Read resistance
+
+    :param res_mat_filepath: the resistance matrix (habitat types by habitat types)
+    :param res_type: "Least-Cost Path" to weight the habitat types by the resistance matrix, otherwise the distance
+    :param habtypes: the habitat types
+    :return: numpy.array the resistance of each habitat type (rows) to crossing each habitat type (columns)
+    """
+    if res_type != "Least-Cost Path":
+        return numpy.ones((habtypes.shape[0], habtypes.shape[0]))
+    resistance = pandas.read_csv(res_mat_filepath, index_col=0).sort_index().values.astype('float64')
+    if resistance.shape != (habtypes.shape[0], habtypes.shape[0]):
+        raise ValueError("The resistance matrix has " + str(resistance.shape[0]) + " rows and " +
+                         str(resistance.shape[1]) + " columns, but there are " + str(habtypes.shape[0]) +
+                         " habitat types")
+    return resistance
+
+
+def neighbours(pu_geometry, buff):
+    """ Neighbours
+
+    :param pu_geometry: numpy.array of the planning unit polygons (in the equidistant projection)
+    :param buff: the buffer distance
+    :return: (numpy.array, numpy.array) the index of each pair of planning units whose buffers intersect (first < second)
+    """
+    # the resolution of geopandas.GeoSeries.buffer()
+    buffers = shapely.buffer(pu_geometry, buff, quad_segs=16)
+    first, second = shapely.STRtree(buffers).query(buffers, predicate='intersects')
+    keep = first < second
+    return first[keep], second[keep]
+
+
+# ##########################  workers ###################################################################################
+
+worker_centroids = None
+worker_hab_area = None
+worker_hab_distance = None
+worker_resistance = None
+worker_graph = None
+worker_weights = None
+
+
+def init_worker(centroids, hab_area, hab_distance, resistance):
+    global worker_centroids, worker_hab_area, worker_hab_distance, worker_resistance
+    worker_centroids = centroids
+    worker_hab_area = (hab_area, shapely.STRtree(hab_area))
+    worker_hab_distance = (hab_distance, shapely.STRtree(hab_distance))
+    worker_resistance = resistance
+
+
+def area_worker(task):
+    """
+    :param task: (int, numpy.array) the index of the first planning unit of the tile and the tile's geometry (in the
+    equal-area projection)
+    :return: (numpy.array, numpy.array, numpy.array) the planning unit and habitat type index and the area of each
+    overlap
+    """
+    start, pu_geometry = task
+    hab, tree = worker_hab_area
+    pu, habtype = tree.query(pu_geometry, predicate='intersects')
+    return pu + start, habtype, shapely.area(shapely.intersection(pu_geometry[pu], hab[habtype]))
+
+
+def line_worker(task):
+    """
+    :param task: (numpy.array, numpy.array) the index of the first and second planning unit of each pair
+    :return: (numpy.array, numpy.array, numpy.array) the index of the first and second planning unit of each pair joined
+    by habitat, and the resistance of each pair for each habitat type
+    """
+    first, second = task
+    hab, tree = worker_hab_distance
+    lines = shapely.linestrings(numpy.stack([worker_centroids[first], worker_centroids[second]], axis=1))
+    length = shapely.length(lines)
+    line, habtype = tree.query(lines, predicate='intersects')
+    crossed = numpy.zeros((lines.shape[0], hab.shape[0]))
+    crossed[line, habtype] = shapely.length(shapely.intersection(lines[line], hab[habtype]))
+    total = crossed.sum(1)
+    keep = total > length * 0.5
+    crossed = crossed[keep] / total[keep, None] * length[keep, None]
+    return first[keep], second[keep], crossed.dot(worker_resistance.T)
+
+
+def init_path_worker(n, first, second, weights):
+    global worker_graph, worker_weights
+    worker_graph = igraph.Graph(n=n, edges=list(zip(first.tolist(), second.tolist())))
+    worker_weights = weights
+
+
+def path_worker(task):
+    """
+    :param task: (int, int, int) the habitat type index, and the index of the first and last (excluded) source planning
+    unit
+    :return: (int, int, numpy.array) the habitat type index, the index of the first source planning unit, and the
+    inverse square of the least-cost path from each source planning unit to every planning unit (0 for the planning unit
+    itself or if there is no path)
+    """
+    habtype, start, stop = task
+    distance = numpy.array(worker_graph.distances(source=list(range(start, stop)),
+                                                  weights=worker_weights[:, habtype].tolist()))
+    with numpy.errstate(divide='ignore'):
+        inverse = 1 / (distance * distance)
+    inverse[numpy.isinf(inverse)] = 0
+    return habtype, start, inverse
+
+
+def start_pool(processes, n, initializer, initargs):
+    """ Start pool
+
+    :param processes: the number of worker processes (default: number of CPUs, 1 to work in this process)
+    :param n: the number of planning units
+    :return: multiprocessing.Pool, or None if the tasks are run in this process (initialized with initializer)
+    """
+    # worker processes (e.g. pipeline.run_batch()) cannot start their own pool
+    if processes == 1 or n < MIN_PARALLEL or multiprocessing.current_process().daemon:
+        initializer(*initargs)
+        return None
+    return multiprocessing.Pool(processes, initializer=initializer, initargs=initargs)
+
+
+def run(pool, function, tasks):
+    """
+    :return: iterator of the results of each task, in order
+    """
+    if pool is None:
+        return map(function, tasks)
+    return pool.imap(function, tasks)
+
+
+def open_matrix(filepath, n):
+    """ Open matrix
+
+    :param filepath: the temporary file
+    :param n: the number of planning units
+    :return: numpy.memmap of the n x n least-cost paths, or numpy.array if it cannot be written
+    """
+    try:
+        return numpy.lib.format.open_memmap(filepath, mode='w+', dtype='float64', shape=(n, n))
+    except OSError as error:
+        print("Warning: the least-cost paths could not be written to " + filepath + " (" + str(error) +
+              "), keeping them in memory")
+        return numpy.zeros((n, n))
+
+
+# ##########################  connectivity ##############################################################################
+
+@trace.traced()
+def write_habitat_connectivity(buff, hab_filepath, hab_id, res_mat_filepath, pu_filepath, pu_id, res_type, filepath,
+                               processes=None, chunksize=CHUNKSIZE):
+    """ Write habitat connectivity
+
+    Writes the landscape "Edge List with Habitat" (habitat, id1, id2 and value of every pair of planning units, for
+    each habitat type), as marxanconpy.spatial.habitatresistance2conmats()
+
+    :param buff: the buffer distance within which planning units are connected
+    :param hab_filepath: the habitat type shapefile
+    :param hab_id: the habitat type column
+    :param res_mat_filepath: the resistance matrix
+    :param pu_filepath: the planning unit shapefile
+    :param pu_id: the planning unit ID column
+    :param res_type: "Least-Cost Path" or "Euclidean Distance"
+    :param filepath: the planning unit "Edge List with Habitat"
+    :param processes: the number of worker processes (default: number of CPUs, 1 to work in this process)
+    :param chunksize: the number of rows written at a time
+    :return: int the number of habitat types written
+    """
+    layers = read_layers(pu_filepath, pu_id, hab_filepath, hab_id)
+    pu_ids = layers['pu_area'][pu_id].values
+    habtypes = layers['hab_area'][hab_id].values
+    n = pu_ids.shape[0]
+    resistance = read_resistance(res_mat_filepath, res_type, habtypes)
+    first, second = neighbours(numpy.asarray(layers['pu_distance'].geometry.values), buff)
+    trace.annotate(planning_units=n, habitat_types=habtypes.shape[0], neighbours=first.shape[0])
+
+    centroids = shapely.get_coordinates(shapely.centroid(numpy.asarray(layers['pu_distance'].geometry.values)))
+    pool = start_pool(processes, n, init_worker,
+                      (centroids, numpy.asarray(layers['hab_area'].geometry.values),
+                       numpy.asarray(layers['hab_distance'].geometry.values), resistance))
+    try:
+        # the proportion of each planning unit's habitat of each type
+        pu_geometry = numpy.asarray(layers['pu_area'].geometry.values)
+        area = numpy.zeros((n, habtypes.shape[0]))
+        for pu, habtype, overlap in run(pool, area_worker, [(start, pu_geometry[start:start + TILE])
+                                                            for start in range(0, n, TILE)]):
+            area[pu, habtype] = overlap
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            area = area / area.sum(1)[:, None]
+        area[numpy.isnan(area) | (area < 0.00001)] = 0
+
+        results = list(run(pool, line_worker, [(first[start:start + TILE], second[start:start + TILE])
+                                               for start in range(0, first.shape[0], TILE)]))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if results:
+        first, second, weights = (numpy.concatenate(parts) for parts in zip(*results))
+    else:
+        first, second, weights = first[:0], second[:0], numpy.zeros((0, habtypes.shape[0]))
+
+    if first.shape[0] == 0:
+        for habtype in habtypes:
+            print("Warning: Habitat '" + str(habtype) +
+                  "' has no connectivity between planning units, excluding from further analyses")
+        pandas.DataFrame(columns=['habitat', 'id1', 'id2', 'value']).to_csv(filepath, index=False)
+        return 0
+
+    rows = max(1, min(SOURCES, BLOCK // n))
+    tasks = [(h, start, min(start + rows, n)) for h in range(habtypes.shape[0]) for start in range(0, n, rows)]
+    matrix = open_matrix(filepath + SUFFIX, n)
+    try:
+        total = numpy.zeros(n)
+        pool = start_pool(processes, n, init_path_worker, (n, first, second, weights))
+        try:
+            for h, start, inverse in run(pool, path_worker, tasks):
+                stop = start + inverse.shape[0]
+                matrix[start:stop] = inverse
+                total[start:stop] = inverse.sum(1)
+                if stop == n:
+                    print("Writing habitat " + str(habtypes[h]))
+                    write_habitat(filepath, habtypes[h], pu_ids, matrix, total.max(), area[:, h], h == 0, chunksize)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    finally:
+        del matrix
+        if os.path.isfile(filepath + SUFFIX):
+            os.remove(filepath + SUFFIX)
+    return habtypes.shape[0]
+
+
+def write_habitat(filepath, habtype, pu_ids, matrix, largest, area, first, chunksize=CHUNKSIZE):
+    """ Write habitat
+
+    :param filepath: the planning unit "Edge List with Habitat"
+    :param habtype: the habitat type
+    :param pu_ids: the planning unit IDs
+    :param matrix: the inverse square of the least-cost path between each pair of planning units (e.g. numpy.memmap,
+    read a block of rows at a time)
+    :param largest: the largest total connectivity of a planning unit (the largest row sum of the matrix)
+    :param area: the proportion of each planning unit's habitat of this type
+    :param first: True to start the file, False to append to it
+    :param chunksize: the number of rows written at a time
+    :return:
+    """
+    n = pu_ids.shape[0]
+    rows = max(1, chunksize // n)
+    for start in range(0, n, rows):
+        block = numpy.array(matrix[start:start + rows])
+        if largest > 0:
+            block /= largest
+        block *= area[start:start + block.shape[0], None]
+        block *= area[None, :]
+        frame = pandas.DataFrame({'habitat': habtype,
+                                  'id1': numpy.repeat(pu_ids[start:start + block.shape[0]], n),
+                                  'id2': numpy.tile(pu_ids, block.shape[0]),
+                                  'value': block.reshape(-1)})
+        frame.to_csv(filepath, mode='w' if first and start == 0 else 'a', header=first and start == 0, index=False)
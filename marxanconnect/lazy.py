@@ -0,0 +1,93 @@
+"""
+Deferred imports
+
+cartopy, matplotlib, geopandas and marxanconpy (which imports geopandas and igraph) take several seconds to import and
+are not needed to show the main window. The proxies below import the real module the first time one of its attributes
+is used, so these costs are paid when a plot or spatial file is first needed rather than at start up.
+
+    from marxanconnect.lazy import geopandas as gpd
+    gpd.GeoDataFrame.from_file(filepath)  # geopandas is imported here
+"""
+import importlib
+import time
+import types
+
+from marxanconnect import startup
+
+
+class LazyModule(types.ModuleType):
+    """ Lazy Module
+
+    Proxy for a module that is imported on first attribute access. Setting an attribute sets it on the real module.
+
+    :param name: The full name of the module (e.g. 'matplotlib.pyplot')
+    :param before: An optional function called before the module is first imported
+    """
+
+    def __init__(self, name, before=None):
+        super().__init__(name)
+        object.__setattr__(self, '_lazy_before', before)
+        object.__setattr__(self, '_lazy_module', None)
+
+    def _load(self):
+        module = object.__getattribute__(self, '_lazy_module')
+        if module is None:
+            name = object.__getattribute__(self, '__name__')
+            start = time.perf_counter()
+            before = object.__getattribute__(self, '_lazy_before')
+            if before is not None:
+                before()
+            module = importlib.import_module(name)
+            object.__setattr__(self, '_lazy_module', module)
+            startup.record_import(name, time.perf_counter() - start)
+        return module
+
+    def __getattr__(self, attr):
+        module = self._load()
+        try:
+            return getattr(module, attr)
+        except AttributeError:
+            # submodules which are not imported by the package itself (e.g. cartopy.feature)
+            return importlib.import_module(module.__name__ + '.' + attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if object.__getattribute__(self, '_lazy_module') is None:
+            return "<lazy module '" + object.__getattribute__(self, '__name__') + "' (not loaded)>"
+        return repr(object.__getattribute__(self, '_lazy_module'))
+
+
+def is_loaded(module):
+    """ Is loaded
+
+    :param module: a LazyModule or a regular module
+    :return: logical False if the module is a LazyModule which has not been imported yet
+    """
+    if isinstance(module, LazyModule):
+        return object.__getattribute__(module, '_lazy_module') is not None
+    return True
+
+
+def use_wxagg():
+    """ Use the WXAgg backend
+
+    The backend must be selected before matplotlib.pyplot is imported
+    """
+    import matplotlib
+    if matplotlib.get_backend().lower() != 'wxagg':
+        matplotlib.use('WXAgg')
+
+
+matplotlib = LazyModule('matplotlib', before=use_wxagg)
+pyplot = LazyModule('matplotlib.pyplot', before=use_wxagg)
+backend_wxagg = LazyModule('matplotlib.backends.backend_wxagg', before=use_wxagg)
+cartopy = LazyModule('cartopy')
+geopandas = LazyModule('geopandas')
+shapely = LazyModule('shapely')
+igraph = LazyModule('igraph')
+marxanconpy = LazyModule('marxanconpy')
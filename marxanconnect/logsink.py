@@ -0,0 +1,126 @@
+"""
+Buffered log sink
+
+The debug console (LogForm in MarxanConnectGUI.py) receives everything written to stdout and stderr, including the
+progress output of marxanconpy and Marxan. Writing each message to the console as it arrives floods the GUI event queue
+with tiny updates, so writes are only appended to a buffer here, and the console drains the buffer on a timer. Each
+drain writes the whole batch to a rotating log file, collapses progress lines overwritten with carriage returns, and
+returns at most MAX_BATCH characters for display (the console keeps only the last HISTORY characters, the full log is in
+the file).
+
+The log file is ~/.marxanconnect/marxanconnect.log unless the MARXANCONNECT_LOG environment variable is set to a
+filename (or is empty, for no log file).
+"""
+import logging
+import logging.handlers
+import os
+import re
+import threading
+
+# milliseconds between drains, characters displayed per drain and characters kept in the console
+INTERVAL = 250
+MAX_BATCH = 100000
+HISTORY = 2000000
+
+# characters buffered before they are written to the log file without waiting for the next drain
+MAX_PENDING = 1000000
+
+# size of each log file and the number of old log files kept
+MAX_BYTES = 5 * 1024 ** 2
+BACKUPS = 3
+
+# everything on a line before the last carriage return (except the carriage return of \r\n)
+OVERWRITTEN = re.compile(r'[^\r\n]*\r(?!\n)')
+
+
+def default_filepath():
+    """
+    :return: str the log filepath, or None if there is no log file
+    """
+    filepath = os.environ.get('MARXANCONNECT_LOG')
+    if filepath is None:
+        filepath = os.path.join(os.path.expanduser('~'), '.marxanconnect', 'marxanconnect.log')
+    return filepath or None
+
+
+class LogSink(object):
+    """ Log sink
+
+    A file-like object for sys.stdout/sys.stderr which buffers writes until they are drained
+    """
+
+    def __init__(self, filepath=None):
+        """
+        :param filepath: the rotating log file, or None for no log file
+        """
+        # reentrant, as the log file handler reports its own errors to stderr (i.e. this sink)
+        self.lock = threading.RLock()
+        self.pending = []
+        self.size = 0
+        # text already written to the file but not displayed yet, and the number of characters dropped before it
+        self.tail = ''
+        self.skipped = 0
+        self.handler = None
+        self.filepath = filepath
+        if filepath:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+                self.handler = logging.handlers.RotatingFileHandler(filepath, maxBytes=MAX_BYTES,
+                                                                    backupCount=BACKUPS, encoding='utf-8', delay=True)
+                self.handler.terminator = ''
+            except OSError:
+                self.filepath = None
+
+    def write(self, string):
+        with self.lock:
+            self.pending.append(string)
+            self.size += len(string)
+            if self.size > MAX_PENDING:
+                # write the backlog to the file and keep only what will be displayed
+                text = self.tail + self.write_file()
+                self.skipped += max(0, len(text) - MAX_BATCH)
+                self.tail = text[-MAX_BATCH:]
+                self.pending = []
+                self.size = 0
+
+    def flush(self):
+        pass
+
+    def write_file(self):
+        """ Writes the pending text to the log file (with the lock held)
+
+        :return: str the pending text
+        """
+        text = ''.join(self.pending)
+        if self.handler is not None and text:
+            try:
+                self.handler.emit(logging.makeLogRecord({'msg': text}))
+            except Exception:
+                self.handler = None
+        return text
+
+    def drain(self):
+        """ Drain
+
+        :return: str the text written since the last drain, for display
+        """
+        with self.lock:
+            text = self.tail + self.write_file()
+            skipped = self.skipped
+            self.pending = []
+            self.size = 0
+            self.tail = ''
+            self.skipped = 0
+        if not text:
+            return ''
+        text = OVERWRITTEN.sub('', text)
+        skipped += max(0, len(text) - MAX_BATCH)
+        if skipped:
+            text = "[... " + str(skipped) + " characters not shown, see " + str(self.filepath) + " ...]\n" + \
+                   text[-MAX_BATCH:]
+        return text
+
+    def close(self):
+        self.drain()
+        if self.handler is not None:
+            self.handler.close()
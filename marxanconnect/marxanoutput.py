@@ -0,0 +1,302 @@
+"""
+Marxan output index
+
+Marxan writes its outputs to OUTPUTDIR as SCENNAME_<output>.csv or .txt, depending on the input.dat save options. The
+MarxanRunIndex parses input.dat and lists the output directory once, then reads each output file the first time it is
+needed and keeps it as typed arrays. The index checks the modification times of input.dat, the output directory and the
+output files, so a new Marxan run (or an edited input.dat) is picked up without reparsing anything that has not changed.
+
+With SAVERUN, Marxan also writes one text file per restart. The RestartStore packs them once into a memory-mapped bit
+array (restart x planning unit) so that analyses across restarts do not have to parse every file again.
+"""
+import json
+import os
+
+import numpy
+import pandas
+
+from marxanconnect.lazy import marxanconpy
+
+# Marxan output names used by the GUI and marxanconpy.manipulation.get_marxan_output(), and their file suffixes
+OUTPUT_SUFFIXES = {'Best Solution': 'best',
+                   'Selection Frequency': 'ssoln'}
+
+
+def mtime(path):
+    """
+    :param path: a file or directory
+    :return: float the modification time, or None if the path does not exist
+    """
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def read_parameters(input_file):
+    """ Read input.dat parameters
+
+    :param input_file: the Marxan input file
+    :return: dict of every 'NAME value' line (NUMREPS as an int), with OUTPUTDIR and INPUTDIR resolved relative to the
+    input file if necessary
+    """
+    parameters = {}
+    with open(input_file, 'r') as file:
+        for line in file:
+            name, _, value = line.rstrip('\n').partition(' ')
+            if name.isupper() and value:
+                parameters[name] = value
+    if 'NUMREPS' in parameters:
+        parameters['NUMREPS'] = int(parameters['NUMREPS'])
+    for name in ('INPUTDIR', 'OUTPUTDIR'):
+        if name in parameters and not os.path.isdir(parameters[name]):
+            parameters[name] = os.path.join(os.path.dirname(input_file), parameters[name])
+    return parameters
+
+
+class MarxanOutput:
+    """ One Marxan output file, read as the planning unit IDs (as str) and solution values """
+
+    def __init__(self, filepath, data):
+        self.filepath = filepath
+        self.mtime = mtime(filepath)
+        self.data = data
+        self.ids = None
+        self.values = None
+        for column in ('planning_unit', 'PUID'):
+            if column in data.columns:
+                try:
+                    data[column] = data[column].values.astype('int').astype('str')
+                except (ValueError, TypeError):
+                    data[column] = data[column].values.astype('str')
+        if data.shape[1] > 1 and data.columns[0] in ('planning_unit', 'PUID'):
+            self.ids = numpy.asarray(data.iloc[:, 0], dtype='str')
+            self.values = data.iloc[:, 1].values.astype('int64')
+
+
+class MarxanRunIndex:
+    """ Marxan run index
+
+    The parsed input.dat of a Marxan run, the map of its output files and the outputs read so far
+    """
+
+    def __init__(self, input_file):
+        self.input_file = input_file
+        self.input_mtime = mtime(input_file)
+        self.parameters = read_parameters(input_file)
+        self.SCENNAME = self.parameters['SCENNAME']
+        self.NUMREPS = self.parameters['NUMREPS']
+        self.OUTPUTDIR = self.parameters['OUTPUTDIR']
+        self.outputdir_mtime = None
+        self.files = {}
+        self.outputs = {}
+        self.scan()
+
+    def scan(self):
+        """ Lists the output files of the scenario (csv files are preferred over txt files, as in marxanconpy) """
+        self.outputdir_mtime = mtime(self.OUTPUTDIR)
+        self.files = {}
+        if self.outputdir_mtime is None:
+            return
+        prefix = self.SCENNAME + "_"
+        for filename in sorted(os.listdir(self.OUTPUTDIR), key=lambda f: f.endswith('.csv')):
+            root, ext = os.path.splitext(filename)
+            if root.startswith(prefix) and ext in ('.csv', '.txt'):
+                self.files[root[len(prefix):]] = os.path.join(self.OUTPUTDIR, filename)
+
+    def is_current(self):
+        """
+        :return: bool False if input.dat has changed since the index was built
+        """
+        return mtime(self.input_file) == self.input_mtime
+
+    def refresh(self):
+        """ Rescans the output directory if files were added or removed since it was last listed """
+        if mtime(self.OUTPUTDIR) != self.outputdir_mtime:
+            self.scan()
+
+    def suffix(self, output):
+        """
+        :param output: 'Best Solution', 'Selection Frequency', a restart 'rNNNNN' or another output suffix ('sum',
+        'mvbest', ...)
+        :return: str the output file suffix
+        """
+        return OUTPUT_SUFFIXES.get(output, output)
+
+    def filepath(self, output):
+        """
+        :param output: see suffix()
+        :return: str the output filepath, or None if Marxan has not written it
+        """
+        self.refresh()
+        return self.files.get(self.suffix(output))
+
+    def has_output(self):
+        """
+        :return: bool True if the best solution has been written
+        """
+        return self.filepath('Best Solution') is not None
+
+    def restarts(self):
+        """
+        :return: list of the restart outputs ('r00001' to NUMREPS)
+        """
+        return ["r" + "%05d" % t for t in range(1, self.NUMREPS + 1)]
+
+    def read(self, output):
+        """ Read output
+
+        Reads an output file the first time it is requested, or again if it has been modified since. The returned
+        output is shared, copy its data before modifying it.
+
+        :param output: see suffix()
+        :return: MarxanOutput
+        """
+        filepath = self.filepath(output)
+        if filepath is None:
+            raise FileNotFoundError(os.path.join(self.OUTPUTDIR, self.SCENNAME + "_" + self.suffix(output)) +
+                                    " not found")
+        cached = self.outputs.get(output)
+        if cached is None or cached.filepath != filepath or cached.mtime != mtime(filepath):
+            cached = MarxanOutput(filepath, marxanconpy.read_csv_tsv(filepath))
+            self.outputs[output] = cached
+        return cached
+
+    def solution(self, output):
+        """
+        :param output: 'Best Solution', 'Selection Frequency' or a restart 'rNNNNN'
+        :return: (numpy.array, numpy.array) the planning unit IDs and the solution (or selection frequency)
+        """
+        output = self.read(output)
+        return output.ids, output.values
+
+
+indexes = {}
+
+
+def run_index(input_file):
+    """ Run index
+
+    :param input_file: the Marxan input file
+    :return: MarxanRunIndex shared by every caller until input.dat is modified
+    """
+    index = indexes.get(input_file)
+    if index is None or not index.is_current():
+        index = MarxanRunIndex(input_file)
+        indexes[input_file] = index
+    return index
+
+
+class RestartStore:
+    """ Restart store
+
+    Every restart solution of a Marxan run packed into one memory-mapped bit array (restart x planning unit, 8
+    planning units per byte) in the SCENNAME_restarts directory of the output directory, alongside the planning unit
+    IDs and the summary table. Marxan's text files are only parsed once, when the store is built.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'store.json'), 'r') as file:
+            self.info = json.load(file)
+        self.NUMREPS = self.info['NUMREPS']
+        self.n_pu = self.info['n_pu']
+        self.ids = numpy.load(os.path.join(directory, 'pu.npy'))
+        self.solutions = numpy.load(os.path.join(directory, 'solutions.npy'), mmap_mode='r')
+        self.sum = pandas.read_csv(os.path.join(directory, 'sum.csv'))
+
+    def restart(self, restart):
+        """
+        :param restart: the restart number (1 to NUMREPS) or 'rNNNNN'
+        :return: numpy.array uint8 1 for the planning units selected in the restart
+        """
+        if isinstance(restart, str):
+            restart = int(restart[1:])
+        return numpy.unpackbits(self.solutions[restart - 1], count=self.n_pu)
+
+    def chunks(self, size=256):
+        """
+        :param size: the number of restarts per chunk
+        :return: generator of (first restart index, numpy.array uint8 restart x planning unit)
+        """
+        for start in range(0, self.NUMREPS, size):
+            yield start, numpy.unpackbits(self.solutions[start:start + size], axis=1, count=self.n_pu)
+
+    def selection_frequency(self):
+        """
+        :return: numpy.array the number of restarts in which each planning unit was selected
+        """
+        frequency = numpy.zeros(self.n_pu, dtype='int64')
+        for start, chunk in self.chunks():
+            frequency += chunk.sum(axis=0, dtype='int64')
+        return frequency
+
+
+def restart_sources(index):
+    """
+    :param index: MarxanRunIndex
+    :return: dict of the restart filepaths and their modification times
+    """
+    return {output: [index.filepath(output), mtime(index.filepath(output))] for output in index.restarts()}
+
+
+def pack_restarts(index, directory=None):
+    """ Pack restarts
+
+    Reads every restart output ('rNNNNN', written by Marxan when SAVERUN is set) and packs them into a RestartStore
+
+    :param index: MarxanRunIndex
+    :param directory: the store directory, SCENNAME_restarts in the output directory by default
+    :return: RestartStore
+    """
+    if directory is None:
+        directory = os.path.join(index.OUTPUTDIR, index.SCENNAME + "_restarts")
+    sources = restart_sources(index)
+    missing = [output for output, (filepath, time) in sources.items() if filepath is None]
+    if missing:
+        raise FileNotFoundError("Marxan restart outputs not found: " + ", ".join(missing[:5]) +
+                                (", ..." if len(missing) > 5 else "") + " (set SAVERUN in input.dat)")
+    os.makedirs(directory, exist_ok=True)
+
+    ids = None
+    solutions = None
+    for i, (output, (filepath, time)) in enumerate(sources.items()):
+        restart = MarxanOutput(filepath, marxanconpy.read_csv_tsv(filepath))
+        if ids is None:
+            ids = restart.ids
+            position = pandas.Index(ids)
+            solutions = numpy.lib.format.open_memmap(os.path.join(directory, 'solutions.npy'), mode='w+',
+                                                     dtype='uint8', shape=(len(sources), (ids.shape[0] + 7) // 8))
+        selected = restart.values == 1
+        if not numpy.array_equal(restart.ids, ids):
+            # the planning units are normally in the same order in every restart
+            order = position.get_indexer(restart.ids)
+            if (order < 0).any() or restart.ids.shape[0] != ids.shape[0]:
+                raise ValueError(filepath + " does not have the same planning units as " + sources['r00001'][0])
+            selected, aligned = numpy.zeros(ids.shape[0], dtype='bool'), selected
+            selected[order] = aligned
+        solutions[i] = numpy.packbits(selected)
+    solutions.flush()
+    del solutions
+
+    numpy.save(os.path.join(directory, 'pu.npy'), ids)
+    index.read('sum').data.to_csv(os.path.join(directory, 'sum.csv'), index=False)
+    with open(os.path.join(directory, 'store.json'), 'w') as file:
+        json.dump({'NUMREPS': len(sources), 'n_pu': int(ids.shape[0]), 'sources': sources}, file)
+    return RestartStore(directory)
+
+
+def restart_store(index, directory=None):
+    """ Restart store
+
+    :param index: MarxanRunIndex
+    :param directory: the store directory, SCENNAME_restarts in the output directory by default
+    :return: RestartStore, packed again if any restart output has changed since it was built
+    """
+    if directory is None:
+        directory = os.path.join(index.OUTPUTDIR, index.SCENNAME + "_restarts")
+    if os.path.isfile(os.path.join(directory, 'store.json')):
+        store = RestartStore(directory)
+        if store.info['sources'] == restart_sources(index):
+            return store
+    return pack_restarts(index, directory)
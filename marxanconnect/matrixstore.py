@@ -0,0 +1,324 @@
+"""
+Binary connectivity store
+
+The planning unit connectivity file (written by pipeline.rescale_demo() and pipeline.generate_land(), or supplied by the
+user) is a CSV file which can be several GB for large projects, and the boundary export, the post-hoc evaluation and
+the format check each read it again. The first time it is read, its connections are written once to a companion store,
+<file>.store next to the CSV file, which later reads memory-map instead of parsing the CSV again. The store is a
+directory of:
+
+* meta.json, the format, the CSV header, the number of connections and the size, modification time and SHA-1 checksum
+  of the CSV file the store was built from
+* ids.npy, the planning unit IDs (for a matrix, the column IDs) and, for a matrix, rows.npy, the row IDs
+* id1.bin, id2.bin (int32) and value.bin (float64), the source and destination of each connection (the index of its
+  planning unit in the IDs, or for a matrix, its row and column) and its value. Only the nonzero cells of a matrix are
+  kept. These are raw arrays so that they can be written a chunk at a time.
+* group.bin (int32) and groups.npy, for edge lists with a type, time or habitat column, the index of each connection's
+  value of that column in groups.npy
+
+A store is only used if the CSV file has the same size and either the same modification time or, when the file was
+copied or touched, the same checksum; otherwise it is rebuilt. If the store cannot be written (e.g. in a read-only
+directory), the CSV file is read as before.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy
+import pandas
+
+from marxanconnect import trace
+from marxanconnect.export import CHUNKSIZE
+
+VERSION = 1
+SUFFIX = '.store'
+
+# the column of each edge list format besides id1, id2 and value
+GROUPS = {"Edge List": None,
+          "Edge List with Type": 'type',
+          "Edge List with Time": 'time',
+          "Edge List with Habitat": 'habitat'}
+
+
+def store_path(filepath):
+    return filepath + SUFFIX
+
+
+def checksum(filepath, blocksize=2 ** 20):
+    """
+    :return: str the SHA-1 checksum of the file
+    """
+    sha1 = hashlib.sha1()
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(blocksize), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def read_meta(filepath):
+    """
+    :param filepath: the CSV filepath
+    :return: dict the meta data of the store of the file, or None if there is no store
+    """
+    try:
+        with open(os.path.join(store_path(filepath), 'meta.json')) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(directory, meta):
+    with open(os.path.join(directory, 'meta.json'), 'w') as file:
+        json.dump(meta, file)
+
+
+def is_current(filepath, meta):
+    """ Is current
+
+    :param filepath: the CSV filepath
+    :param meta: the meta data of its store
+    :return: bool True if the store was built from the CSV file as it is now. If only the modification time of the file
+    changed, the checksum is compared and the new modification time recorded.
+    """
+    if meta is None or meta.get('version') != VERSION:
+        return False
+    stat = os.stat(filepath)
+    source = meta['source']
+    if stat.st_size != source['size']:
+        return False
+    if stat.st_mtime_ns == source['mtime_ns']:
+        return True
+    if checksum(filepath) != source['sha1']:
+        return False
+    source['mtime_ns'] = stat.st_mtime_ns
+    try:
+        write_meta(store_path(filepath), meta)
+    except OSError:
+        pass
+    return True
+
+
+def current_meta(filepath):
+    """
+    :param filepath: the CSV filepath
+    :return: dict the meta data of the store of the file if it is current, otherwise None (the store is not built)
+    """
+    meta = read_meta(filepath)
+    try:
+        if os.path.isfile(filepath) and is_current(filepath, meta):
+            return meta
+    except (OSError, KeyError):
+        pass
+    return None
+
+
+def write_matrix(filepath, directory, chunksize):
+    """ Writes the nonzero cells of a connectivity matrix a block of rows at a time
+
+    :return: dict the meta data of the arrays
+    """
+    columns = None
+    rows = []
+    offset = 0
+    count = 0
+    with open(os.path.join(directory, 'id1.bin'), 'wb') as id1, \
+            open(os.path.join(directory, 'id2.bin'), 'wb') as id2, \
+            open(os.path.join(directory, 'value.bin'), 'wb') as value:
+        for chunk in pandas.read_csv(filepath, index_col=0, chunksize=chunksize):
+            if columns is None:
+                columns = numpy.asarray(chunk.columns.astype(str), dtype=str)
+            values = chunk.values.astype('float64')
+            r, c = numpy.nonzero(values)
+            (r + offset).astype('int32').tofile(id1)
+            c.astype('int32').tofile(id2)
+            values[r, c].tofile(value)
+            rows.append(numpy.asarray(chunk.index.astype(str), dtype=str))
+            offset += chunk.shape[0]
+            count += r.shape[0]
+    numpy.save(os.path.join(directory, 'ids.npy'), columns if columns is not None else numpy.array([], dtype=str))
+    numpy.save(os.path.join(directory, 'rows.npy'), numpy.concatenate(rows) if rows else numpy.array([], dtype=str))
+    return {'columns': None, 'connections': count}
+
+
+def write_edge_list(filepath, directory, format, columns, chunksize):
+    """ Writes an edge list a chunk of rows at a time
+
+    :return: dict the meta data of the arrays
+    """
+    group = GROUPS[format]
+    ids = pandas.Index([], dtype=object)
+    groups = pandas.Index([], dtype=object)
+    count = 0
+    dtype = {'id1': str, 'id2': str, 'value': 'float64'}
+    if group is not None:
+        dtype[group] = str
+    with open(os.path.join(directory, 'id1.bin'), 'wb') as id1, \
+            open(os.path.join(directory, 'id2.bin'), 'wb') as id2, \
+            open(os.path.join(directory, 'value.bin'), 'wb') as value, \
+            open(os.path.join(directory, 'group.bin'), 'wb') as group_codes:
+        for chunk in pandas.read_csv(filepath, dtype=dtype, chunksize=chunksize):
+            # look up only the IDs of the chunk in the IDs found so far
+            codes, chunk_ids = pandas.factorize(pandas.concat([chunk['id1'], chunk['id2']], ignore_index=True))
+            ids = ids.append(pandas.Index(chunk_ids[~chunk_ids.isin(ids)], dtype=object))
+            codes = ids.get_indexer(chunk_ids).astype('int32')[codes]
+            codes[:chunk.shape[0]].tofile(id1)
+            codes[chunk.shape[0]:].tofile(id2)
+            chunk['value'].values.astype('float64').tofile(value)
+            if group is not None:
+                group_codes_chunk, chunk_groups = pandas.factorize(chunk[group])
+                groups = groups.append(pandas.Index(chunk_groups[~chunk_groups.isin(groups)], dtype=object))
+                groups.get_indexer(chunk_groups).astype('int32')[group_codes_chunk].tofile(group_codes)
+            count += chunk.shape[0]
+    if ids.shape[0] > numpy.iinfo('int32').max:
+        raise ValueError("too many planning units")
+    numpy.save(os.path.join(directory, 'ids.npy'), numpy.asarray(ids, dtype=str))
+    if group is not None:
+        # numeric types, times and habitats are kept as numbers, as when the CSV file is read
+        numeric = pandas.to_numeric(pandas.Series(groups, dtype=object), errors='coerce')
+        values = numeric.values if not numeric.isna().any() else numpy.asarray(groups, dtype=str)
+        numpy.save(os.path.join(directory, 'groups.npy'), values)
+    return {'columns': columns, 'connections': count}
+
+
+@trace.traced(name='build_matrix_store', inputs=())
+def build(filepath, format, chunksize=CHUNKSIZE):
+    """ Build the store of a connectivity file
+
+    :param filepath: the CSV filepath
+    :param format: The format of the connectivity file (i.e. "Matrix", "Edge List", "Edge List with Type", "Edge List
+    with Time", "Edge List with Habitat")
+    :param chunksize: the number of rows read at a time
+    :return: Store, or None if the file does not have the columns of an edge list of this format
+    """
+    columns = None
+    if format != "Matrix":
+        columns = list(pandas.read_csv(filepath, nrows=0).columns)
+        group = GROUPS[format]
+        if sorted(columns) != sorted(['id1', 'id2', 'value'] + ([group] if group is not None else [])):
+            return None
+
+    stat = os.stat(filepath)
+    source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': checksum(filepath)}
+    directory = store_path(filepath)
+    temporary = directory + '.tmp'
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+    try:
+        if format == "Matrix":
+            meta = write_matrix(filepath, temporary, chunksize)
+        else:
+            meta = write_edge_list(filepath, temporary, format, columns, chunksize)
+        meta.update({'version': VERSION, 'format': format, 'source': source})
+        write_meta(temporary, meta)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(temporary, directory)
+    finally:
+        shutil.rmtree(temporary, ignore_errors=True)
+    return Store(filepath)
+
+
+def load(filepath, format):
+    """ Load
+
+    :param filepath: the CSV filepath
+    :param format: The format of the connectivity file
+    :return: Store of the connectivity file (built if there is no current store), or None if the file cannot be stored
+    in this format
+    """
+    if format != "Matrix" and format not in GROUPS or not os.path.isfile(filepath):
+        return None
+    meta = current_meta(filepath)
+    if meta is not None and meta['format'] == format:
+        try:
+            return Store(filepath)
+        except (OSError, ValueError, KeyError):
+            pass
+    try:
+        return build(filepath, format)
+    except (OSError, ValueError) as error:
+        print("Warning: the binary store of " + filepath + " could not be written (" + str(error) +
+              "), reading the CSV file instead")
+        return None
+
+
+class Store:
+    """ Store
+
+    The memory-mapped arrays of the store of a connectivity file (see build())
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.directory = store_path(filepath)
+        self.meta = read_meta(filepath)
+        if self.meta is None:
+            raise ValueError("No store for " + filepath)
+        self.format = self.meta['format']
+        self.ids = numpy.load(os.path.join(self.directory, 'ids.npy'), mmap_mode='r')
+        self.id1 = self.array('id1.bin', 'int32')
+        self.id2 = self.array('id2.bin', 'int32')
+        self.value = self.array('value.bin', 'float64')
+        self.rows = None
+        self.group = None
+        self.groups = None
+        if self.format == "Matrix":
+            self.rows = numpy.load(os.path.join(self.directory, 'rows.npy'), mmap_mode='r')
+        elif GROUPS[self.format] is not None:
+            self.group = self.array('group.bin', 'int32')
+            self.groups = numpy.load(os.path.join(self.directory, 'groups.npy'), allow_pickle=False)
+
+    def array(self, filename, dtype):
+        """
+        :return: numpy.memmap of one of the connection arrays
+        """
+        filepath = os.path.join(self.directory, filename)
+        count = self.meta['connections']
+        if os.path.getsize(filepath) != count * numpy.dtype(dtype).itemsize:
+            raise ValueError(filepath + " is incomplete")
+        if count == 0:
+            return numpy.empty(0, dtype=dtype)
+        return numpy.memmap(filepath, dtype=dtype, mode='r', shape=(count,))
+
+    def edges(self):
+        """ Edges
+
+        The nonzero connections, as boundary.read_edges(). Edge lists with several values per connection (one per time,
+        type or habitat) are averaged.
+
+        :return: (numpy.array, numpy.array, numpy.array, numpy.array) the planning unit IDs (as str), the index of the
+        source and destination planning unit of each connection in the IDs, and the connectivity values
+        """
+        ids = numpy.asarray(self.ids)
+        if self.format == "Matrix":
+            id1 = pandas.Index(ids).get_indexer(numpy.asarray(self.rows))[self.id1]
+            if (id1 < 0).any():
+                raise ValueError(self.filepath + " does not have the same planning units in its rows and columns")
+            return ids, id1, numpy.asarray(self.id2), numpy.asarray(self.value)
+
+        id1, id2, value = numpy.asarray(self.id1), numpy.asarray(self.id2), numpy.asarray(self.value)
+        if self.format != "Edge List":
+            pairs = pandas.Series(value).groupby(id1.astype('int64') * ids.shape[0] + id2, sort=False).mean()
+            id1, id2 = pairs.index.values // ids.shape[0], pairs.index.values % ids.shape[0]
+            value = pairs.values
+        keep = value != 0
+        return ids, id1[keep], id2[keep], value[keep]
+
+    def frame(self):
+        """ Frame
+
+        :return: pandas.DataFrame of the connectivity data, as posthoc.read_connectivity() reads the CSV file
+        """
+        if self.format == "Matrix":
+            matrix = numpy.zeros((self.rows.shape[0], self.ids.shape[0]))
+            matrix[self.id1, self.id2] = self.value
+            return pandas.DataFrame(matrix, index=numpy.asarray(self.rows), columns=numpy.asarray(self.ids))
+
+        ids = numpy.asarray(self.ids)
+        columns = {'id1': ids[self.id1], 'id2': ids[self.id2], 'value': numpy.asarray(self.value)}
+        if self.group is not None:
+            columns[GROUPS[self.format]] = self.groups[self.group]
+        frame = pandas.DataFrame({column: columns[column] for column in self.meta['columns']})
+        if self.format == "Edge List with Time":
+            frame = frame[['id1', 'id2', 'value']].groupby(['id1', 'id2']).mean().reset_index()
+        return frame
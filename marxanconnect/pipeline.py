@@ -0,0 +1,1331 @@
+"""
+Headless Marxan Connect pipeline
+
+Every step of the Marxan Connect workflow (rescaling, metrics, Marxan file export, input.dat generation, running Marxan
+and post-hoc evaluation) driven only from the project dictionary, so that projects can be processed without the wx
+frame. The GUI reads its widgets into the project dictionary and then calls these functions.
+
+Usage from the command line::
+
+    python -m marxanconnect.pipeline project1.MarCon project2.MarCon --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import traceback
+
+import numpy
+import pandas
+
+from marxanconnect import MCPATH, adjacency, boundary, dependencies, export, landscape, marxanoutput, matrixstore, \
+    posthoc, rescale, similarity, surface, trace
+from marxanconnect.lazy import geopandas as gpd, marxanconpy
+
+LONGLAT = '+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs'
+
+STAGES = ('update', 'rescale', 'metrics', 'export', 'inputdat', 'marxan', 'posthoc', 'posthoc_batch', 'posthoc_sweep',
+          'restart_similarity')
+DEFAULT_STAGES = ('rescale', 'metrics', 'export', 'inputdat')
+
+# selection frequency percentages evaluated by the batch post-hoc evaluation
+POSTHOC_PERCENTAGES = tuple(range(10, 100, 10))
+
+
+# ##########################  headless helpers #########################################################################
+
+def print_warning(message, caption="Warning!"):
+    """ Print Warning
+
+    Headless replacement for marxanconpy.warn_dialog, prints the warning instead of creating a wx.MessageBox
+
+    :param message: A string containing the contents of the warning
+    :param caption: The heading caption
+    :return:
+    """
+    print(caption + " " + message)
+
+
+def set_headless():
+    """ Set Headless
+
+    Redirects all marxanconpy warning dialogs to the console so that the pipeline can run without a display
+
+    :return:
+    """
+    marxanconpy.warn_dialog = print_warning
+
+
+def read_version(rootpath=MCPATH):
+    """ Read Version
+
+    :param rootpath: The Marxan Connect directory containing the VERSION file
+    :return: str
+    """
+    with open(os.path.join(rootpath, 'VERSION')) as version_file:
+        return version_file.read().strip()
+
+
+# ##########################  project managment functions ##############################################################
+
+def absolute_filepaths(project, workingdirectory):
+    """ Absolute filepaths
+
+    Same as marxanconpy.marcon.edit_working_directory(type='absolute'), but resolves the relative paths against the
+    working directory instead of the current directory, and converts Windows separators on any non-Windows system.
+
+    :param project: the project dictionary
+    :param workingdirectory: the directory containing the project file
+    :return: dict
+    """
+    for p in project['filepaths']:
+        if p != "working_directory" and project['filepaths'][p].startswith('.'):
+            path = project['filepaths'][p]
+            if os.sep == '/':
+                path = path.replace('\\', '/')
+            project['filepaths'][p] = os.path.normpath(os.path.join(workingdirectory, path))
+    return project
+
+
+def load_project(projfile, rootpath=MCPATH):
+    """ Load Project
+
+    Loads and validates a .MarCon file, and makes all the filepaths absolute
+
+    :param projfile: the .MarCon project file
+    :param rootpath: The Marxan Connect directory
+    :return: dict
+    """
+    projfile = os.path.abspath(projfile)
+    project = marxanconpy.marcon.load_project(projfile)
+    project.setdefault('version', {})
+    marxanconpy.marcon.validate_project(project)
+    version = read_version(rootpath)
+    if 'MarxanConnect' in project.get('version', {}):
+        if project['version']['MarxanConnect'] != version:
+            print("Warning: This project file was created with a different version of Marxan Connect. Attempting to "
+                  "update for compatibility")
+            project['version']['MarxanConnect'] = version
+    else:
+        print("Warning: This project file was created with a different version of Marxan Connect. Attempting to "
+              "update for compatibility")
+        project['version'] = {}
+        project['version']['marxanconpy'] = marxanconpy.__version__
+        project['version']['MarxanConnect'] = version
+    project = absolute_filepaths(project, os.path.dirname(projfile))
+    project['filepaths']['projfile'] = projfile
+    project['filepaths']['projfilename'] = os.path.basename(projfile)
+    return project
+
+
+def save_project(project, projfile=False):
+    """ Save Project
+
+    Saves the project dictionary to a .MarCon file with paths relative to the project file. Post-hoc results that
+    cannot be written to JSON (e.g. the cluster GeoDataFrame) are not saved.
+
+    :param project: the project dictionary
+    :param projfile: the (optional) filename for the project file to override the projfile entry given in the project
+    dictionary.
+    :return:
+    """
+    if projfile == False:
+        projfile = project['filepaths']['projfile']
+    saved = dict(project)
+    saved['filepaths'] = dict(project['filepaths'])
+    saved = marxanconpy.marcon.edit_working_directory(saved, os.path.dirname(projfile), "relative")
+    if isinstance(saved.get('postHoc'), dict):
+        saved['postHoc'] = {k: v for k, v in saved['postHoc'].items() if isinstance(v, str)}
+    marxanconpy.marcon.save_project(project=saved, projfile=projfile)
+
+
+# ##########################  spatial input functions ##################################################################
+
+@trace.traced()
+def load_pu_shp(project):
+    """ Load planning unit shapefile
+
+    Loads the planning unit shapefile and transforms it to an appropriate equal-area projection
+
+    :param project: the project dictionary
+    :return: (geopandas.GeoDataFrame, str) the planning units and the proj4 string of the projection
+    """
+    pu_shp = gpd.GeoDataFrame.from_file(project['filepaths']['pu_filepath']).to_crs(LONGLAT)
+    pu_proj = marxanconpy.spatial.get_appropriate_projection(pu_shp, 'area')
+    trace.annotate(planning_units=pu_shp.shape[0])
+    return pu_shp.to_crs(pu_proj), pu_proj
+
+
+def dissolve_area(filepath, proj):
+    """ Dissolve area
+
+    Loads a focus/avoidance area shapefile and dissolves it to a single polygon
+
+    :param filepath: the focus/avoidance area shapefile
+    :param proj: the proj4 string of the planning unit projection
+    :return: geopandas.GeoDataFrame
+    """
+    area = gpd.GeoDataFrame.from_file(filepath).to_crs(proj)
+    area['diss'] = 1
+    return area.dissolve(by='diss')
+
+
+def load_spatial(project):
+    """ Load spatial input
+
+    Loads the planning units and flags those which intersect the focus and avoidance areas ('fa_included' and
+    'aa_included' columns)
+
+    :param project: the project dictionary
+    :return: dict
+    """
+    spatial = {}
+    if os.path.isfile(project['filepaths']['pu_filepath']):
+        spatial['pu_shp'], spatial['pu_proj'] = load_pu_shp(project)
+        for area in ['fa', 'aa']:
+            include_area(spatial, area, project['filepaths'][area + '_filepath'])
+    return spatial
+
+
+@trace.traced()
+def include_area(spatial, area, filepath):
+    """ Include area
+
+    Flags the planning units which intersect the focus ('fa') or avoidance ('aa') area in the '<area>_included' column
+
+    :param spatial: the spatial dictionary containing 'pu_shp' and 'pu_proj'
+    :param area: 'fa' or 'aa'
+    :param filepath: the focus/avoidance area shapefile
+    :return:
+    """
+    if os.path.isfile(filepath) and 'pu_shp' in spatial:
+        spatial[area + '_shp'] = dissolve_area(filepath, spatial['pu_proj'])
+        spatial['pu_shp'][area + '_included'] = spatial['pu_shp'].geometry.intersects(
+            spatial[area + '_shp'].geometry.iloc[0]).values
+
+
+def read_pu_ids(project, spatial=None):
+    """ Read planning unit IDs
+
+    :param project: the project dictionary
+    :param spatial: the spatial dictionary from load_spatial(), the planning units are only read from the shapefile
+    (without their geometry) if it does not contain 'pu_shp'
+    :return: pandas.Series of planning unit IDs as strings
+    """
+    if spatial is not None and 'pu_shp' in spatial:
+        pu = spatial['pu_shp'][project['filepaths']['pu_file_pu_id']]
+    else:
+        pu = gpd.read_file(project['filepaths']['pu_filepath'],
+                           ignore_geometry=True)[project['filepaths']['pu_file_pu_id']]
+    try:
+        return pu.astype('int').astype('str')
+    except:
+        return pu.astype('str')
+
+
+@trace.traced()
+def lock_pudat(project, spatial):
+    """ Lock pu.dat
+
+    Sets the status of the planning units in the original pu.dat according to the focus/avoidance area status options
+    and the 'lockin'/'lockout' discrete metrics. The resulting status is stored in project['connectivityMetrics'].
+
+    :param project: the project dictionary
+    :param spatial: the spatial dictionary from load_spatial()
+    :return: pandas.DataFrame or None if the original pu.dat does not exist
+    """
+    pudat_filepath = project['filepaths']['orig_pudat_filepath']
+    if not os.path.isfile(pudat_filepath):
+        return None
+    pudat = marxanconpy.read_csv_tsv(pudat_filepath)
+    for area in ['fa', 'aa']:
+        if os.path.isfile(project['filepaths'][area + '_filepath']) and 'pu_shp' in spatial:
+            if area + '_included' in spatial['pu_shp']:
+                included = numpy.array(spatial['pu_shp'][area + '_included'], dtype=bool)
+                if project['options'][area + '_status'] == "Locked out":
+                    pudat.loc[included, 'status'] = 3
+                if project['options'][area + '_status'] == "Locked in":
+                    pudat.loc[included, 'status'] = 2
+
+    if 'connectivityMetrics' in project:
+        for type in ['spec_demo_pu', 'spec_land_pu']:
+            for metric, values in project['connectivityMetrics'].get(type, {}).items():
+                if metric.endswith('lockout'):
+                    pudat.loc[numpy.array(values) != 0, 'status'] = 3
+                if metric.endswith('lockin'):
+                    pudat.loc[numpy.array(values) != 0, 'status'] = 2
+        project['connectivityMetrics']['status'] = pudat['status'].tolist()
+    return pudat
+
+
+# ########################## rescaling and matrix generation ###########################################################
+
+def check_matrix_list_format(format, filepath):
+    """ Check matrix or list format
+
+    Warns if the connectivity file does not have the columns expected for the given format
+
+    :param format: The format of the connectivity file (i.e. "Matrix", "Edge List", "Edge List with Type", "Edge List with Time")
+    :param filepath: filename of the connectivity data
+    :return: str The warning message or None if the format is as expected
+    """
+    # the header of a file which has a binary store is recorded in the store
+    meta = matrixstore.current_meta(filepath)
+    if format == "Matrix":
+        if meta is None or meta['format'] != "Matrix":
+            pandas.read_csv(filepath, index_col=0, nrows=1)
+        return None
+    if format == "Edge List":
+        expected = numpy.array(['id1', 'id2', 'value'])
+    elif format == "Edge List with Type":
+        expected = numpy.array(['type', 'id1', 'id2', 'value'])
+    elif format == "Edge List with Time":
+        expected = numpy.array(['time', 'id1', 'id2', 'value'])
+    if meta is not None and meta['columns'] is not None:
+        columns = pandas.Index(meta['columns'])
+    else:
+        columns = pandas.read_csv(filepath, nrows=0).columns
+    message = "See the Glossary for 'Data Formats' under 'Connectivity'."
+    warn = False
+    if not len(columns) == len(expected):
+        message = message + " The " + format + " Data Format expects exactly " + str(len(expected)) + \
+                  " columns, not " + str(len(columns)) + " in the file."
+        warn = True
+
+    missing = [c not in columns for c in expected]
+    if any(missing):
+        message = message + " The " + format + " Data Format expects column header(s) '" + \
+                  str(expected[missing]) + "' which may be missing in the file."
+        warn = True
+    if warn:
+        marxanconpy.warn_dialog(message=message)
+        return message
+    return None
+
+
+@trace.traced()
+def rescale_demo(project):
+    """ Rescale demographic connectivity
+
+    Rescales the demographic connectivity matrix to match the scale of the planning units (see rescale.py) and writes it
+    (and its binary store, see matrixstore.py) to 'demo_pu_cm_filepath'. "Edge List with Time" is written one time step
+    at a time (see rescale.write_time_steps()), and the temporal mean is written to '*_mean_of_times.csv'.
+
+    :param project: the project dictionary
+    :return:
+    """
+    check_matrix_list_format(format=project['options']['demo_conmat_format'],
+                             filepath=project['filepaths']['demo_cu_cm_filepath'])
+    if 'connectivityMetrics' not in project:
+        project['connectivityMetrics'] = {}
+
+    if project['options']['demo_conmat_format'] == "Edge List with Time":
+        rescale.write_time_steps(
+            project['filepaths']['pu_filepath'],
+            project['filepaths']['pu_file_pu_id'],
+            project['filepaths']['demo_cu_filepath'],
+            project['filepaths']['demo_cu_file_pu_id'],
+            project['filepaths']['demo_cu_cm_filepath'],
+            edge=project['options']['demo_conmat_rescale_edge'],
+            filepath=project['filepaths']['demo_pu_cm_filepath'],
+            mean_filepath=str.replace(project['filepaths']['demo_pu_cm_filepath'], '.csv', '_mean_of_times.csv'))
+    else:
+        demo_pu_conmat = rescale.rescale_matrix(
+            project['filepaths']['pu_filepath'],
+            project['filepaths']['pu_file_pu_id'],
+            project['filepaths']['demo_cu_filepath'],
+            project['filepaths']['demo_cu_file_pu_id'],
+            project['filepaths']['demo_cu_cm_filepath'],
+            matrixformat=project['options']['demo_conmat_format'],
+            edge=project['options']['demo_conmat_rescale_edge'])
+        demo_pu_conmat.rename_axis(None).to_csv(project['filepaths']['demo_pu_cm_filepath'],
+                                                index=True, header=True, sep=",")
+    matrixstore.load(project['filepaths']['demo_pu_cm_filepath'], project['options']['demo_conmat_format'])
+
+
+@trace.traced()
+def generate_land(project):
+    """ Generate landscape connectivity
+
+    Generates the landscape "Edge List with Habitat" from the habitat shapefile and resistance matrix (see landscape.py)
+    or from the resistance surface (see surface.py) and writes it (and its binary store, see matrixstore.py) to
+    'land_pu_cm_filepath'
+
+    :param project: the project dictionary
+    :return:
+    """
+    if project['options']['land_conmat_type'] == "Resistance Surface":
+        surface.write_surface_connectivity(
+            res_filepath=project['filepaths']['land_res_filepath'],
+            res_id=project['filepaths']['land_res_file_hab_id'],
+            pu_filepath=project['filepaths']['pu_filepath'],
+            pu_id=project['filepaths']['pu_file_pu_id'],
+            filepath=project['filepaths']['land_pu_cm_filepath'],
+            cellsize=project['options'].get('land_res_cellsize'))
+        matrixstore.load(project['filepaths']['land_pu_cm_filepath'], "Edge List with Habitat")
+        return
+    landscape.write_habitat_connectivity(
+        buff=float(project['options']['land_hab_buff']),
+        hab_filepath=project['filepaths']['land_cu_filepath'],
+        hab_id=project['filepaths']['land_cu_file_hab_id'],
+        res_mat_filepath=project['filepaths']['land_res_mat_filepath'],
+        pu_filepath=project['filepaths']['pu_filepath'],
+        pu_id=project['filepaths']['pu_file_pu_id'],
+        res_type=project['options']['land_res_matrixType'],
+        filepath=project['filepaths']['land_pu_cm_filepath'])
+    matrixstore.load(project['filepaths']['land_pu_cm_filepath'], "Edge List with Habitat")
+
+
+def has_land_inputs(project):
+    """
+    :param project: the project dictionary
+    :return: logical True if the landscape connectivity is generated (see generate_land()) and its input file exists
+    """
+    if project['options']['land_conmat_type'] == "Habitat Type + Isolation":
+        return os.path.isfile(project['filepaths']['land_cu_filepath'])
+    if project['options']['land_conmat_type'] == "Resistance Surface":
+        return os.path.isfile(project['filepaths']['land_res_filepath'])
+    return False
+
+
+# ##########################  metric related functions ################################################################
+
+@trace.traced()
+def calc_metrics(project, progressbar=False):
+    """ Calculate connectivity metrics
+
+    Calculates the metrics selected in project['options'] and creates the initial spec.dat
+
+    :param project: the project dictionary
+    :param progressbar: Logical. True if you want to see a progressbar (requires a wx.App)
+    :return:
+    """
+    print("Calculating Metrics")
+    if not any(project['options']['land_metrics'].values()) and not any(
+            project['options']['demo_metrics'].values()):
+        marxanconpy.warn_dialog(message="No metrics selected")
+        raise Exception("No metrics selected")
+
+    if not project['options']['calc_metrics_pu'] and not project['options']['calc_metrics_cu']:
+        marxanconpy.warn_dialog(message="No 'Units' selected for metric calculations.")
+        raise Exception("No 'Units' selected for metric calculations.")
+
+    trace.annotate(metrics=[type + "_" + metric for type in ['demo', 'land']
+                            for metric, selected in project['options'][type + '_metrics'].items() if selected])
+    marxanconpy.manipulation.calc_metrics(project=project,
+                                          progressbar=progressbar,
+                                          calc_metrics_pu=project['options']['calc_metrics_pu'],
+                                          calc_metrics_cu=project['options']['calc_metrics_cu'])
+
+    project['options']['metricsCalculated'] = True
+    project['spec_dat'] = new_spec(project).to_json(orient='split')
+
+
+def merge_metrics(metrics, new):
+    """ Merge metrics
+
+    :param metrics: the connectivity metrics dictionary of an earlier calculation (updated)
+    :param new: the connectivity metrics dictionary of a calculation of some of the metrics
+    :return: dict metrics
+    """
+    for key, value in new.items():
+        if isinstance(value, dict) and isinstance(metrics.get(key), dict):
+            merge_metrics(metrics[key], value)
+        else:
+            metrics[key] = value
+    return metrics
+
+
+def calc_selected_metrics(project, metrics, progressbar=False):
+    """ Calculate selected connectivity metrics
+
+    Calculates only the given metrics and merges them with the metrics calculated before (calc_metrics() replaces all
+    the metrics)
+
+    :param project: the project dictionary
+    :param metrics: list of the ('demo' or 'land', metric option) pairs to calculate
+    :param progressbar: Logical. True if you want to see a progressbar (requires a wx.App)
+    :return:
+    """
+    previous = project.get('connectivityMetrics', {})
+    options = {type: dict(project['options'][type + '_metrics']) for type in ('demo', 'land')}
+    try:
+        for type in options:
+            project['options'][type + '_metrics'] = {m: (type, m) in metrics for m in options[type]}
+        calc_metrics(project, progressbar)
+    finally:
+        for type in options:
+            project['options'][type + '_metrics'] = options[type]
+    project['connectivityMetrics'] = merge_metrics(previous, project['connectivityMetrics'])
+    project['spec_dat'] = new_spec(project).to_json(orient='split')
+
+
+def prune_metrics(project):
+    """ Prune metrics
+
+    Removes the metrics (and the discrete metrics made from them) which are no longer selected in project['options']
+
+    :param project: the project dictionary
+    :return: list of the removed metric names
+    """
+    removed = []
+    for key, metrics in project.get('connectivityMetrics', {}).items():
+        if not key.startswith('spec_') or not isinstance(metrics, dict):
+            continue
+        type = key[len('spec_'):]
+        options = project['options'][type.split('_')[0] + '_metrics']
+        for name in list(metrics):
+            for metric, selected in options.items():
+                if not selected and name.startswith(metric + '_' + type):
+                    del metrics[name]
+                    removed.append(name)
+                    break
+    return removed
+
+
+def discrete_threshold(values, threshold):
+    """ Discrete threshold
+
+    :param values: the metric values
+    :param threshold: the threshold as named in discrete metrics ('minimum', 'lower_quartile', 'median',
+    'upper_quartile', 'maximum', '<n>th_percentile' or a value)
+    :return: float
+    """
+    quartiles = {'minimum': 0, 'lower_quartile': 25, 'median': 50, 'upper_quartile': 75, 'maximum': 100}
+    if threshold in quartiles:
+        return numpy.percentile(values, quartiles[threshold])
+    if threshold.endswith('th_percentile'):
+        return numpy.percentile(values, float(threshold[:-len('th_percentile')]))
+    return float(threshold)
+
+
+def rediscretize(project):
+    """ Rediscretize
+
+    Recalculates the discrete metrics (e.g. 'google_demo_pu_discrete_median_to_maximum') from the current values of the
+    metrics they were made from, using the thresholds in their names
+
+    :param project: the project dictionary
+    :return: list of the recalculated discrete metric names
+    """
+    updated = []
+    for key, metrics in project.get('connectivityMetrics', {}).items():
+        if not key.startswith('spec_') or not isinstance(metrics, dict):
+            continue
+        for name in list(metrics):
+            if '_discrete_' not in name:
+                continue
+            metric, rule = name.split('_discrete_', 1)
+            for status in ('_lockout', '_lockin'):
+                if rule.endswith(status):
+                    rule = rule[:-len(status)]
+            thresholds = rule.split('_to_')
+            if metric not in metrics or len(thresholds) != 2:
+                continue
+            values = numpy.array(metrics[metric])
+            try:
+                low, high = [discrete_threshold(values, t) for t in thresholds]
+            except ValueError:
+                continue
+            metrics[name] = ((values >= low) & (values <= high)).astype(int).tolist()
+            updated.append(name)
+    return updated
+
+
+def pu_metric_types(project):
+    """ Planning unit metric types
+
+    :param project: the project dictionary
+    :return: list of the planning unit metric types ('demo_pu' and/or 'land_pu') with connectivity data
+    """
+    all_types = []
+    if os.path.isfile(project['filepaths']['demo_pu_cm_filepath']):
+        all_types += ['demo_pu']
+    if os.path.isfile(project['filepaths']['land_pu_cm_filepath']):
+        all_types += ['land_pu']
+    return all_types
+
+
+def discrete_metrics(project):
+    """ Discrete metrics
+
+    :param project: the project dictionary
+    :return: list of the names of the discrete planning unit metrics (i.e. the connectivity conservation features)
+    """
+    metrics = []
+    if 'connectivityMetrics' in project:
+        for type in pu_metric_types(project):
+            if 'spec_' + type in project['connectivityMetrics']:
+                metrics += [m for m in project['connectivityMetrics']['spec_' + type] if 'discrete' in m]
+    return metrics
+
+
+def new_spec(project):
+    """ New spec.dat
+
+    Creates the spec.dat for the discrete connectivity metrics from the targets/proportions in project['options'].
+    Targets are repeated (or truncated) to match the number of discrete metrics.
+
+    :param project: the project dictionary
+    :return: pandas.DataFrame
+    """
+    metrics = discrete_metrics(project)
+    if project['options']['spec_set'] == "Target":
+        target = "target"
+    else:
+        target = "prop"
+    targets = numpy.resize(project['options']['targets'].split(','), len(metrics))
+    spec = pandas.DataFrame({"id": numpy.arange(1, len(metrics) + 1),
+                             target: [float(t) for t in targets],
+                             "spf": 1000,
+                             "name": metrics})
+    return spec[["id", target, "spf", "name"]]
+
+
+# ##########################  export functions ########################################################################
+
+@trace.traced()
+def export_cf_files(project, spatial=None):
+    """ Export conservation feature files
+
+    Exports (or appends to the original) spec.dat and puvspr.dat for the discrete connectivity metrics. Only the
+    nonzero amounts are written to puvspr.dat, sorted by planning unit then species.
+
+    :param project: the project dictionary
+    :param spatial: the spatial dictionary from load_spatial() (optional, avoids reading the planning units again)
+    :return: logical True if the files were exported
+    """
+    cf = {}
+    for type in ['spec_demo_pu', 'spec_land_pu']:
+        if type in project['connectivityMetrics']:
+            for k in project['connectivityMetrics'][type]:
+                if 'discrete' in k:
+                    cf[k] = project['connectivityMetrics'][type][k]
+
+    if len(cf) == 0:
+        marxanconpy.warn_dialog(message="No conservation features associated with planning units were calculated.")
+        return False
+
+    spec = pandas.read_json(project['spec_dat'], orient='split')
+    pu_ids = read_pu_ids(project, spatial)
+
+    # Export or append feature files
+    if project['options']['cf_export'] == "Export":
+        # export spec
+        spec.to_csv(project['filepaths']['spec_filepath'], index=0)
+        # export conservation features
+        export.write_puvspr(export.feature_triples(cf, pu_ids, spec), project['filepaths']['cf_filepath'])
+
+    elif project['options']['cf_export'] == "Append":
+        for orig in ['orig_spec_filepath', 'orig_cf_filepath']:
+            if not os.path.isfile(project['filepaths'][orig]):
+                marxanconpy.warn_dialog("Warning! File: " + project['filepaths'][orig] + " does not exist.")
+                return False
+        old_spec = marxanconpy.read_csv_tsv(project['filepaths']['orig_spec_filepath'])
+
+        # append spec
+        new_spec = spec.copy()
+        new_spec['id'] = new_spec['id'] + max(old_spec['id'])
+        pandas.concat([old_spec, new_spec], sort=False).fillna(0.0).to_csv(
+            project['filepaths']['spec_filepath'], index=0)
+        # append conservation features, merging them into the original puvspr.dat if it is sorted by planning unit
+        new_cf = export.feature_triples(cf, pu_ids, new_spec)
+        try:
+            export.append_puvspr(project['filepaths']['orig_cf_filepath'], new_cf, project['filepaths']['cf_filepath'])
+        except export.NotSortedError as e:
+            print("Warning: " + str(e) + ", sorting the appended puvspr.dat in memory instead")
+            old_cf = marxanconpy.read_csv_tsv(project['filepaths']['orig_cf_filepath'])
+            try:
+                old_cf['pu'] = old_cf['pu'].astype('int').astype('str')
+            except:
+                old_cf['pu'] = old_cf['pu'].astype('str')
+            pandas.concat([old_cf, new_cf], sort=False).sort_values(['pu', 'species']).to_csv(
+                project['filepaths']['cf_filepath'], index=0)
+    return True
+
+
+def connectivity_boundary_source(project, key):
+    """ Connectivity boundary source
+
+    :param project: the project dictionary
+    :param key: the boundary definition ('conn_boundary_demo_pu', 'min_plan_graph_land_pu', ...)
+    :return: (str, str) the planning unit connectivity filename and format of a connectivity boundary definition, or
+    ("notarealfilename", None) for other boundary definitions
+    """
+    if key in ('conn_boundary_demo_pu', 'min_plan_graph_demo_pu'):
+        return postHoc_connectivity(project, "Demographic Data")
+    elif key in ('conn_boundary_land_pu', 'min_plan_graph_land_pu'):
+        return postHoc_connectivity(project, "Landscape Data")
+    return "notarealfilename", None
+
+
+def boundary_definitions(project):
+    """ Boundary definitions
+
+    :param project: the project dictionary
+    :return: list of the boundary definitions to export, those calculated with the metrics, the selected minimum
+    planar graphs (which are built from the connectivity files when they are exported) and the shared edge lengths of
+    the planning units if the 'bd_shared_edge' option is selected
+    """
+    definitions = list(project.get('connectivityMetrics', {}).get('boundary', {}).keys())
+    for type in ('demo', 'land'):
+        if project['options'][type + '_metrics'].get('min_plan_graph', False) and \
+                os.path.isfile(project['filepaths'][type + '_pu_cm_filepath']):
+            definitions.append('min_plan_graph_' + type + '_pu')
+    if project['options'].get('bd_shared_edge', False) and os.path.isfile(project['filepaths']['pu_filepath']):
+        definitions.append('shared_edge_pu')
+    return definitions
+
+
+@trace.traced()
+def export_boundary_file(project, BD_filepath):
+    """ Export boundary file
+
+    Exports each boundary definition calculated with the metrics, the selected minimum planar graphs and the shared
+    edge lengths. When multiple definitions were calculated, the type is appended to the file name. The connectivity boundaries are
+    written straight from the planning unit connectivity file, as symmetric or asymmetric connections to match the
+    'inputdat_boundary' option (see boundary.py).
+
+    :param project: the project dictionary
+    :param BD_filepath: the boundary.dat filepath
+    :return:
+    """
+    definitions = boundary_definitions(project)
+    multiple = len(definitions) > 1
+
+    for k in definitions:
+        # Export each selected boundary definition
+        if multiple:
+            filepath = str.replace(BD_filepath, ".dat", "_" + k + ".dat")
+        else:
+            filepath = BD_filepath
+        filename, format = connectivity_boundary_source(project, k)
+        if k == 'shared_edge_pu':
+            shared = boundary.shared_edge_boundary(read_pu_ids(project),
+                                                   adjacency.pu_adjacency(project['filepaths']['pu_filepath']))
+            shared.to_csv(filepath, index=False)
+        elif k.startswith('min_plan_graph_'):
+            boundary.write_connectivity_boundary(filename, format, filepath,
+                                                 symmetric=project['options']['inputdat_boundary'] != 'Asymmetric',
+                                                 pu_ids=read_pu_ids(project),
+                                                 planar=adjacency.pu_adjacency(project['filepaths']['pu_filepath']))
+        elif os.path.isfile(filename):
+            boundary.write_connectivity_boundary(filename, format, filepath,
+                                                 symmetric=project['options']['inputdat_boundary'] != 'Asymmetric')
+        else:
+            pandas.read_json(project['connectivityMetrics']['boundary'][k], orient='split').to_csv(filepath,
+                                                                                                    index=False)
+
+    # warn when multiple boundary definitions
+    if multiple:
+        marxanconpy.warn_dialog(message="Multiple Boundary Definitions were selected. Boundary file names have been"
+                                        " edited to include type.", caption="Warning!")
+
+
+def export_bd_file(project):
+    """ Export boundary.dat if selected in project['options']
+
+    :param project: the project dictionary
+    :return:
+    """
+    if project['options']['bd_filecheck']:
+        export_boundary_file(project, BD_filepath=project['filepaths']['bd_filepath'])
+
+
+@trace.traced()
+def export_pudat(project, spatial):
+    """ Export pu.dat if selected in project['options']
+
+    :param project: the project dictionary
+    :param spatial: the spatial dictionary from load_spatial()
+    :return:
+    """
+    if project['options']['pudat_filecheck']:
+        pudat = lock_pudat(project, spatial)
+        if pudat is None:
+            marxanconpy.warn_dialog("Warning! File: " +
+                                    project['filepaths']['orig_pudat_filepath'] +
+                                    " does not exist.")
+        else:
+            pudat.to_csv(project['filepaths']['pudat_filepath'], index=0)
+
+
+# ########################## marxan functions ##########################################################################
+
+@trace.traced()
+def generate_inputdat(project, rootpath=MCPATH):
+    """ Generate input.dat
+
+    Generates the Marxan input file from the template
+
+    :param project: the project dictionary
+    :param rootpath: The Marxan Connect directory containing the default template
+    :return:
+    """
+    if project['filepaths']['marxan_template_input'] == 'Default':
+        template = os.path.join(rootpath, 'Marxan243', 'input_template.dat')
+    else:
+        template = project['filepaths']['marxan_template_input']
+    with open(template, 'r', encoding="utf8") as file:
+        filedata = file.readlines()
+
+    if project['options']['inputdat_boundary'] == 'Asymmetric':
+        if not 'ASYMMETRICCONNECTIVITY  1\n' in filedata:
+            filedata.insert([index for index, line in enumerate(filedata) if line.startswith('NUMREPS')][0] + 1,
+                            'ASYMMETRICCONNECTIVITY  1\n')
+    else:
+        if 'ASYMMETRICCONNECTIVITY  1\n' in filedata:
+            filedata.remove('ASYMMETRICCONNECTIVITY  1\n')
+
+    def relative(new, key):
+        if project['options'][new] == 'New':
+            return os.path.relpath(project['filepaths'][key], inputdir)
+        return os.path.relpath(project['filepaths']['orig_' + key], inputdir)
+
+    # Replace the target string
+    inputdat = []
+    for line in filedata:
+        if line.startswith("INPUTDIR"):
+            inputdir = os.path.join(os.path.dirname(project['filepaths']['marxan_input']),
+                                    line.replace('INPUTDIR ', '').replace('\n', ''))
+        if line.startswith("NUMREPS"):
+            line = 'NUMREPS ' + project['options']['NUMREPS'] + '\n'
+        if line.startswith("SCENNAME"):
+            line = 'SCENNAME ' + project['options']['SCENNAME'] + '\n'
+        if line.startswith("NUMITNS"):
+            line = 'NUMITNS ' + project['options']['NUMITNS'] + '\n'
+        if line.startswith("BLM"):
+            line = 'BLM ' + project['options']['CSM'] + '\n'
+        if line.startswith("PUVSPRNAME"):
+            line = 'PUVSPRNAME ' + relative('marxan_CF', 'cf_filepath') + '\n'
+        if line.startswith("SPECNAME"):
+            line = 'SPECNAME ' + relative('marxan_CF', 'spec_filepath') + '\n'
+        if line.startswith("PUNAME"):
+            line = 'PUNAME ' + relative('marxan_PU', 'pudat_filepath') + '\n'
+        if line.startswith("BOUNDNAME"):
+            if project['options']['marxan_bound'] in ('New', 'Original'):
+                line = 'BOUNDNAME ' + relative('marxan_bound', 'bd_filepath') + '\n'
+            else:
+                line = '\n'
+        inputdat.append(line)
+
+    with open(project['filepaths']['marxan_input'], 'w', encoding="utf8") as file:
+        file.writelines(inputdat)
+
+
+def check_inputdat(project):
+    """ Check input.dat
+
+    Warns if the Marxan input file has an invalid input or output directory
+
+    :param project: the project dictionary
+    :return:
+    """
+    with open(project['filepaths']['marxan_input'], 'r', encoding="utf8") as file:
+        filedata = file.readlines()
+
+    for line in filedata:
+        for key in ("INPUTDIR", "OUTPUTDIR"):
+            if line.startswith(key):
+                inputdir = line.replace(key + " ", "").strip('\n')
+                inputdatdir = os.path.join(os.path.dirname(project['filepaths']['marxan_input']), inputdir)
+                if not os.path.isdir(inputdir) and not os.path.isdir(inputdatdir):
+                    marxanconpy.warn_dialog(message="Warning: Marxan Input File has an invalid input directory " + line)
+
+
+def marxan_executable(project, system=None):
+    """ Marxan executable
+
+    :param project: the project dictionary
+    :param system: the operating system (defaults to platform.system())
+    :return: str the Marxan executable filename in the 'Marxan243' directory
+    """
+    system = system or platform.system()
+    bit = "64" if project['options']['marxan_bit'] == "64-bit" else "32"
+    if system == 'Windows':
+        marxan_exec = 'Marxan' if project['options']['marxan'] == "Marxan" else 'MarZone'
+        return marxan_exec + ('_x64.exe' if bit == "64" else '.exe')
+    elif system == 'Darwin':
+        return 'MarOpt_v243_Mac' + bit
+    return 'MarOpt_v243_Linux' + bit
+
+
+@trace.traced()
+def run_marxan(project, rootpath=MCPATH):
+    """ Run Marxan
+
+    Runs Marxan on the project's input file without a console window and loads the output
+
+    :param project: the project dictionary
+    :param rootpath: The Marxan Connect directory containing the 'Marxan243' directory
+    :return:
+    """
+    check_inputdat(project)
+    inputpath = os.path.dirname(project['filepaths']['marxan_input'])
+    marxan_exec = os.path.join(rootpath, 'Marxan243', marxan_executable(project))
+    # Marxan waits for 'return' before exiting
+    subprocess.run([marxan_exec, os.path.relpath(project['filepaths']['marxan_input'], inputpath)],
+                   input=b'\n', cwd=inputpath, check=True)
+    load_marxan_output(project)
+
+
+@trace.traced()
+def load_marxan_output(project):
+    """ Load Marxan output
+
+    Loads the selection frequency and best solution into project['connectivityMetrics'] and, if Marxan saved each
+    restart (SAVERUN), packs the restarts into the run's marxanoutput.RestartStore
+
+    :param project: the project dictionary
+    :return:
+    """
+    if not ('connectivityMetrics' in project):
+        project['connectivityMetrics'] = {}
+
+    index = run_index(project)
+    project['connectivityMetrics']['select_freq'] = index.solution('Selection Frequency')[1].tolist()
+    project['connectivityMetrics']['best_solution'] = index.solution('Best Solution')[1].tolist()
+    if int(index.parameters.get('SAVERUN', 0)) > 0:
+        marxanoutput.restart_store(index)
+
+
+def run_index(project):
+    """ Run index
+
+    :param project: the project dictionary
+    :return: marxanoutput.MarxanRunIndex of the project's input file, shared until the input file is modified
+    """
+    return marxanoutput.run_index(project['filepaths']['marxan_input'])
+
+
+def read_inputdat_parameters(input_file):
+    """ Read input.dat parameters
+
+    :param input_file: the Marxan input file
+    :return: dict with 'SCENNAME', 'NUMREPS' and 'OUTPUTDIR' (resolved relative to the input file if necessary)
+    """
+    return marxanoutput.run_index(input_file).parameters
+
+
+# ########################## postHoc functions #########################################################################
+
+def postHoc_categories(project):
+    """ Post-hoc categories
+
+    :param project: the project dictionary
+    :return: list of the connectivity data categories available for post-hoc evaluation
+    """
+    choices = []
+    if os.path.isfile(project['filepaths']['land_pu_cm_filepath']):
+        choices.append("Landscape Data")
+    if os.path.isfile(project['filepaths']['demo_pu_cm_filepath']):
+        choices.append("Demographic Data")
+    return choices
+
+
+def postHoc_connectivity(project, category):
+    """ Post-hoc connectivity
+
+    :param project: the project dictionary
+    :param category: "Landscape Data" or "Demographic Data"
+    :return: (str, str) the connectivity filename and format
+    """
+    if category == "Landscape Data":
+        return project['filepaths']['land_pu_cm_filepath'], "Edge List with Habitat"
+    elif category == "Demographic Data":
+        return project['filepaths']['demo_pu_cm_filepath'], project['options']['demo_conmat_format']
+    return "notarealfilename", None
+
+
+def get_solution(project, output, percentage=None, custom_file=None):
+    """ Get solution
+
+    :param project: the project dictionary
+    :param output: the Marxan output to evaluate ('Best Solution', 'Selection Frequency' or a restart 'rNNNNN')
+    :param percentage: for 'Selection Frequency', the percentage of restarts above which a planning unit is selected
+    :param custom_file: an optional custom solution file which overrides the Marxan output
+    :return: pandas.DataFrame with the planning unit IDs in the first column and the solution in the second column
+    """
+    if custom_file:
+        return marxanconpy.read_csv_tsv(custom_file)
+    index = run_index(project)
+    solution = index.read(output).data.copy()
+    if output == "Selection Frequency":
+        solution.iloc[:, 1] = (solution.iloc[:, 1] > (index.NUMREPS / 100 * percentage)).astype(int)
+    return solution
+
+
+def read_sum_file(project):
+    """ Read the Marxan summary ('_sum') file
+
+    :param project: the project dictionary
+    :return: pandas.DataFrame with one row per run
+    """
+    return run_index(project).read('sum').data
+
+
+def read_sum_data(project, output=None, file=None):
+    """ Read a run from the Marxan summary ('_sum') file
+
+    :param project: the project dictionary
+    :param output: a restart 'rNNNNN' to read that run, otherwise the best run is read
+    :param file: the summary file if it has already been read (see read_sum_file())
+    :return: pandas.Series
+    """
+    if file is None:
+        file = read_sum_file(project)
+    if output is not None and output.startswith('r') and output[1:].isdigit():
+        run = file[file.iloc[:, 0] == int(output[1:])]
+        if run.shape[0] > 0:
+            return run.iloc[0]
+    return file.loc[file["Score"].idxmin()]
+
+
+def postHoc_context(project, category):
+    """ Post-hoc context
+
+    :param project: the project dictionary
+    :param category: "Landscape Data" or "Demographic Data"
+    :return: posthoc.PostHocContext with the planning units and connectivity data of the category (the distance matrix
+    between clusters is only calculated for clusters closer than the optional 'postHoc_max_distance' option)
+    """
+    pu = gpd.GeoDataFrame.from_file(project['filepaths']['pu_filepath']).to_crs(LONGLAT)
+    filename, format = postHoc_connectivity(project, category)
+    return posthoc.PostHocContext(pu, filename, format, max_distance=project['options'].get('postHoc_max_distance'))
+
+
+@trace.traced()
+def calc_postHoc(project, category, output='Best Solution', percentage=None, custom_file=None, context=None):
+    """ Calculate post-hoc evaluation
+
+    Evaluates a Marxan solution against the connectivity data and stores the results in project["postHoc"]
+
+    :param project: the project dictionary
+    :param category: "Landscape Data" or "Demographic Data"
+    :param output: the Marxan output to evaluate ('Best Solution', 'Selection Frequency' or a restart 'rNNNNN')
+    :param percentage: for 'Selection Frequency', the percentage of restarts above which a planning unit is selected
+    :param custom_file: an optional custom solution file which overrides the Marxan output
+    :param context: an optional posthoc.PostHocContext from postHoc_context() to reuse between evaluations
+    :return: pandas.DataFrame post-hoc summary
+    """
+    if context is None:
+        context = postHoc_context(project, category)
+    solution = get_solution(project, output, percentage, custom_file)
+    IDs = solution.iloc[:, 0].values
+    selectionIDs = solution[(solution.iloc[:, 1].astype("str") == "1").values].iloc[:, 0].values
+
+    project["postHoc"] = context.evaluate(IDs, selectionIDs, read_sum_data(project, None if custom_file else output))
+    postHoc = project["postHoc"]["summary"]
+    project["postHoc"]["summary"] = postHoc.to_json(orient='split')
+    return postHoc
+
+
+@trace.traced()
+def calc_postHoc_categories(project):
+    """ Calculate post-hoc evaluation of every category
+
+    Evaluates the best solution against the connectivity data of each category (see postHoc_categories()) and exports
+    the summaries, with a Category column, to project['filepaths']['posthoc']. project["postHoc"] holds the results of
+    the last category
+
+    :param project: the project dictionary
+    :return: pandas.DataFrame with the Category column followed by the summary columns
+    """
+    summaries = []
+    for category in postHoc_categories(project):
+        summary = calc_postHoc(project, category)
+        summary.insert(0, "Category", category)
+        summaries.append(summary)
+    if not summaries:
+        return pandas.DataFrame()
+    summaries = pandas.concat(summaries, ignore_index=True, sort=False)
+    summaries.to_csv(project['filepaths']['posthoc'], index=0)
+    return summaries
+
+
+def postHoc_restarts(project):
+    """ Post-hoc restarts
+
+    :param project: the project dictionary
+    :return: list of the Marxan restart outputs ('r00001' to NUMREPS)
+    """
+    return run_index(project).restarts()
+
+
+def postHoc_solutions(project, outputs, percentages=POSTHOC_PERCENTAGES):
+    """ Post-hoc solutions
+
+    Reads the Marxan outputs to evaluate, with the selection frequencies thresholded at each percentage. The summary
+    and selection frequency files are only read once, and the restarts are read from the run's
+    marxanoutput.RestartStore.
+
+    :param project: the project dictionary
+    :param outputs: the Marxan outputs ('Best Solution', 'Selection Frequency' or restarts 'rNNNNN')
+    :param percentages: for 'Selection Frequency', the percentages of restarts above which a planning unit is selected
+    :return: list of (output, percentage, IDs, selectionIDs, sum_data) tuples
+    """
+    index = run_index(project)
+    sum_file = read_sum_file(project)
+    restarts = set(index.restarts())
+    store = None
+    if any(output in restarts for output in outputs):
+        store = marxanoutput.restart_store(index)
+    solutions = []
+    for output in outputs:
+        if output in restarts:
+            IDs = store.ids
+            solutions.append((output, None, IDs, IDs[store.restart(output) == 1],
+                              read_sum_data(project, output, file=sum_file)))
+            continue
+        IDs, values = index.solution(output)
+        if output == "Selection Frequency":
+            for percentage in percentages:
+                solutions.append((output, percentage, IDs, IDs[values > (index.NUMREPS / 100 * percentage)],
+                                  read_sum_data(project, file=sum_file)))
+        else:
+            solutions.append((output, None, IDs, IDs[values == 1], read_sum_data(project, output, file=sum_file)))
+    return solutions
+
+
+def postHoc_batch_filepath(project, suffix="_batch"):
+    """
+    :param project: the project dictionary
+    :param suffix: "_batch" for calc_postHoc_batch(), "_sweep" for calc_postHoc_sweep() or "_similarity" for
+    calc_restart_similarity()
+    :return: str the filepath of the batch post-hoc table, next to the post-hoc file
+    """
+    root, ext = os.path.splitext(project['filepaths']['posthoc'])
+    return root + suffix + (ext or ".csv")
+
+
+@trace.traced()
+def calc_postHoc_batch(project, category, outputs=None, percentages=POSTHOC_PERCENTAGES, processes=None,
+                       context=None):
+    """ Calculate batch post-hoc evaluation
+
+    Evaluates every Marxan restart (and the selection frequency at each percentage) against the connectivity data in one
+    pass and exports the long-format results to postHoc_batch_filepath()
+
+    :param project: the project dictionary
+    :param category: "Landscape Data" or "Demographic Data"
+    :param outputs: the Marxan outputs to evaluate (default: the best solution, the selection frequency and every
+    restart)
+    :param percentages: for 'Selection Frequency', the percentages of restarts above which a planning unit is selected
+    :param processes: the number of worker processes (default: number of CPUs)
+    :param context: an optional posthoc.PostHocContext from postHoc_context()
+    :return: pandas.DataFrame the long-format post-hoc summary
+    """
+    if outputs is None:
+        outputs = ['Best Solution', 'Selection Frequency'] + postHoc_restarts(project)
+    if context is None:
+        context = postHoc_context(project, category)
+    batch = posthoc.evaluate_batch(context, postHoc_solutions(project, outputs, percentages), processes)
+    batch.insert(0, "Category", category)
+    batch.to_csv(postHoc_batch_filepath(project), index=0)
+    return batch
+
+
+@trace.traced()
+def calc_postHoc_sweep(project, category, percentages=range(0, 101), context=None):
+    """ Calculate selection frequency sweep
+
+    Evaluates the selection frequency thresholded at every percentage in one pass (see posthoc.PostHocContext.sweep())
+    and exports the results to postHoc_batch_filepath(project, "_sweep")
+
+    :param project: the project dictionary
+    :param category: "Landscape Data" or "Demographic Data"
+    :param percentages: the percentages of restarts above which a planning unit is selected
+    :param context: an optional posthoc.PostHocContext from postHoc_context()
+    :return: pandas.DataFrame with the Category, Percentage, Metric, Type and Solution columns
+    """
+    if context is None:
+        context = postHoc_context(project, category)
+    index = run_index(project)
+    IDs, frequency = index.solution("Selection Frequency")
+    sweep = context.sweep(IDs, frequency, index.NUMREPS, percentages)
+    sweep.insert(0, "Category", category)
+    sweep.to_csv(postHoc_batch_filepath(project, "_sweep"), index=0)
+    return sweep
+
+
+@trace.traced()
+def calc_restart_similarity(project, k=5, metric='Jaccard'):
+    """ Calculate restart similarity
+
+    Compares every pair of Marxan restarts, clusters the restarts and exports one row per restart (with its cluster and
+    whether it is the cluster's representative solution) to postHoc_batch_filepath(project, "_similarity")
+
+    :param project: the project dictionary
+    :param k: the number of clusters
+    :param metric: 'Jaccard' or 'Hamming' (see similarity.restart_distances())
+    :return: (pandas.DataFrame, numpy.array) the restart table and the restart x restart distance matrix
+    """
+    store = marxanoutput.restart_store(run_index(project))
+    table, distances = similarity.restart_clusters(store, k, metric)
+    table.to_csv(postHoc_batch_filepath(project, "_similarity"), index=0)
+    return table, distances
+
+
+@trace.traced()
+def export_postHoc(project):
+    """ Export the post-hoc summary to project['filepaths']['posthoc']
+
+    :param project: the project dictionary
+    :return:
+    """
+    pandas.read_json(project["postHoc"]["summary"], orient='split').to_csv(project['filepaths']['posthoc'], index=0)
+
+
+@trace.traced()
+def export_postHoc_shp(project):
+    """ Export the post-hoc clusters (with areas and distance to the nearest cluster) to
+    project['filepaths']['posthoc_shp']
+
+    :param project: the project dictionary
+    :return:
+    """
+    clusters = project["postHoc"]["clusters"]
+    if 'areas' in project['postHoc']:
+        clusters = pandas.concat([clusters, pandas.DataFrame.from_dict(project['postHoc']['areas'])], axis=1)
+        clusters.rename(columns={0: 'areas'}, inplace=True)
+    if 'min_dist' in project['postHoc']:
+        clusters = pandas.concat(
+            [clusters, pandas.DataFrame.from_dict(numpy.array(project['postHoc']['min_dist']).min(axis=1))], axis=1)
+        clusters.rename(columns={0: 'min_dist'}, inplace=True)
+    clusters.to_file(project['filepaths']['posthoc_shp'])
+
+
+# ##########################  pipeline driver ##########################################################################
+
+def run(project, stages=DEFAULT_STAGES, rootpath=MCPATH):
+    """ Run the pipeline
+
+    Runs the selected stages of the Marxan Connect workflow on a project dictionary, in order.
+
+    :param project: the project dictionary
+    :param stages: the stages to run, any of 'update', 'rescale', 'metrics', 'export', 'inputdat', 'marxan', 'posthoc',
+    'posthoc_batch', 'posthoc_sweep', 'restart_similarity'. 'update' rebuilds only what changed since the last update
+    (see dependencies.update()), up to input.dat
+    :param rootpath: The Marxan Connect directory
+    :return: dict the updated project dictionary
+    """
+    for stage in stages:
+        if stage not in STAGES:
+            raise ValueError("Unknown pipeline stage '" + stage + "', expected one of " + ", ".join(STAGES))
+
+    spatial = load_spatial(project)
+    if 'update' in stages:
+        dependencies.update(project, spatial)
+    if 'rescale' in stages:
+        if project['options']['demo_conmat_rescale'] != "Identical Grids" and \
+                os.path.isfile(project['filepaths']['demo_cu_cm_filepath']):
+            rescale_demo(project)
+        if has_land_inputs(project):
+            generate_land(project)
+    if 'metrics' in stages:
+        calc_metrics(project)
+        lock_pudat(project, spatial)
+    if 'export' in stages:
+        export_cf_files(project, spatial)
+        export_bd_file(project)
+        export_pudat(project, spatial)
+    if 'inputdat' in stages:
+        generate_inputdat(project, rootpath)
+    if 'marxan' in stages:
+        run_marxan(project, rootpath)
+    if 'posthoc' in stages:
+        calc_postHoc_categories(project)
+    if 'posthoc_batch' in stages:
+        batch = [calc_postHoc_batch(project, category) for category in postHoc_categories(project)]
+        if len(batch) > 1:
+            pandas.concat(batch, ignore_index=True, sort=False).to_csv(postHoc_batch_filepath(project), index=0)
+    if 'posthoc_sweep' in stages:
+        sweep = [calc_postHoc_sweep(project, category) for category in postHoc_categories(project)]
+        if len(sweep) > 1:
+            pandas.concat(sweep, ignore_index=True).to_csv(postHoc_batch_filepath(project, "_sweep"), index=0)
+    if 'restart_similarity' in stages:
+        calc_restart_similarity(project)
+    return project
+
+
+def run_project_file(projfile, stages=DEFAULT_STAGES, save=False, rootpath=MCPATH):
+    """ Run the pipeline on a project file
+
+    Loads a .MarCon file, runs the pipeline without a display from the project directory, and optionally saves the
+    results back to the project file.
+
+    :param projfile: the .MarCon project file
+    :param stages: the stages to run (see run())
+    :param save: Logical. True to save the updated project file
+    :param rootpath: The Marxan Connect directory
+    :return: dict the updated project dictionary
+    """
+    set_headless()
+    project = load_project(projfile, rootpath)
+    os.chdir(os.path.dirname(project['filepaths']['projfile']))
+    project['options']['demo_pu_cm_progress'] = False
+    project['options']['land_pu_cm_progress'] = False
+    run(project, stages, rootpath)
+    if save:
+        save_project(project)
+    return project
+
+
+def _run_worker(args):
+    projfile, stages, save, rootpath = args
+    try:
+        run_project_file(projfile, stages, save, rootpath)
+        return projfile, None
+    except Exception:
+        return projfile, traceback.format_exc()
+
+
+def run_batch(projfiles, stages=DEFAULT_STAGES, processes=None, save=False, rootpath=MCPATH):
+    """ Run the pipeline on many project files
+
+    Each project is processed in its own worker process. Errors are caught and returned rather than raised so that one
+    failing planning region does not stop the batch.
+
+    :param projfiles: list of .MarCon project files
+    :param stages: the stages to run (see run())
+    :param processes: the number of worker processes (defaults to the number of CPUs)
+    :param save: Logical. True to save the updated project files
+    :param rootpath: The Marxan Connect directory
+    :return: list of (projfile, error) tuples, where error is None or the traceback as a string
+    """
+    args = [(os.path.abspath(p), tuple(stages), save, rootpath) for p in projfiles]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_run_worker, args, chunksize=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Marxan Connect pipeline on .MarCon project files without "
+                                                 "the graphical user interface.")
+    parser.add_argument('projfiles', nargs='+', help=".MarCon project file(s)")
+    parser.add_argument('--stages', default=",".join(DEFAULT_STAGES),
+                        help="comma separated stages to run, any of: " + ", ".join(STAGES) +
+                             " (default: " + ",".join(DEFAULT_STAGES) + ")")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--save', action='store_true', help="save the results to the project file(s)")
+    args = parser.parse_args(argv)
+    stages = tuple(s.strip() for s in args.stages.split(',') if s.strip())
+
+    if len(args.projfiles) == 1 and args.processes in (None, 1):
+        run_project_file(args.projfiles[0], stages, args.save)
+        return 0
+
+    failed = 0
+    for projfile, error in run_batch(args.projfiles, stages, args.processes, args.save):
+        if error is None:
+            print("Completed: " + projfile)
+        else:
+            failed += 1
+            print("Failed: " + projfile + "\n" + error, file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,400 @@
+"""
+Post-hoc evaluation context
+
+The post-hoc distance, cluster, fragmentation and summary metrics of a Marxan solution all need the planning units in the
+equal-area and equal-distance projections, the selected planning units dissolved into clusters, and the connectivity
+graph. PostHocContext loads and builds each of these once, so that every metric (and every solution evaluated with the
+same context) reuses them instead of re-reading the connectivity file and rebuilding the graph.
+
+The spacing metrics only need the distance from each cluster to its nearest neighbour, which is found with the spatial
+index of the clusters instead of measuring the distance between every pair of clusters.
+
+PostHocContext.sweep() evaluates the selection frequency at every percentage cut-off at once. Raising the cut-off only
+removes planning units, so the planning units are added from the most to the least frequently selected and the clusters
+are updated incrementally (union-find over the planning units which share an edge) instead of being dissolved again.
+
+evaluate_batch() evaluates many solutions (e.g. every Marxan restart) with one context, in a pool of worker processes
+which each receive the context (with its graphs already built) once, and returns one long-format table.
+"""
+import multiprocessing
+import os
+
+import numpy
+import pandas
+
+from marxanconnect import matrixstore
+from marxanconnect.lazy import geopandas as gpd, marxanconpy
+
+DEFAULT_TYPE = 'default_type_replace'
+
+
+def dissolve(geometry, crs=None):
+    """ Dissolve
+
+    :param geometry: geopandas.GeoSeries
+    :param crs: the crs of the clusters
+    :return: geopandas.GeoDataFrame with one row per contiguous cluster
+    """
+    union = geometry.unary_union
+    return gpd.GeoDataFrame(geometry=list(getattr(union, 'geoms', [union])), crs=crs)
+
+
+def nearest_distances(geometry):
+    """ Nearest distances
+
+    :param geometry: geopandas.GeoSeries of the clusters
+    :return: numpy.array of the distance from each cluster to the nearest other cluster (0 if there is only one cluster)
+    """
+    geometry = geometry.reset_index(drop=True)
+    nearest = numpy.zeros(geometry.shape[0])
+    if geometry.shape[0] < 2:
+        return nearest
+    (index, _), distance = geometry.sindex.nearest(geometry, return_all=False, return_distance=True, exclusive=True)
+    nearest[index] = distance
+
+    # clusters which touch another cluster at a point are measured against the nearest cluster they do not touch
+    for i in numpy.flatnonzero(nearest == 0):
+        distance = geometry.distance(geometry[i]).values
+        distance = distance[distance > 0]
+        nearest[i] = distance.min() if distance.size > 0 else 0
+    return nearest
+
+
+def distance_matrix(geometry, max_distance=None):
+    """ Distance matrix
+
+    :param geometry: geopandas.GeoSeries of the clusters
+    :param max_distance: only the distances between clusters closer than this are measured, the others are numpy.inf
+    (None to measure every pair)
+    :return: numpy.array of the distance between each pair of clusters
+    """
+    geometry = geometry.reset_index(drop=True)
+    if max_distance is None:
+        return numpy.array([geometry.distance(cluster).values for cluster in geometry]).reshape(
+            (geometry.shape[0], geometry.shape[0]))
+    matrix = numpy.full((geometry.shape[0], geometry.shape[0]), numpy.inf)
+    i, j = geometry.sindex.query(geometry, predicate='dwithin', distance=max_distance)
+    matrix[i, j] = geometry[i].distance(geometry[j], align=False).values
+    return matrix
+
+
+def read_connectivity(filename, format):
+    """ Read connectivity
+
+    Reads the connectivity data from its binary store (see matrixstore.py) if it can be stored, otherwise from the CSV
+    file
+
+    :param filename: filename of the connectivity data
+    :param format: The format of the connectivity file (i.e. "Matrix", "Edge List", "Edge List with Type", "Edge List
+    with Time", "Edge List with Habitat")
+    :return: pandas.DataFrame
+    """
+    store = matrixstore.load(filename, format)
+    if store is not None:
+        return store.frame()
+    if format == "Matrix":
+        return pandas.read_csv(filename, index_col=0)
+    elif format == "Edge List with Time":
+        return pandas.read_csv(filename, dtype={'id1': str, 'id2': str})[['id1', 'id2', 'value']].groupby(
+            ['id1', 'id2']).mean().reset_index()
+    return pandas.read_csv(filename, dtype={'id1': str, 'id2': str})
+
+
+class PostHocContext:
+    """ Post-hoc context
+
+    Shared data for the post-hoc evaluation of one or more solutions against one connectivity category
+
+    :param pu: the planning units (geopandas.GeoDataFrame in longitude/latitude)
+    :param filename: filename of the connectivity data (see pipeline.postHoc_connectivity())
+    :param format: The format of the connectivity file
+    :param max_distance: if not None, the distance between each pair of clusters closer than this (in metres) is also
+    calculated (see distance_matrix())
+    """
+
+    def __init__(self, pu, filename, format, max_distance=None):
+        self.pu = pu
+        self.filename = filename
+        self.format = format
+        self.max_distance = max_distance
+        self.area_proj = marxanconpy.spatial.get_appropriate_projection(pu, 'area')
+        self.dist_proj = marxanconpy.spatial.get_appropriate_projection(pu, 'distance')
+        self.pu_area = pu.to_crs(self.area_proj)
+        self.graph_IDs = None
+        self.graph_cache = None
+        self.pu_edges = None
+
+    def has_connectivity(self):
+        return self.format is not None and os.path.isfile(self.filename)
+
+    def graphs(self, IDs):
+        """ Graphs
+
+        Reads the connectivity data and converts it to one graph per connectivity type, the first time it is needed for
+        these planning unit IDs
+
+        :param IDs: Planning unit IDs
+        :return: dict of the connectivity type: igraph.Graph
+        """
+        IDs = [str(i) for i in IDs]
+        if self.graph_cache is None or self.graph_IDs != IDs:
+            connectivity = read_connectivity(self.filename, self.format)
+            if connectivity.shape[1] == 3 or self.format == "Matrix":
+                self.graph_cache = {DEFAULT_TYPE: marxanconpy.manipulation.connectivity2graph(connectivity,
+                                                                                              self.format, IDs)}
+            else:
+                types = connectivity.drop(['id1', 'id2', 'value'], axis=1)
+                self.graph_cache = {}
+                for type in numpy.unique(types):
+                    self.graph_cache[type] = marxanconpy.manipulation.connectivity2graph(
+                        connectivity[(types == type).values], self.format, IDs)
+            self.graph_IDs = IDs
+        return self.graph_cache
+
+    def shared_edges(self):
+        """ Shared edges
+
+        :return: (numpy.array, numpy.array) the row indices of each pair of planning units which share an edge (and
+        would therefore be dissolved into the same cluster)
+        """
+        if self.pu_edges is None:
+            geometry = self.pu_area.geometry.reset_index(drop=True)
+            i, j = geometry.sindex.query(geometry, predicate='intersects')
+            i, j = i[i < j], j[i < j]
+            shared = geometry[i].intersection(geometry[j], align=False).length.values > 0
+            self.pu_edges = (i[shared], j[shared])
+        return self.pu_edges
+
+    def sweep(self, IDs, frequency, NUMREPS, percentages=range(0, 101)):
+        """ Selection frequency sweep
+
+        Calculates the post-hoc metrics of the selection frequency thresholded at every percentage. The clusters are
+        updated incrementally as planning units are added from the highest to the lowest cut-off.
+
+        :param IDs: Planning unit IDs (in the same order as the planning units)
+        :param frequency: the number of restarts in which each planning unit was selected
+        :param NUMREPS: the number of restarts
+        :param percentages: the percentages of restarts above which a planning unit is selected
+        :return: pandas.DataFrame with the Percentage, Metric, Type and Solution columns
+        """
+        frequency = numpy.asarray(frequency, dtype='float64')
+        percentages = sorted(percentages, reverse=True)
+        areas = self.pu_area.area.values
+        i, j = self.shared_edges()
+        order = numpy.argsort(-frequency, kind='stable')
+        rank = numpy.empty(order.shape[0], dtype='int64')
+        rank[order] = numpy.arange(order.shape[0])
+
+        # neighbours of each planning unit which are added before it
+        first, last = numpy.where(rank[i] < rank[j], i, j), numpy.where(rank[i] < rank[j], j, i)
+        by_last = numpy.argsort(last, kind='stable')
+        first = first[by_last]
+        starts = numpy.searchsorted(last[by_last], numpy.arange(order.shape[0] + 1))
+
+        parent = numpy.arange(order.shape[0])
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        rows = []
+        added = 0
+        clusters = 0
+        area = 0.0
+        for percentage in percentages:
+            cutoff = NUMREPS / 100 * percentage
+            while added < order.shape[0] and frequency[order[added]] > cutoff:
+                pu = order[added]
+                clusters += 1
+                area += areas[pu]
+                for neighbour in first[starts[pu]:starts[pu + 1]]:
+                    a, b = find(pu), find(neighbour)
+                    if a != b:
+                        parent[a] = b
+                        clusters -= 1
+                added += 1
+            rows.append((percentage, "Planning Units", "All", added))
+            rows.append((percentage, "Clusters", "All", clusters))
+            rows.append((percentage, "Mean Size (km^2)", "All", area / clusters / 1000000 if clusters > 0 else 0))
+
+        sweep = pandas.DataFrame(rows, columns=["Percentage", "Metric", "Type", "Solution"])
+        if self.has_connectivity():
+            sweep = pandas.concat([sweep, self.sweep_connections(IDs, frequency, NUMREPS, percentages)],
+                                  ignore_index=True)
+        return sweep.sort_values(["Percentage"], kind='stable').reset_index(drop=True)
+
+    def sweep_connections(self, IDs, frequency, NUMREPS, percentages):
+        """ Connections sweep
+
+        A connection is in the solution while both of its planning units are, i.e. while the cut-off is below the lower
+        selection frequency of the two
+
+        :return: pandas.DataFrame of the number of connections and graph density at each percentage
+        """
+        planning_units = numpy.sort(frequency)
+        rows = []
+        for type, graph in self.graphs(IDs).items():
+            edges = numpy.array(graph.get_edgelist(), dtype='int64').reshape((-1, 2))
+            connections = numpy.sort(numpy.minimum(frequency[edges[:, 0]], frequency[edges[:, 1]]))
+            for percentage in percentages:
+                cutoff = NUMREPS / 100 * percentage
+                n = planning_units.shape[0] - numpy.searchsorted(planning_units, cutoff, side='right')
+                m = connections.shape[0] - numpy.searchsorted(connections, cutoff, side='right')
+                density = m / (n * (n - 1)) if graph.is_directed() else 2 * m / (n * (n - 1))
+                rows.append((percentage, "Connections", type, m))
+                rows.append((percentage, "Graph Density", type, density if n > 1 else numpy.nan))
+        return pandas.DataFrame(rows, columns=["Percentage", "Metric", "Type", "Solution"])
+
+    def selected(self, IDs, selectionIDs):
+        """
+        :return: numpy.array logical, True for the planning units in the solution
+        """
+        return pandas.Series(IDs).isin(selectionIDs).values
+
+    def clusters(self, selected):
+        """ Clusters
+
+        :param selected: logical array, True for the planning units in the solution (see selected())
+        :return: geopandas.GeoDataFrame the contiguous clusters of selected planning units in the equal-area projection
+        """
+        return dissolve(self.pu_area[selected].geometry, crs=self.area_proj)
+
+    def distances(self, clusters):
+        """ Distances
+
+        :param clusters: the clusters (see clusters())
+        :return: (numpy.array, numpy.array or None) the distance from each cluster to the nearest other cluster as a
+        column (so that min(axis=1) and any(axis=1) give the same results as for the distance matrix between
+        clusters) and, if max_distance is set, the distance matrix between clusters in the equal-distance projection
+        """
+        geometry = clusters.to_crs(self.dist_proj).geometry
+        min_dist = nearest_distances(geometry).reshape((-1, 1))
+        if self.max_distance is None:
+            return min_dist, None
+        return min_dist, distance_matrix(geometry, self.max_distance)
+
+    def graph_summary(self, IDs, selectionIDs):
+        """ Graph summary
+
+        :return: pandas.DataFrame of the number of connections, graph density and eigenvalue of the planning area and
+        the solution, for each connectivity type
+        """
+        summary = []
+        for type, graph in self.graphs(IDs).items():
+            sub = graph.subgraph([str(i) for i in selectionIDs])
+            summary.append(pandas.DataFrame({"Metric": ("Connections", "Graph Density", "Eigenvalue"),
+                                             "Type": (type, type, type),
+                                             "Planning Area": (graph.ecount(),
+                                                               graph.density(),
+                                                               graph.evcent(weights=graph.es["weight"],
+                                                                            return_eigenvalue=True)[1]),
+                                             "Solution": (sub.ecount(),
+                                                          sub.density(),
+                                                          sub.evcent(weights=sub.es["weight"],
+                                                                     return_eigenvalue=True)[1])}))
+        summary = pandas.concat(summary, ignore_index=True)
+        summary["Percent"] = summary["Solution"] / summary["Planning Area"] * 100
+        return summary
+
+    def evaluate(self, IDs, selectionIDs, sum_data):
+        """ Evaluate
+
+        Calculates the post-hoc metrics of a solution
+
+        :param IDs: Planning unit IDs
+        :param selectionIDs: Planning unit IDs for those included in the solution
+        :param sum_data: the Marxan summary of the solution (see pipeline.read_sum_data())
+        :return: dict with the min_dist, clusters, areas, fragmentation, sum_data and summary (pandas.DataFrame)
+        """
+        postHoc = {}
+        postHoc["clusters"] = self.clusters(self.selected(IDs, selectionIDs))
+        postHoc["min_dist"], dist_matrix = self.distances(postHoc["clusters"])
+        if dist_matrix is not None:
+            postHoc["dist_matrix"] = dist_matrix
+        postHoc["areas"] = postHoc["clusters"].area
+        postHoc["fragmentation"] = marxanconpy.posthoc.calc_postHoc_frag(postHoc["clusters"])
+        postHoc["sum_data"] = sum_data
+
+        # the spatial and Marxan metrics, without reading the connectivity data again
+        summary = marxanconpy.posthoc.calc_postHoc(self.pu, "notarealfilename", None,
+                                                   IDs=IDs,
+                                                   selectionIDs=selectionIDs,
+                                                   sum_data=sum_data,
+                                                   min_dist=postHoc["min_dist"],
+                                                   fragmentation=postHoc["fragmentation"],
+                                                   postHoc_areas=postHoc["areas"])
+        if self.has_connectivity():
+            graph_summary = self.graph_summary(IDs, selectionIDs)
+            if "Type" not in summary:
+                summary.insert(1, "Type", "All")
+            summary = pandas.concat([summary, graph_summary], ignore_index=True, sort=False)
+            summary = summary[['Metric', 'Type', 'Planning Area', 'Solution', 'Percent']]
+            if DEFAULT_TYPE in summary["Type"].unique():
+                del summary["Type"]
+        postHoc["summary"] = summary
+        return postHoc
+
+
+def long_format(summary, output, percentage=None):
+    """ Long format
+
+    :param summary: a post-hoc summary (see PostHocContext.evaluate())
+    :param output: the evaluated Marxan output (e.g. 'Best Solution' or a restart 'rNNNNN')
+    :param percentage: the selection frequency percentage (if any)
+    :return: pandas.DataFrame the summary with the 'Output' and 'Percentage' columns first
+    """
+    summary = summary.copy()
+    if "Type" not in summary:
+        summary.insert(1, "Type", "All")
+    summary.insert(0, "Percentage", percentage)
+    summary.insert(0, "Output", output)
+    return summary
+
+
+worker_context = None
+worker_IDs = None
+
+
+def init_worker(context, IDs):
+    global worker_context, worker_IDs
+    worker_context = context
+    worker_IDs = IDs
+
+
+def evaluate_worker(solution):
+    output, percentage, IDs, selectionIDs, sum_data = solution
+    if IDs is None:
+        IDs = worker_IDs
+    return long_format(worker_context.evaluate(IDs, selectionIDs, sum_data)["summary"], output, percentage)
+
+
+def evaluate_batch(context, solutions, processes=None):
+    """ Evaluate batch
+
+    Evaluates many solutions with the same context. The planning unit IDs of the first solution are sent to each worker
+    once, and only the selected planning units are sent for the solutions with the same IDs.
+
+    :param context: the PostHocContext
+    :param solutions: list of (output, percentage, IDs, selectionIDs, sum_data) tuples
+    :param processes: the number of worker processes (default: number of CPUs, 1 to evaluate in this process)
+    :return: pandas.DataFrame the long-format post-hoc summary of every solution (see long_format())
+    """
+    if len(solutions) == 0:
+        return pandas.DataFrame()
+    IDs = solutions[0][2]
+    if context.has_connectivity():
+        # build the graphs before the context is sent to the workers
+        context.graphs(IDs)
+    tasks = [(output, percentage, None if numpy.array_equal(solution_IDs, IDs) else solution_IDs, selectionIDs,
+              sum_data) for output, percentage, solution_IDs, selectionIDs, sum_data in solutions]
+
+    # worker processes (e.g. pipeline.run_batch()) cannot start their own pool
+    if processes == 1 or len(tasks) == 1 or multiprocessing.current_process().daemon:
+        init_worker(context, IDs)
+        results = [evaluate_worker(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, initializer=init_worker, initargs=(context, IDs)) as pool:
+            results = pool.map(evaluate_worker, tasks, chunksize=1)
+    return pandas.concat(results, ignore_index=True, sort=False)
@@ -0,0 +1,173 @@
+"""
+Action profiling
+
+Profiles the next GUI action (e.g. "Calculate Metrics" or "Plot") with cProfile when profiling has been armed from the
+Debug menu, so that a slow action can be reported with real hot-path data. Three files are saved next to the project:
+
+* <action>_<time>.prof, the cProfile statistics (for snakeviz, pstats, etc.)
+* <action>_<time>_summary.txt, the functions with the largest cumulative and own time
+* <action>_<time>.folded, the profile as collapsed stacks for flame graph tools (flamegraph.pl, speedscope, ...).
+  cProfile only records caller/callee pairs, so the stacks are reconstructed by splitting each function's time between
+  its callers in proportion to the time spent in each call.
+
+If the MARXANCONNECT_PROFILER environment variable is 'py-spy' and py-spy is installed (not on Windows), the action is
+also sampled by py-spy, including the worker processes, to <action>_<time>.speedscope.json. py-spy may need to run with
+administrator rights to attach to the process.
+
+The actions are the GUI event handlers recorded by trace.traced(category='gui').
+"""
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import shutil
+import signal
+import subprocess
+import sys
+
+# the directory the next action is profiled to (None when profiling is not armed) and the function called with the
+# saved filepaths
+armed = None
+callback = None
+
+# the number of functions listed in the summary and the smallest stack time written to the flame graph (seconds)
+SUMMARY_LINES = 40
+MIN_STACK_SECONDS = 1e-5
+MAX_DEPTH = 100
+
+
+def arm(directory, on_saved=None):
+    """ Arm
+
+    Profiles the next action
+
+    :param directory: the directory the profile is saved to
+    :param on_saved: function called with the list of saved filepaths
+    :return:
+    """
+    global armed, callback
+    armed = directory
+    callback = on_saved
+
+
+def disarm():
+    global armed, callback
+    armed = None
+    callback = None
+
+
+def profile_call(name, function, *args, **kwargs):
+    """ Profile call
+
+    Calls function under cProfile and saves the profile (see save()) to the armed directory. Profiling is disarmed
+    first, so only one action is profiled.
+
+    :param name: the action name, used in the filenames
+    :param function: the function
+    :return: the function's return value
+    """
+    directory, on_saved = armed, callback
+    disarm()
+    base = os.path.join(directory, name + "_" + datetime.datetime.now().strftime('%Y%m%d_%H%M%S'))
+    sampler = start_py_spy(base + '.speedscope.json')
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        filepaths = save(profiler, base)
+        if sampler is not None:
+            sampler.send_signal(signal.SIGINT)
+            try:
+                sampler.wait(timeout=60)
+                filepaths.append(base + '.speedscope.json')
+            except subprocess.TimeoutExpired:
+                sampler.kill()
+        print("Profile of " + name + " saved to " + filepaths[0])
+        if on_saved is not None:
+            on_saved(filepaths)
+
+
+def start_py_spy(filepath):
+    """ Start py-spy
+
+    :param filepath: the speedscope output file
+    :return: subprocess.Popen or None if py-spy is not selected or not available
+    """
+    if os.environ.get('MARXANCONNECT_PROFILER') != 'py-spy' or sys.platform == 'win32':
+        return None
+    executable = shutil.which('py-spy')
+    if executable is None:
+        print("Warning: py-spy was not found, only cProfile is used")
+        return None
+    return subprocess.Popen([executable, 'record', '--pid', str(os.getpid()), '--subprocesses', '--format',
+                             'speedscope', '--output', filepath])
+
+
+def save(profiler, base):
+    """ Save
+
+    :param profiler: cProfile.Profile
+    :param base: the filepath without extension
+    :return: list of the .prof, summary and .folded filepaths
+    """
+    profiler.dump_stats(base + '.prof')
+    stats = pstats.Stats(profiler)
+
+    summary = io.StringIO()
+    stats.stream = summary
+    stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+    stats.sort_stats('tottime').print_stats(SUMMARY_LINES)
+    with open(base + '_summary.txt', 'w') as file:
+        file.write(summary.getvalue())
+
+    with open(base + '.folded', 'w') as file:
+        for stack, seconds in folded_stacks(stats.stats):
+            file.write(stack + " " + str(int(round(seconds * 1e6))) + "\n")
+    return [base + '.prof', base + '_summary.txt', base + '.folded']
+
+
+def label(function):
+    """
+    :param function: the pstats function key (filename, line, name)
+    :return: str 'name (file:line)'
+    """
+    filename, line, name = function
+    if filename == '~':
+        return name
+    return name + " (" + os.path.basename(filename) + ":" + str(line) + ")"
+
+
+def folded_stacks(stats):
+    """ Folded stacks
+
+    :param stats: pstats.Stats.stats, {function: (primitive calls, calls, own time, cumulative time, callers)}
+    :return: list of (str, float) the ';' separated stacks and the own time of their last function (seconds)
+    """
+    callees = {}
+    for function, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((function, edge[3]))
+    roots = [f for f, (cc, nc, tt, ct, callers) in stats.items() if not set(callers) - {f}]
+
+    stacks = []
+
+    def walk(function, path, share):
+        cc, nc, tt, ct, callers = stats[function]
+        path = path + [label(function)]
+        if tt * share >= MIN_STACK_SECONDS:
+            stacks.append((";".join(path), tt * share))
+        if len(path) >= MAX_DEPTH:
+            return
+        for callee, seconds in callees.get(function, []):
+            if callee == function or label(callee) in path:
+                continue
+            # the part of the callee's time spent in calls from this function, on this path
+            total = stats[callee][3]
+            fraction = share * min(1.0, seconds / total) if total > 0 else 0.0
+            if total * fraction >= MIN_STACK_SECONDS:
+                walk(callee, path, fraction)
+
+    for root in roots:
+        walk(root, [], 1.0)
+    return stacks
@@ -0,0 +1,417 @@
+"""
+Connectivity rescaling
+
+Rescales the connectivity between connectivity units (the grid of the demographic connectivity data) to the planning
+units, with the weights of marxanconpy.spatial.rescale_matrix(): the connectivity between two planning units is the sum
+of the connectivity between each pair of connectivity units they overlap, weighted at each end by the area of the
+overlap divided by the planning unit's total overlap ("Proportional to overlap") or by the planning unit's area
+(otherwise).
+With W the planning unit by connectivity unit weights, the planning unit connectivity is W C Wt.
+
+rescale_matrix() intersects every planning unit with every connectivity unit and fills the matrix one pair of planning
+units at a time. Here the overlaps are found with a spatial index, a tile of planning units at a time (in a pool of
+worker processes for large grids), only the nonzero weights are kept, and W C Wt is computed from the nonzero
+connections, a block of connections at a time. The overlaps are cached per pair of grid files and ID columns (with the
+weights of each edge mode), so rescaling other connectivity data, time steps or edge modes on the same grids only
+computes the product. write_time_steps() streams an "Edge List with Time" to file one time step and block of planning
+units at a time, for connectivity with too many time steps to hold every planning unit matrix in memory.
+
+The connectivity data is matched to the connectivity units by ID. If its IDs are not the connectivity unit IDs, it is
+matched by position (the rows of a matrix, or the sorted IDs of an edge list), as rescale_matrix() does.
+"""
+import multiprocessing
+import os
+
+import numpy
+import pandas
+
+from marxanconnect import trace
+from marxanconnect.export import CHUNKSIZE
+from marxanconnect.lazy import geopandas as gpd, marxanconpy, shapely
+
+# planning units intersected per task, and the grids below which the overlaps are found in this process
+TILE = 5000
+MIN_PARALLEL = 4 * TILE
+
+# the number of weighted products computed at a time in W C Wt
+BLOCK = 5000000
+
+LONGLAT = '+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs'
+
+cache = {}
+
+
+# ##########################  overlaps ##################################################################################
+
+worker_tree = None
+worker_cu = None
+
+
+def init_worker(cu_geometry):
+    global worker_tree, worker_cu
+    worker_cu = cu_geometry
+    worker_tree = shapely.STRtree(cu_geometry)
+
+
+def overlap_worker(task):
+    """
+    :param task: (int, numpy.array) the index of the first planning unit of the tile and the tile's geometry
+    :return: (numpy.array, numpy.array, numpy.array) the planning unit and connectivity unit index and the area of each
+    overlap
+    """
+    start, pu_geometry = task
+    pu, cu = worker_tree.query(pu_geometry, predicate='intersects')
+    area = shapely.area(shapely.intersection(pu_geometry[pu], worker_cu[cu]))
+    keep = area > 0
+    return pu[keep] + start, cu[keep], area[keep]
+
+
+def overlaps(pu_geometry, cu_geometry, processes=None, tile=TILE):
+    """ Overlaps
+
+    :param pu_geometry: numpy.array of the planning unit polygons
+    :param cu_geometry: numpy.array of the connectivity unit polygons (in the same projection)
+    :param processes: the number of worker processes (default: number of CPUs, 1 to work in this process)
+    :param tile: the number of planning units intersected per task
+    :return: (numpy.array, numpy.array, numpy.array) the planning unit and connectivity unit index and the area of each
+    overlap
+    """
+    tasks = [(start, pu_geometry[start:start + tile]) for start in range(0, pu_geometry.shape[0], tile)]
+    # worker processes (e.g. pipeline.run_batch()) cannot start their own pool
+    if processes == 1 or len(tasks) <= 1 or pu_geometry.shape[0] < MIN_PARALLEL or \
+            multiprocessing.current_process().daemon:
+        init_worker(cu_geometry)
+        results = [overlap_worker(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, initializer=init_worker, initargs=(cu_geometry,)) as pool:
+            results = pool.map(overlap_worker, tasks, chunksize=1)
+    if not results:
+        return numpy.array([], dtype='int64'), numpy.array([], dtype='int64'), numpy.array([])
+    return tuple(numpy.concatenate(parts) for parts in zip(*results))
+
+
+# ##########################  weights ###################################################################################
+
+def expand(groups, counts, starts):
+    """ Expand
+
+    Pairs each item with each member of its group, e.g. each weight of a planning unit with each connection of its
+    connectivity unit
+
+    :param groups: the group of each item
+    :param counts: the number of members of each group
+    :param starts: the index of the first member of each group
+    :return: (numpy.array, numpy.array) the item index and the member index of each pair
+    """
+    repeats = counts[groups]
+    item = numpy.repeat(numpy.arange(groups.shape[0]), repeats)
+    member = starts[groups][item] + numpy.arange(item.shape[0]) - (numpy.cumsum(repeats) - repeats)[item]
+    return item, member
+
+
+class Weights:
+    """ Weights
+
+    The nonzero planning unit by connectivity unit weights W
+
+    :param pu_ids: the planning unit IDs, in the order of the planning unit file
+    :param cu_ids: the connectivity unit IDs, in the order of the connectivity unit file
+    :param pu: the planning unit index of each weight
+    :param cu: the connectivity unit index of each weight
+    :param weight: the weights
+    """
+
+    def __init__(self, pu_ids, cu_ids, pu, cu, weight):
+        self.pu_ids = pu_ids
+        self.cu_ids = cu_ids
+        # by planning unit, to compute W C Wt a block of planning units (rows) at a time
+        order = numpy.lexsort((cu, pu))
+        self.pu = pu[order]
+        self.cu = cu[order]
+        self.weight = weight[order]
+        # by connectivity unit, the weights of connectivity unit c are self.start[c]:self.start[c] + self.count[c]
+        order = numpy.argsort(cu, kind='stable')
+        self.cu_pu = pu[order]
+        self.cu_weight = weight[order]
+        self.count = numpy.bincount(cu, minlength=cu_ids.shape[0])
+        self.start = numpy.cumsum(self.count) - self.count
+
+    def blocks(self, cu1, cu2, value, block=BLOCK):
+        """ Blocks
+
+        W C Wt for the connections C between connectivity units, a block of planning units at a time. Each weight of a
+        planning unit is expanded over the connections of its connectivity unit, and each connection over the weights
+        of its destination connectivity unit.
+
+        :param cu1: the index of the source connectivity unit of each connection
+        :param cu2: the index of the destination connectivity unit of each connection
+        :param value: the connectivity values
+        :param block: the number of weighted products computed at a time (at least the products of one planning unit)
+        :return: generator of (numpy.array, numpy.array) the connected planning unit pairs of the block (source index *
+        the number of planning units + destination index, sorted) and their connectivity. Each pair is in one block
+        only.
+        """
+        n = self.pu_ids.shape[0]
+        keep = (value != 0) & (self.count[cu1] > 0) & (self.count[cu2] > 0)
+        order = numpy.argsort(cu1[keep], kind='stable')
+        cu1, cu2, value = cu1[keep][order], cu2[keep][order], value[keep][order]
+        connections = numpy.bincount(cu1, minlength=self.cu_ids.shape[0])
+        first_connection = numpy.cumsum(connections) - connections
+        # the number of products of each weight
+        reach = numpy.bincount(cu1, weights=self.count[cu2], minlength=self.cu_ids.shape[0]).astype('int64')
+        ends = numpy.cumsum(reach[self.cu])
+
+        first = 0
+        while first < self.pu.shape[0]:
+            limit = ends[first] - reach[self.cu[first]] + block
+            last = max(first + 1, int(numpy.searchsorted(ends, limit, side='right')))
+            # up to the last weight of the block's last planning unit
+            last = int(numpy.searchsorted(self.pu, self.pu[last - 1], side='right'))
+            w1, connection = expand(self.cu[first:last], connections, first_connection)
+            w1 += first
+            i, w2 = expand(cu2[connection], self.count, self.start)
+            w1, connection = w1[i], connection[i]
+            pair, inverse = numpy.unique(self.pu[w1].astype('int64') * n + self.cu_pu[w2], return_inverse=True)
+            products = self.weight[w1] * value[connection] * self.cu_weight[w2]
+            yield pair, numpy.bincount(inverse.ravel(), weights=products, minlength=pair.shape[0])
+            first = last
+
+    def product(self, cu1, cu2, value):
+        """ Product
+
+        :return: (numpy.array, numpy.array, numpy.array) the source and destination planning unit index and the
+        connectivity of each connected pair of planning units (see blocks())
+        """
+        n = self.pu_ids.shape[0]
+        results = list(self.blocks(cu1, cu2, value))
+        if not results:
+            return numpy.array([], dtype='int64'), numpy.array([], dtype='int64'), numpy.array([])
+        pair, total = (numpy.concatenate(parts) for parts in zip(*results))
+        return pair // n, pair % n, total
+
+    def row_blocks(self, cu1, cu2, value, rows):
+        """ Row blocks
+
+        :param rows: the number of planning unit rows per block
+        :return: generator of (int, numpy.array) the index of the first planning unit of each block of rows of the
+        planning unit connectivity matrix, and the block (see blocks())
+        """
+        n = self.pu_ids.shape[0]
+        results = self.blocks(cu1, cu2, value)
+        pair, total = numpy.array([], dtype='int64'), numpy.array([])
+        for start in range(0, n, rows):
+            matrix = numpy.zeros((min(rows, n - start), n))
+            end = (start + matrix.shape[0]) * n
+            while True:
+                # the pairs of this block of rows (the pairs are sorted, and the pairs of each result are disjoint)
+                cut = int(numpy.searchsorted(pair, end))
+                matrix.reshape(-1)[pair[:cut] - start * n] = total[:cut]
+                pair, total = pair[cut:], total[cut:]
+                if pair.shape[0]:
+                    break
+                pair, total = next(results, (None, None))
+                if pair is None:
+                    pair, total = numpy.array([], dtype='int64'), numpy.array([])
+                    break
+            yield start, matrix
+
+    def matrix(self, cu1, cu2, value):
+        """
+        :return: numpy.array the planning unit connectivity matrix (see blocks())
+        """
+        n = self.pu_ids.shape[0]
+        matrix = numpy.zeros((n, n))
+        cells = matrix.reshape(-1)
+        for pair, total in self.blocks(cu1, cu2, value):
+            cells[pair] = total
+        return matrix
+
+
+def read_grids(pu_filepath, cu_filepath):
+    """ Read grids
+
+    :return: (geopandas.GeoDataFrame, geopandas.GeoDataFrame) the planning units and connectivity units in the
+    equal-area projection of the planning units
+    """
+    pu = gpd.read_file(pu_filepath).to_crs(LONGLAT)
+    cu = gpd.read_file(cu_filepath).to_crs(LONGLAT)
+    proj = marxanconpy.spatial.get_appropriate_projection(pu, 'area')
+    return pu.to_crs(proj), cu.to_crs(proj)
+
+
+@trace.traced()
+def overlap_weights(pu_filepath, pu_id, cu_filepath, cu_id, edge, processes=None):
+    """ Overlap weights
+
+    The overlaps of the planning units and connectivity units are cached per pair of files (until either is modified)
+    and ID columns, and the weights of each edge mode are derived from them, so the grids are only intersected once
+    for every time step, type or edge mode rescaled on them.
+
+    :param pu_filepath: the planning unit shapefile
+    :param pu_id: the planning unit ID column
+    :param cu_filepath: the connectivity unit shapefile
+    :param cu_id: the connectivity unit ID column
+    :param edge: "Proportional to overlap" to divide the overlaps by each planning unit's total overlap, otherwise by
+    each planning unit's area
+    :param processes: the number of worker processes (see overlaps())
+    :return: Weights, cached until either file is modified
+    """
+    key = (os.path.abspath(pu_filepath), os.path.getmtime(pu_filepath), pu_id,
+           os.path.abspath(cu_filepath), os.path.getmtime(cu_filepath), cu_id)
+    if key not in cache:
+        cache.clear()
+        pu, cu = read_grids(pu_filepath, cu_filepath)
+        trace.annotate(planning_units=pu.shape[0], connectivity_units=cu.shape[0])
+        pu_geometry = numpy.asarray(pu.geometry.values)
+        pu_index, cu_index, area = overlaps(pu_geometry, numpy.asarray(cu.geometry.values), processes)
+        cache[key] = {'overlaps': (pu[pu_id].values, cu[cu_id].values, pu_index, cu_index, area,
+                                   shapely.area(pu_geometry))}
+    if edge not in cache[key]:
+        pu_ids, cu_ids, pu_index, cu_index, area, pu_area = cache[key]['overlaps']
+        if edge == "Proportional to overlap":
+            total = numpy.bincount(pu_index, weights=area, minlength=pu_ids.shape[0])
+            weight = area / total[pu_index]
+        else:
+            weight = area / pu_area[pu_index]
+        cache[key][edge] = Weights(pu_ids, cu_ids, pu_index, cu_index, weight)
+    return cache[key][edge]
+
+
+# ##########################  connectivity ##############################################################################
+
+def cu_index(weights, ids, labels):
+    """ Connectivity unit index
+
+    :param weights: Weights
+    :param ids: the connectivity unit ID of each connection
+    :param labels: the IDs of the connectivity data (the rows or columns of a matrix, the sorted IDs of an edge list),
+    matched to the connectivity units by position if they are not all connectivity unit IDs
+    :return: numpy.array the index of the connectivity unit of each connection
+    """
+    cu_ids = pandas.Index(numpy.asarray(weights.cu_ids).astype(str))
+    ids = numpy.asarray(ids).astype(str)
+    labels = numpy.asarray(labels).astype(str)
+    if (cu_ids.get_indexer(labels) >= 0).all():
+        return cu_ids.get_indexer(ids)
+    if labels.shape[0] > cu_ids.shape[0]:
+        raise ValueError("The connectivity data has more units (" + str(labels.shape[0]) +
+                         ") than the connectivity unit shapefile (" + str(cu_ids.shape[0]) + ")")
+    print("Warning: the connectivity data IDs are not the connectivity unit IDs, they are matched by position")
+    return pandas.Index(labels).get_indexer(ids)
+
+
+def edge_list_index(weights, edges):
+    """
+    :param weights: Weights
+    :param edges: pandas.DataFrame with the id1, id2 and value of each connection (one value per pair)
+    :return: (numpy.array, numpy.array, numpy.array) the connectivity unit index of each end of the connections, and
+    their values
+    """
+    return (cu_index(weights, edges['id1'], numpy.unique(edges['id1'])),
+            cu_index(weights, edges['id2'], numpy.unique(edges['id2'])),
+            edges['value'].values.astype('float64'))
+
+
+def read_connections(weights, cm_filepath, matrixformat):
+    """ Read connections
+
+    :param weights: Weights
+    :param cm_filepath: the connectivity unit connectivity file
+    :param matrixformat: The format of the connectivity file (i.e. "Matrix", "Edge List", "Edge List with Type", "Edge
+    List with Time")
+    :return: generator of (group, (cu1, cu2, value)) the type or time ('mean' for the mean of every type or time first,
+    None for a single matrix) and its connections (see edge_list_index()), one type or time at a time
+    """
+    if matrixformat == "Matrix":
+        conmat = pandas.read_csv(cm_filepath, index_col=0)
+        rows, columns = numpy.nonzero(conmat.values)
+        yield None, (cu_index(weights, conmat.index.values[rows], conmat.index.values),
+                     cu_index(weights, conmat.columns.values[columns], conmat.columns.values),
+                     conmat.values[rows, columns].astype('float64'))
+        return
+
+    conmat = pandas.read_csv(cm_filepath)
+    mean = conmat[['id1', 'id2', 'value']].groupby(['id1', 'id2']).mean().reset_index()
+    if matrixformat == "Edge List":
+        yield None, edge_list_index(weights, mean)
+        return
+    column = 'time' if matrixformat == "Edge List with Time" else 'type'
+    yield 'mean', edge_list_index(weights, mean)
+    for group, edges in conmat.groupby(column, sort=False):
+        edges = edges[['id1', 'id2', 'value']].groupby(['id1', 'id2']).mean().reset_index()
+        yield group, edge_list_index(weights, edges)
+
+
+@trace.traced()
+def rescale_matrix(pu_filepath, pu_id, cu_filepath, cu_id, cm_filepath, matrixformat, edge, processes=None):
+    """ Rescale matrix
+
+    Rescales the connectivity matrix to match the scale of the planning units, as marxanconpy.spatial.rescale_matrix()
+
+    :param pu_filepath: the planning unit shapefile
+    :param pu_id: the planning unit ID column
+    :param cu_filepath: the connectivity unit shapefile
+    :param cu_id: the connectivity unit ID column
+    :param cm_filepath: the connectivity unit connectivity file
+    :param matrixformat: The format of the connectivity file (i.e. "Matrix", "Edge List", "Edge List with Type", "Edge
+    List with Time")
+    :param edge: "Proportional to overlap" or "Homogeneous"
+    :param processes: the number of worker processes used to find the overlaps (see overlaps())
+    :return: pandas.DataFrame the planning unit connectivity matrix. For "Edge List with Time" or "Edge List with Type",
+    the matrix of the mean connectivity followed by the matrix of each time or type, with the 'id1' and 'time' or
+    'type' columns ('mean' for the mean)
+    """
+    weights = overlap_weights(pu_filepath, pu_id, cu_filepath, cu_id, edge, processes)
+    frames = []
+    for group, (cu1, cu2, value) in read_connections(weights, cm_filepath, matrixformat):
+        frame = pandas.DataFrame(weights.matrix(cu1, cu2, value), index=pandas.Index(weights.pu_ids, name="puID"),
+                                 columns=weights.pu_ids)
+        if group is not None:
+            frame['id1'] = frame.index
+            frame['time' if matrixformat == "Edge List with Time" else 'type'] = group
+        frames.append(frame)
+    return pandas.concat(frames) if len(frames) > 1 else frames[0]
+
+
+@trace.traced()
+def write_time_steps(pu_filepath, pu_id, cu_filepath, cu_id, cm_filepath, edge, filepath, mean_filepath,
+                     processes=None, chunksize=CHUNKSIZE):
+    """ Write time steps
+
+    Rescales an "Edge List with Time" one time step at a time, with the same weights for every step, and appends each
+    step to the planning unit "Edge List with Time" as it is rescaled, a block of rows at a time, so that only one block
+    of the planning unit matrix is in memory (rescale_matrix() returns every step at once)
+
+    :param pu_filepath: the planning unit shapefile
+    :param pu_id: the planning unit ID column
+    :param cu_filepath: the connectivity unit shapefile
+    :param cu_id: the connectivity unit ID column
+    :param cm_filepath: the connectivity unit "Edge List with Time"
+    :param edge: "Proportional to overlap" or "Homogeneous"
+    :param filepath: the planning unit "Edge List with Time" (time, id1, id2 and value of every pair of planning units)
+    :param mean_filepath: the planning unit matrix of the mean of the time steps
+    :param processes: the number of worker processes used to find the overlaps (see overlaps())
+    :param chunksize: the number of rows written at a time
+    :return: int the number of time steps
+    """
+    weights = overlap_weights(pu_filepath, pu_id, cu_filepath, cu_id, edge, processes)
+    pu_ids = weights.pu_ids
+    n = pu_ids.shape[0]
+    rows = max(1, chunksize // max(n, 1))
+    steps = 0
+    for time, (cu1, cu2, value) in read_connections(weights, cm_filepath, "Edge List with Time"):
+        if time == 'mean':
+            for start, block in weights.row_blocks(cu1, cu2, value, rows):
+                frame = pandas.DataFrame(block, index=pu_ids[start:start + block.shape[0]], columns=pu_ids)
+                frame.to_csv(mean_filepath, mode='w' if start == 0 else 'a', header=start == 0, index=True)
+            continue
+        print("Rescaling time step " + str(time))
+        for start, block in weights.row_blocks(cu1, cu2, value, rows):
+            first = steps == 0 and start == 0
+            frame = pandas.DataFrame({'time': time,
+                                      'id1': numpy.repeat(pu_ids[start:start + block.shape[0]], n),
+                                      'id2': numpy.tile(pu_ids, block.shape[0]),
+                                      'value': block.reshape(-1)})
+            frame.to_csv(filepath, mode='w' if first else 'a', header=first, index=False)
+        steps += 1
+    return steps
@@ -0,0 +1,122 @@
+"""
+Restart similarity
+
+Compares the solutions of every Marxan restart with each other and groups similar solutions. The pairwise overlap of
+the restarts (the number of planning units selected in both, i.e. the popcount of the AND of their selections) is
+accumulated over blocks of planning units from the packed restart store (see marxanoutput.RestartStore) as one matrix
+product per block, so the restart x planning unit matrix is never unpacked as a whole. The Jaccard and Hamming
+distances follow from the overlaps and the number of planning units in each solution. The restarts are then clustered
+with k-medoids, and the medoid of each cluster is reported as its representative solution.
+"""
+import numpy
+import pandas
+
+METRICS = ('Jaccard', 'Hamming')
+
+# planning units unpacked at a time, 1000 restarts x 16384 planning units are 64 MB as float32
+BLOCKSIZE = 16384
+
+
+def restart_overlap(store, blocksize=BLOCKSIZE):
+    """ Restart overlap
+
+    :param store: marxanoutput.RestartStore
+    :param blocksize: the number of planning units unpacked at a time (a multiple of 8)
+    :return: (numpy.array, numpy.array) the number of planning units selected in both of each pair of restarts
+    (restart x restart) and in each restart
+    """
+    overlap = numpy.zeros((store.NUMREPS, store.NUMREPS), dtype='float64')
+    step = blocksize // 8
+    for start in range(0, store.solutions.shape[1], step):
+        count = min(blocksize, store.n_pu - start * 8)
+        block = numpy.unpackbits(store.solutions[:, start:start + step], axis=1, count=count).astype('float32')
+        # float32 sums are exact up to 2**24 planning units per block
+        overlap += block @ block.T
+    overlap = numpy.rint(overlap).astype('int64')
+    return overlap, overlap.diagonal().copy()
+
+
+def restart_distances(store, metric='Jaccard', blocksize=BLOCKSIZE):
+    """ Restart distances
+
+    :param store: marxanoutput.RestartStore
+    :param metric: 'Jaccard' (1 - shared / selected in either) or 'Hamming' (the number of planning units selected in
+    only one of the two restarts)
+    :param blocksize: the number of planning units unpacked at a time
+    :return: numpy.array restart x restart distance matrix
+    """
+    overlap, selected = restart_overlap(store, blocksize)
+    either = selected[:, None] + selected[None, :] - overlap
+    if metric == 'Jaccard':
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            distances = numpy.where(either > 0, 1 - overlap / either, 0.0)
+    elif metric == 'Hamming':
+        distances = either - overlap
+    else:
+        raise ValueError("metric must be one of " + ", ".join(METRICS))
+    return distances
+
+
+def kmedoids(distances, k, iterations=100):
+    """ k-medoids
+
+    Clusters the restarts around k medoids by alternating assignment and medoid update, starting from the most central
+    restart and then the restarts furthest from the medoids chosen so far. There are fewer than k clusters if fewer than
+    k restarts are different solutions (only restarts at a distance from every medoid become medoids).
+
+    :param distances: restart x restart distance matrix
+    :param k: the number of clusters
+    :param iterations: the maximum number of iterations
+    :return: (numpy.array, numpy.array) the medoid indices and the cluster of each restart
+    """
+    distances = numpy.asarray(distances, dtype='float64')
+    k = max(1, min(k, distances.shape[0]))
+    medoids = [int(numpy.argmin(distances.sum(axis=1)))]
+    while len(medoids) < k:
+        nearest = distances[:, medoids].min(axis=1)
+        if nearest.max() <= 0:
+            break
+        medoids.append(int(numpy.argmax(nearest)))
+    medoids = numpy.array(medoids)
+    k = medoids.shape[0]
+
+    for iteration in range(iterations):
+        clusters = numpy.argmin(distances[:, medoids], axis=1)
+        # medoids are always assigned to their own cluster, even when duplicate solutions tie
+        clusters[medoids] = numpy.arange(k)
+        updated = medoids.copy()
+        for cluster in range(k):
+            members = numpy.flatnonzero(clusters == cluster)
+            if members.shape[0] == 0:
+                continue
+            updated[cluster] = members[numpy.argmin(distances[numpy.ix_(members, members)].sum(axis=1))]
+        if numpy.array_equal(updated, medoids):
+            break
+        medoids = updated
+    clusters = numpy.argmin(distances[:, medoids], axis=1)
+    clusters[medoids] = numpy.arange(k)
+    return medoids, clusters
+
+
+def restart_clusters(store, k=5, metric='Jaccard', blocksize=BLOCKSIZE):
+    """ Restart clusters
+
+    :param store: marxanoutput.RestartStore
+    :param k: the number of clusters (at most the number of different solutions)
+    :param metric: 'Jaccard' or 'Hamming' (see restart_distances())
+    :param blocksize: the number of planning units unpacked at a time
+    :return: (pandas.DataFrame, numpy.array) one row per restart with its cluster, whether it is the representative
+    (medoid) solution of its cluster, its distance to that solution and its score, and the distance matrix
+    """
+    distances = restart_distances(store, metric, blocksize)
+    medoids, clusters = kmedoids(distances, min(k, numpy.unique(store.solutions, axis=0).shape[0]))
+    restarts = ["r" + "%05d" % t for t in range(1, store.NUMREPS + 1)]
+    table = pandas.DataFrame({'Restart': restarts,
+                              'Cluster': clusters + 1,
+                              'Representative': numpy.isin(numpy.arange(store.NUMREPS), medoids),
+                              'Distance to Representative': distances[numpy.arange(store.NUMREPS), medoids[clusters]],
+                              'Mean Distance': distances.sum(axis=1) / max(store.NUMREPS - 1, 1)})
+    if 'Score' in store.sum.columns:
+        scores = store.sum.set_index(store.sum.columns[0])['Score']
+        table['Score'] = scores.reindex(numpy.arange(1, store.NUMREPS + 1)).values
+    return table, distances
@@ -0,0 +1,74 @@
+"""
+Start up timing report
+
+Records the time taken by each step of start up (imports, frame construction, showing the window, loading the first
+project) and by each deferred import, so that start up regressions can be tracked between versions. The report is
+printed to the log and, if the MARXANCONNECT_STARTUP_LOG environment variable is set to a filename, appended to that
+file as one JSON record per start up.
+"""
+import datetime
+import json
+import os
+import time
+
+T0 = time.perf_counter()
+
+marks = []
+imports = []
+reported = False
+
+
+def mark(step):
+    """ Mark
+
+    Records the time since start up at which a step finished
+
+    :param step: The name of the step (e.g. 'imports', 'frame', 'shown')
+    :return:
+    """
+    marks.append((step, time.perf_counter() - T0))
+
+
+def record_import(name, seconds):
+    """ Record import
+
+    Records the time taken by a deferred import
+
+    :param name: The module name
+    :param seconds: The import time in seconds
+    :return:
+    """
+    imports.append((name, seconds, time.perf_counter() - T0))
+    if reported:
+        print("Deferred import of {} took {:.3f} seconds".format(name, seconds))
+
+
+def report(version=None):
+    """ Report
+
+    Prints the start up timing report and appends it to the file in MARXANCONNECT_STARTUP_LOG (if set)
+
+    :param version: The Marxan Connect version
+    :return: dict
+    """
+    global reported
+    reported = True
+    record = {'version': version,
+              'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+              'steps': [{'step': step, 'elapsed': round(elapsed, 3)} for step, elapsed in marks],
+              'imports': [{'module': name, 'seconds': round(seconds, 3), 'at': round(at, 3)}
+                          for name, seconds, at in imports]}
+
+    previous = 0
+    print("Start up timing (seconds since launch):")
+    for step, elapsed in marks:
+        print("    {:<12} {:7.3f}  (+{:.3f})".format(step, elapsed, elapsed - previous))
+        previous = elapsed
+    for name, seconds, at in imports:
+        print("    deferred import of {} took {:.3f} at {:.3f}".format(name, seconds, at))
+
+    logfile = os.environ.get('MARXANCONNECT_STARTUP_LOG')
+    if logfile:
+        with open(logfile, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+    return record
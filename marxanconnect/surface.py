@@ -0,0 +1,287 @@
+"""
+Resistance surface connectivity
+
+Generates the landscape "Edge List with Habitat" from a resistance surface, the polygons of the resistance surface
+shapefile with their resistance in the "Resistance Column Label" column. The surface is rasterized once onto a grid of
+square cells covering the planning units, in their equidistant projection. The raster is saved next to the shapefile
+(<file>.raster.npy, with the grid it was made for in <file>.raster.json) and memory-mapped by later runs and by each
+worker process; it is rebuilt when the shapefile, the column or the grid changes. The cells are 1/RESOLUTION of the side
+of the median planning unit unless the 'land_res_cellsize' option sets their size (in metres).
+
+The cost of moving between two of the 8 neighbouring cells is the distance between their centres times their mean
+resistance; cells outside the surface cannot be crossed. The least-cost distance between two planning units is the
+shortest path from any of the cells of the first (the cells whose centre is in the planning unit, or the cell under a
+planning unit smaller than a cell) to any of the cells of the second. The paths are found with Dijkstra's algorithm
+from each planning unit's cells at once, for a block of source planning units at a time in a pool of worker processes
+(see landscape.py), and collected in a temporary memory-mapped file before they are written. As for habitat types, the
+connectivity is the inverse square of the least-cost distance divided by the largest total connectivity of a planning
+unit, and the resistance column is written as its habitat.
+"""
+import json
+import os
+
+import numpy
+
+from marxanconnect import landscape, trace
+from marxanconnect.export import CHUNKSIZE
+from marxanconnect.lazy import geopandas as gpd, igraph, marxanconpy, shapely
+
+VERSION = 1
+SUFFIX = '.raster'
+
+# cells along the side of the median planning unit, the most cells of an automatic grid, and the cells rasterized at a
+# time
+RESOLUTION = 4
+MAX_CELLS = 10000000
+BAND = 1000000
+
+# the neighbours of each cell (the other 4 of the 8 neighbours are the cells which have it as neighbour)
+NEIGHBOURS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+# ##########################  raster ####################################################################################
+
+def raster_grid(pu_geometry, crs, cellsize=None):
+    """ Raster grid
+
+    :param pu_geometry: numpy.array of the planning unit polygons
+    :param crs: the projection of the planning units
+    :param cellsize: the side of each cell, in the units of the projection (default: automatic)
+    :return: dict the projection, left and top edges, cell size and shape (rows, columns) of a grid covering the
+    planning units with a margin of one cell
+    """
+    left, bottom, right, top = shapely.total_bounds(pu_geometry)
+    if not cellsize:
+        cellsize = max(numpy.sqrt(numpy.median(shapely.area(pu_geometry))) / RESOLUTION,
+                       numpy.sqrt((right - left) * (top - bottom) / MAX_CELLS))
+    cellsize = float(cellsize)
+    return {'crs': str(crs), 'left': float(left) - cellsize, 'top': float(top) + cellsize, 'cellsize': cellsize,
+            'shape': [int(numpy.ceil((top - bottom) / cellsize)) + 2, int(numpy.ceil((right - left) / cellsize)) + 2]}
+
+
+def cell_centres(grid, start, stop):
+    """
+    :return: numpy.array the centre points of the cells of rows start to stop (excluded)
+    """
+    columns = grid['shape'][1]
+    x = grid['left'] + (numpy.arange(columns) + 0.5) * grid['cellsize']
+    y = grid['top'] - (numpy.arange(start, stop) + 0.5) * grid['cellsize']
+    return shapely.points(numpy.tile(x, y.shape[0]), numpy.repeat(y, columns))
+
+
+def rasterize(geometry, resistance, grid, raster):
+    """ Rasterize
+
+    :param geometry: numpy.array of the resistance surface polygons (in the projection of the grid)
+    :param resistance: the resistance of each polygon
+    :param grid: see raster_grid()
+    :param raster: numpy.array of the grid's shape, filled with the largest resistance of the polygons under the centre
+    of each cell (NaN if there is none)
+    :return: raster
+    """
+    tree = shapely.STRtree(geometry)
+    rows, columns = grid['shape']
+    band = max(1, BAND // columns)
+    for start in range(0, rows, band):
+        stop = min(start + band, rows)
+        cell, polygon = tree.query(cell_centres(grid, start, stop), predicate='intersects')
+        values = numpy.full((stop - start) * columns, numpy.nan)
+        numpy.fmax.at(values, cell, resistance[polygon])
+        raster[start:stop] = values.reshape(stop - start, columns)
+    return raster
+
+
+def load_raster(res_filepath, res_id, grid):
+    """ Load raster
+
+    :param res_filepath: the resistance surface shapefile
+    :param res_id: the resistance column
+    :param grid: see raster_grid()
+    :return: str the filepath of the raster, built if it is not current (see rasterize()), or numpy.array the raster
+    if it cannot be saved
+    """
+    stat = os.stat(res_filepath)
+    meta = {'version': VERSION, 'source': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, 'column': res_id,
+            'grid': grid}
+    filepath = res_filepath + SUFFIX + '.npy'
+    try:
+        with open(res_filepath + SUFFIX + '.json') as file:
+            if json.load(file) == meta and os.path.isfile(filepath):
+                return filepath
+    except (OSError, ValueError):
+        pass
+
+    res = gpd.read_file(res_filepath).to_crs(grid['crs'])
+    resistance = res[res_id].values.astype('float64')
+    if (resistance < 0).any():
+        raise ValueError("The resistance surface has negative resistances in '" + str(res_id) + "'")
+    geometry = numpy.asarray(res.geometry.values)
+    temporary = res_filepath + SUFFIX + '.tmp.npy'
+    try:
+        raster = numpy.lib.format.open_memmap(temporary, mode='w+', dtype='float64', shape=tuple(grid['shape']))
+        rasterize(geometry, resistance, grid, raster)
+        raster.flush()
+        del raster
+        os.replace(temporary, filepath)
+        with open(res_filepath + SUFFIX + '.json', 'w') as file:
+            json.dump(meta, file)
+        return filepath
+    except OSError as error:
+        print("Warning: the raster of " + res_filepath + " could not be written (" + str(error) +
+              "), keeping it in memory")
+        return rasterize(geometry, resistance, grid, numpy.empty(tuple(grid['shape'])))
+    finally:
+        if os.path.isfile(temporary):
+            os.remove(temporary)
+
+
+def pu_cells(pu_geometry, grid):
+    """ Planning unit cells
+
+    :param pu_geometry: numpy.array of the planning unit polygons (in the projection of the grid)
+    :param grid: see raster_grid()
+    :return: (numpy.array, numpy.array) the planning unit index and the cell index (row * columns + column) of each
+    cell whose centre is in a planning unit, and of the cell under each planning unit which has no cell centre
+    """
+    tree = shapely.STRtree(pu_geometry)
+    rows, columns = grid['shape']
+    band = max(1, BAND // columns)
+    pu, cell = [], []
+    for start in range(0, rows, band):
+        centre, polygon = tree.query(cell_centres(grid, start, min(start + band, rows)), predicate='intersects')
+        pu.append(polygon)
+        cell.append(centre + start * columns)
+    pu, cell = numpy.concatenate(pu), numpy.concatenate(cell)
+
+    missing = numpy.setdiff1d(numpy.arange(pu_geometry.shape[0]), pu)
+    points = shapely.get_coordinates(shapely.point_on_surface(pu_geometry[missing]))
+    row = numpy.clip(((grid['top'] - points[:, 1]) // grid['cellsize']).astype('int64'), 0, rows - 1)
+    column = numpy.clip(((points[:, 0] - grid['left']) // grid['cellsize']).astype('int64'), 0, columns - 1)
+    return numpy.concatenate([pu, missing]), numpy.concatenate([cell, row * columns + column])
+
+
+# ##########################  least-cost paths ##########################################################################
+
+def cost_graph(raster, cellsize, pu, cell, n):
+    """ Cost graph
+
+    :param raster: the resistance of each cell (NaN for cells which cannot be crossed)
+    :param cellsize: the side of each cell
+    :param pu: the planning unit index of each planning unit cell (see pu_cells())
+    :param cell: the cell index of each planning unit cell
+    :param n: the number of planning units
+    :return: (igraph.Graph, int) the directed graph of the cells which can be crossed, with the cost of moving between
+    neighbouring cells as 'weight', followed by a source vertex and then a target vertex for each planning unit (joined
+    from and to its cells at no cost), and the number of cell vertices
+    """
+    rows, columns = raster.shape
+    valid = ~numpy.isnan(raster)
+    index = numpy.full(raster.shape, -1, dtype='int64')
+    cells = int(valid.sum())
+    index[valid] = numpy.arange(cells)
+
+    first, second, cost = [], [], []
+    for dr, dc in NEIGHBOURS:
+        a = (slice(0, rows - dr), slice(max(0, -dc), columns - max(0, dc)))
+        b = (slice(dr, rows), slice(max(0, dc), columns + min(0, dc)))
+        both = valid[a] & valid[b]
+        first.append(index[a][both])
+        second.append(index[b][both])
+        cost.append(numpy.hypot(dr, dc) * cellsize * (raster[a][both] + raster[b][both]) / 2)
+    first, second, cost = numpy.concatenate(first), numpy.concatenate(second), numpy.concatenate(cost)
+
+    cell = index.reshape(-1)[cell]
+    pu, cell = pu[cell >= 0], cell[cell >= 0]
+    edges = numpy.concatenate([numpy.stack([first, second], axis=1),
+                               numpy.stack([second, first], axis=1),
+                               numpy.stack([cells + pu, cell], axis=1),
+                               numpy.stack([cell, cells + n + pu], axis=1)])
+    graph = igraph.Graph(n=cells + 2 * n, edges=edges.tolist(), directed=True)
+    graph.es['weight'] = numpy.concatenate([cost, cost, numpy.zeros(2 * pu.shape[0])]).tolist()
+    return graph, cells
+
+
+worker_graph = None
+worker_cells = None
+worker_n = None
+
+
+def init_worker(raster, cellsize, pu, cell, n):
+    global worker_graph, worker_cells, worker_n
+    if isinstance(raster, str):
+        raster = numpy.load(raster, mmap_mode='r')
+    worker_graph, worker_cells = cost_graph(raster, cellsize, pu, cell, n)
+    worker_n = n
+
+
+def path_worker(task):
+    """
+    :param task: (int, int) the index of the first and last (excluded) source planning unit
+    :return: (int, numpy.array) the index of the first source planning unit, and the inverse square of the least-cost
+    path from each source planning unit to every planning unit (0 for the planning unit itself or if there is no path)
+    """
+    start, stop = task
+    distance = numpy.array(worker_graph.distances(source=list(range(worker_cells + start, worker_cells + stop)),
+                                                  target=list(range(worker_cells + worker_n,
+                                                                    worker_cells + 2 * worker_n)),
+                                                  weights='weight', mode='out'))
+    with numpy.errstate(divide='ignore'):
+        inverse = 1 / (distance * distance)
+    inverse[numpy.isinf(inverse)] = 0
+    return start, inverse
+
+
+# ##########################  connectivity ##############################################################################
+
+@trace.traced()
+def write_surface_connectivity(res_filepath, res_id, pu_filepath, pu_id, filepath, cellsize=None, processes=None,
+                               chunksize=CHUNKSIZE):
+    """ Write resistance surface connectivity
+
+    Writes the landscape "Edge List with Habitat" (habitat, id1, id2 and value of every pair of planning units) from the
+    least-cost paths across the resistance surface
+
+    :param res_filepath: the resistance surface shapefile
+    :param res_id: the resistance column
+    :param pu_filepath: the planning unit shapefile
+    :param pu_id: the planning unit ID column
+    :param filepath: the planning unit "Edge List with Habitat"
+    :param cellsize: the side of each cell in metres (default: automatic, see raster_grid())
+    :param processes: the number of worker processes (default: number of CPUs, 1 to work in this process)
+    :param chunksize: the number of rows written at a time
+    :return:
+    """
+    pu = gpd.read_file(pu_filepath).to_crs(landscape.LONGLAT).sort_values(pu_id).reset_index(drop=True)
+    dist_proj = marxanconpy.spatial.get_appropriate_projection(pu, 'distance')
+    pu_geometry = numpy.asarray(pu.to_crs(dist_proj).geometry.values)
+    pu_ids = pu[pu_id].values
+    n = pu_ids.shape[0]
+
+    grid = raster_grid(pu_geometry, dist_proj, cellsize)
+    raster = load_raster(res_filepath, res_id, grid)
+    pu_index, cell = pu_cells(pu_geometry, grid)
+    values = numpy.load(raster, mmap_mode='r') if isinstance(raster, str) else raster
+    outside = n - numpy.unique(pu_index[~numpy.isnan(values.reshape(-1)[cell])]).shape[0]
+    if outside:
+        print("Warning: " + str(outside) + " planning units are not on the resistance surface and are not connected")
+    trace.annotate(planning_units=n, cells=grid['shape'][0] * grid['shape'][1])
+
+    rows = max(1, min(landscape.SOURCES, landscape.BLOCK // n))
+    matrix = landscape.open_matrix(filepath + landscape.SUFFIX, n)
+    try:
+        total = numpy.zeros(n)
+        pool = landscape.start_pool(processes, n, init_worker, (raster, grid['cellsize'], pu_index, cell, n))
+        try:
+            for start, inverse in landscape.run(pool, path_worker, [(start, min(start + rows, n))
+                                                                    for start in range(0, n, rows)]):
+                matrix[start:start + inverse.shape[0]] = inverse
+                total[start:start + inverse.shape[0]] = inverse.sum(1)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        landscape.write_habitat(filepath, res_id, pu_ids, matrix, total.max(), numpy.ones(n), True, chunksize)
+    finally:
+        del matrix
+        if os.path.isfile(filepath + landscape.SUFFIX):
+            os.remove(filepath + landscape.SUFFIX)
@@ -0,0 +1,371 @@
+"""
+Synthetic projects
+
+Generates Marxan Connect projects of any size for scale testing: a hexagonal or square planning unit grid, an optional
+coarser square grid of connectivity units (to be rescaled to the planning units), focus and avoidance areas, a sparse
+dispersal kernel in any of the demographic connectivity formats ("Matrix", "Edge List", "Edge List with Time", "Edge
+List with Type"), the Marxan input files (pu.dat, spec.dat, puvspr.dat) and the .MarCon project file.
+
+Every file is written a chunk of units at a time, so the memory use does not grow with the size of the project (except
+for the dense "Matrix" format, which is limited to MATRIX_LIMIT units). The units are numbered from 1 in row order and
+the dispersal kernel only connects units within a few cells of each other, so the number of connections grows linearly
+with the number of units::
+
+    python -m marxanconnect.synthetic synthetic_100k --units 100000 --shape hexagon --format "Edge List with Time"
+"""
+import argparse
+import math
+import os
+import sys
+
+import numpy
+import pandas
+
+from marxanconnect import MCPATH, pipeline
+from marxanconnect.export import CHUNKSIZE
+from marxanconnect.lazy import geopandas as gpd, marxanconpy, shapely
+
+SHAPES = ('hexagon', 'square')
+
+FORMATS = ("Matrix", "Edge List", "Edge List with Time", "Edge List with Type")
+
+# the largest dense matrix written (20000 x 20000 is already ~4 GB of text)
+MATRIX_LIMIT = 20000
+
+# projected coordinate reference system (UTM zone 20N, metres) and the lower left corner of the grids
+CRS = 'EPSG:32620'
+ORIGIN = (300000.0, 1300000.0)
+
+
+class Grid:
+    """ Grid
+
+    n units of a hexagonal (pointy top, odd rows shifted right) or square grid filled row by row in a square block of
+    rows x columns cells, numbered 1 to n.
+    """
+
+    def __init__(self, n, shape='hexagon', size=1000.0, origin=ORIGIN, columns=None):
+        """
+        :param n: the number of units
+        :param shape: 'hexagon' or 'square'
+        :param size: the side length of the cells (m)
+        :param origin: the (x, y) coordinates of the centre of the first cell
+        :param columns: the number of columns (default: a square block)
+        """
+        if shape not in SHAPES:
+            raise ValueError("shape must be one of " + ", ".join(SHAPES))
+        self.n = int(n)
+        self.shape = shape
+        self.size = float(size)
+        self.origin = origin
+        self.columns = int(columns or math.ceil(math.sqrt(self.n)))
+        self.rows = int(math.ceil(self.n / self.columns))
+        if shape == 'hexagon':
+            self.dx, self.dy = math.sqrt(3) * self.size, 1.5 * self.size
+        else:
+            self.dx, self.dy = self.size, self.size
+
+    @property
+    def spacing(self):
+        """ the distance between the centres of neighbouring cells """
+        return self.dx
+
+    @property
+    def bounds(self):
+        """ (minx, miny, maxx, maxy) of the cell centres """
+        return (self.origin[0], self.origin[1],
+                self.origin[0] + (self.columns - 0.5) * self.dx, self.origin[1] + (self.rows - 1) * self.dy)
+
+    def ids(self, start=0, stop=None):
+        return numpy.arange(start, self.n if stop is None else stop, dtype='int64') + 1
+
+    def centres(self, index):
+        """
+        :param index: the row order index of the units (0 to n - 1)
+        :return: (numpy.array, numpy.array) the x and y coordinates of the centre of the units
+        """
+        row, column = index // self.columns, index % self.columns
+        x = self.origin[0] + column * self.dx
+        if self.shape == 'hexagon':
+            x = x + (row % 2) * self.dx / 2
+        return x, self.origin[1] + row * self.dy
+
+    def polygons(self, start=0, stop=None):
+        """
+        :return: numpy.array of the shapely polygons of the units start to stop (row order index)
+        """
+        x, y = self.centres(numpy.arange(start, self.n if stop is None else stop))
+        if self.shape == 'hexagon':
+            angles = numpy.radians(numpy.arange(30, 390, 60))
+            corners = numpy.stack([numpy.cos(angles), numpy.sin(angles)], axis=1) * self.size
+        else:
+            corners = numpy.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5], [-0.5, -0.5]]) * self.size
+        coords = numpy.stack([x, y], axis=1)[:, None, :] + corners[None, :, :]
+        return shapely.polygons(coords)
+
+
+def write_grid(filepath, grid, id_column='pu_id', crs=CRS, chunksize=CHUNKSIZE):
+    """ Write grid
+
+    :param filepath: the shapefile
+    :param grid: Grid
+    :param id_column: the name of the ID column
+    :param crs: the coordinate reference system of the grid
+    :param chunksize: the number of units written at a time
+    :return:
+    """
+    for start in range(0, grid.n, chunksize):
+        stop = min(start + chunksize, grid.n)
+        chunk = gpd.GeoDataFrame({id_column: grid.ids(start, stop)}, geometry=grid.polygons(start, stop), crs=crs)
+        chunk.to_file(filepath, mode='w' if start == 0 else 'a')
+
+
+def write_area(filepath, grid, fraction=0.1, patches=5, crs=CRS, seed=0):
+    """ Write area
+
+    Writes a focus or avoidance area made of circular patches at random locations in the grid
+
+    :param filepath: the shapefile
+    :param grid: Grid
+    :param fraction: the approximate proportion of the grid covered by the patches
+    :param patches: the number of patches
+    :param crs: the coordinate reference system of the grid
+    :param seed: the random seed
+    :return:
+    """
+    rng = numpy.random.default_rng(seed)
+    minx, miny, maxx, maxy = grid.bounds
+    radius = math.sqrt(fraction * (maxx - minx + grid.dx) * (maxy - miny + grid.dy) / (patches * math.pi))
+    points = shapely.points(rng.uniform(minx, maxx, patches), rng.uniform(miny, maxy, patches))
+    gpd.GeoDataFrame({'id': numpy.arange(1, patches + 1)}, geometry=shapely.buffer(points, radius),
+                     crs=crs).to_file(filepath)
+
+
+def connections(grid, start, stop, radius=2, scale=1.0, seed=0):
+    """ Connections
+
+    Dispersal from the units start to stop to every unit within radius cells, proportional to exp(-distance / scale)
+    and scaled so that the total dispersal from each unit (its settlement probability) is between 0.2 and 0.8.
+
+    :param grid: Grid
+    :param start: the row order index of the first source unit
+    :param stop: the row order index after the last source unit
+    :param radius: the dispersal radius (in cells)
+    :param scale: the dispersal scale (in cells)
+    :param seed: the random seed
+    :return: (numpy.array, numpy.array, numpy.array) the row order index of the source and destination of each
+    connection and the dispersal probability, sorted by source
+    """
+    sources = numpy.arange(start, stop)
+    row, column = sources // grid.columns, sources % grid.columns
+    x, y = grid.centres(sources)
+    reach = int(math.ceil(radius * grid.dx / grid.dy))
+    id1, id2, distance = [], [], []
+    for dr in range(-reach, reach + 1):
+        for dc in range(-radius - 1, radius + 2):
+            r, c = row + dr, column + dc
+            target = r * grid.columns + c
+            valid = (r >= 0) & (r < grid.rows) & (c >= 0) & (c < grid.columns) & (target < grid.n)
+            tx, ty = grid.centres(target[valid])
+            d = numpy.hypot(tx - x[valid], ty - y[valid]) / grid.spacing
+            near = d <= radius + 1e-9
+            id1.append(sources[valid][near])
+            id2.append(target[valid][near])
+            distance.append(d[near])
+    id1, id2, distance = numpy.concatenate(id1), numpy.concatenate(id2), numpy.concatenate(distance)
+    order = numpy.lexsort((id2, id1))
+    id1, id2, value = id1[order], id2[order], numpy.exp(-distance[order] / scale)
+
+    settlement = numpy.random.default_rng([seed, start]).uniform(0.2, 0.8, stop - start)
+    total = numpy.bincount(id1 - start, weights=value, minlength=stop - start)
+    return id1, id2, value * (settlement / total)[id1 - start]
+
+
+def write_connectivity(filepath, grid, format="Edge List", radius=2, times=3, types=2, chunksize=CHUNKSIZE,
+                       seed=0):
+    """ Write connectivity
+
+    :param filepath: the connectivity csv file
+    :param grid: Grid
+    :param format: The format of the connectivity file (i.e. "Matrix", "Edge List", "Edge List with Type", "Edge List
+    with Time")
+    :param radius: the dispersal radius (in cells)
+    :param times: the number of times for "Edge List with Time" (the probabilities vary randomly between times)
+    :param types: the number of types for "Edge List with Type" (the dispersal scale increases with the type)
+    :param chunksize: the approximate number of rows (connections or matrix cells / 100) written at a time
+    :param seed: the random seed
+    :return: int the number of connections written
+    """
+    if format not in FORMATS:
+        raise ValueError("format must be one of " + ", ".join(FORMATS))
+    if format == "Matrix" and grid.n > MATRIX_LIMIT:
+        raise ValueError("The Matrix format is limited to " + str(MATRIX_LIMIT) + " units, use an Edge List format")
+
+    # source units per chunk, from the approximate number of connections per unit
+    per_unit = max(1, int(math.pi * (radius + 0.5) ** 2 * grid.dx / grid.dy))
+    step = max(1, chunksize * 100 // grid.n if format == "Matrix" else chunksize // per_unit)
+    rng = numpy.random.default_rng([seed, 1])
+    count = 0
+    with open(filepath, 'w', newline='') as file:
+        for start in range(0, grid.n, step):
+            stop = min(start + step, grid.n)
+            if format == "Matrix":
+                id1, id2, value = connections(grid, start, stop, radius, seed=seed)
+                block = numpy.zeros((stop - start, grid.n))
+                block[id1 - start, id2] = value
+                pandas.DataFrame(block, index=grid.ids(start, stop), columns=grid.ids()).to_csv(
+                    file, header=start == 0)
+                count += value.shape[0]
+                continue
+            if format == "Edge List":
+                id1, id2, value = connections(grid, start, stop, radius, seed=seed)
+                chunk = pandas.DataFrame({'id1': id1 + 1, 'id2': id2 + 1, 'value': value})
+            elif format == "Edge List with Time":
+                id1, id2, value = connections(grid, start, stop, radius, seed=seed)
+                chunk = pandas.concat([pandas.DataFrame({'time': time, 'id1': id1 + 1, 'id2': id2 + 1,
+                                                         'value': value * rng.lognormal(0, 0.5, value.shape[0])})
+                                       for time in range(1, times + 1)], ignore_index=True)
+            else:
+                chunk = []
+                for type in range(1, types + 1):
+                    id1, id2, value = connections(grid, start, stop, radius, scale=type, seed=seed + type)
+                    chunk.append(pandas.DataFrame({'type': "type" + str(type), 'id1': id1 + 1, 'id2': id2 + 1,
+                                                   'value': value}))
+                chunk = pandas.concat(chunk, ignore_index=True)
+            chunk.to_csv(file, header=start == 0, index=False)
+            count += chunk.shape[0]
+    return count
+
+
+def write_marxan_inputs(directory, grid, features=5, occurrence=0.2, chunksize=CHUNKSIZE, seed=0):
+    """ Write Marxan inputs
+
+    Writes a pu.dat (unit cost), spec.dat (proportion target of 0.3) and puvspr.dat (each feature occurs in a random
+    proportion of the planning units) in directory
+
+    :param directory: the Marxan input directory
+    :param grid: Grid of the planning units
+    :param features: the number of conservation features
+    :param occurrence: the proportion of the planning units each feature occurs in
+    :param chunksize: the number of planning units written at a time
+    :param seed: the random seed
+    :return:
+    """
+    pandas.DataFrame({'id': numpy.arange(1, features + 1), 'prop': 0.3, 'spf': 1000,
+                      'name': ["feature" + str(f) for f in range(1, features + 1)]}).to_csv(
+        os.path.join(directory, 'spec.dat'), index=False)
+    rng = numpy.random.default_rng([seed, 2])
+    with open(os.path.join(directory, 'pu.dat'), 'w', newline='') as pudat, \
+            open(os.path.join(directory, 'puvspr.dat'), 'w', newline='') as puvspr:
+        for start in range(0, grid.n, chunksize):
+            stop = min(start + chunksize, grid.n)
+            ids = grid.ids(start, stop)
+            pandas.DataFrame({'id': ids, 'cost': 1, 'status': 0}).to_csv(pudat, header=start == 0, index=False)
+            pu, species = numpy.nonzero(rng.random((ids.shape[0], features)) < occurrence)
+            pandas.DataFrame({'species': species + 1, 'pu': ids[pu],
+                              'amount': numpy.round(rng.uniform(0.1, 1, pu.shape[0]), 3)}).to_csv(
+                puvspr, header=start == 0, index=False)
+
+
+def generate_project(directory, units=1000, shape='hexagon', format="Edge List", connectivity_units=None,
+                     radius=2, times=3, types=2, features=5, metrics=('google',), size=1000.0, chunksize=CHUNKSIZE,
+                     seed=0, rootpath=MCPATH):
+    """ Generate project
+
+    :param directory: the project directory (created if needed)
+    :param units: the number of planning units
+    :param shape: 'hexagon' or 'square' planning units
+    :param format: the demographic connectivity format (see FORMATS)
+    :param connectivity_units: if given, the connectivity is generated for a square grid of connectivity units
+    connectivity_units times the width of the planning units, to be rescaled to the planning units. Otherwise the
+    connectivity is generated for the planning units ("Identical Grids")
+    :param radius: the dispersal radius (in cells)
+    :param times: the number of times for "Edge List with Time"
+    :param types: the number of types for "Edge List with Type"
+    :param features: the number of conservation features in puvspr.dat
+    :param metrics: the demographic metrics selected in the project
+    :param size: the side length of the planning units (m)
+    :param chunksize: the number of units or connections written at a time
+    :param seed: the random seed
+    :param rootpath: The Marxan Connect directory
+    :return: str the .MarCon project file
+    """
+    for folder in ('data', 'input', 'output'):
+        os.makedirs(os.path.join(directory, folder), exist_ok=True)
+    directory = os.path.abspath(directory)
+    data = os.path.join(directory, 'data')
+
+    grid = Grid(units, shape, size)
+    write_grid(os.path.join(data, 'pu.shp'), grid, 'pu_id', chunksize=chunksize)
+    write_area(os.path.join(data, 'focus_area.shp'), grid, seed=seed + 1)
+    write_area(os.path.join(data, 'avoidance_area.shp'), grid, seed=seed + 2)
+    write_marxan_inputs(os.path.join(directory, 'input'), grid, features, chunksize=chunksize, seed=seed)
+
+    project = marxanconpy.marcon.new_project(directory)
+    project['version']['MarxanConnect'] = pipeline.read_version(rootpath)
+    filepaths = project['filepaths']
+    filepaths['pu_filepath'] = os.path.join(data, 'pu.shp')
+    filepaths['pu_file_pu_id'] = 'pu_id'
+    filepaths['fa_filepath'] = os.path.join(data, 'focus_area.shp')
+    filepaths['aa_filepath'] = os.path.join(data, 'avoidance_area.shp')
+    filepaths['demo_pu_cm_filepath'] = os.path.join(data, 'pu_connectivity.csv')
+    if connectivity_units:
+        # connectivity units covering the planning units
+        cu_size = grid.spacing * connectivity_units
+        minx, miny, maxx, maxy = grid.bounds
+        columns = int(math.ceil((maxx - minx + grid.dx) / cu_size)) + 1
+        rows = int(math.ceil((maxy - miny + grid.dy) / cu_size)) + 1
+        cu_grid = Grid(rows * columns, 'square', cu_size,
+                       (minx - grid.dx / 2 + cu_size / 2, miny - grid.dy / 2 + cu_size / 2), columns)
+        filepaths['demo_cu_filepath'] = os.path.join(data, 'cu.shp')
+        filepaths['demo_cu_file_pu_id'] = 'cu_id'
+        filepaths['demo_cu_cm_filepath'] = os.path.join(data, 'cu_connectivity.csv')
+        write_grid(filepaths['demo_cu_filepath'], cu_grid, 'cu_id', chunksize=chunksize)
+        write_connectivity(filepaths['demo_cu_cm_filepath'], cu_grid, format, radius, times, types, chunksize, seed)
+        project['options']['demo_conmat_rescale'] = "Rescale Connectivity Matrix"
+    else:
+        filepaths['demo_cu_filepath'] = filepaths['pu_filepath']
+        filepaths['demo_cu_file_pu_id'] = 'pu_id'
+        filepaths['demo_cu_cm_filepath'] = filepaths['demo_pu_cm_filepath']
+        write_connectivity(filepaths['demo_pu_cm_filepath'], grid, format, radius, times, types, chunksize, seed)
+    project['options']['demo_conmat_format'] = format
+    project['options']['demo_pu_cm_progress'] = False
+    project['options']['land_pu_cm_progress'] = False
+    for metric in metrics:
+        project['options']['demo_metrics'][metric] = True
+
+    projfile = os.path.join(directory, os.path.basename(directory) + '.MarCon')
+    filepaths['projfile'] = projfile
+    filepaths['projfilename'] = os.path.basename(projfile)
+    pipeline.save_project(project, projfile)
+    return projfile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Marxan Connect project for scale testing.")
+    parser.add_argument('directory', help="the project directory")
+    parser.add_argument('--units', type=int, default=1000, help="number of planning units (default: 1000)")
+    parser.add_argument('--shape', choices=SHAPES, default='hexagon', help="planning unit shape (default: hexagon)")
+    parser.add_argument('--format', choices=FORMATS, default="Edge List",
+                        help="connectivity format (default: Edge List)")
+    parser.add_argument('--connectivity-units', type=float, default=None,
+                        help="generate the connectivity for square connectivity units this many times the width of "
+                             "the planning units, to be rescaled (default: identical grids)")
+    parser.add_argument('--radius', type=int, default=2, help="dispersal radius in cells (default: 2)")
+    parser.add_argument('--times', type=int, default=3, help="times for 'Edge List with Time' (default: 3)")
+    parser.add_argument('--types', type=int, default=2, help="types for 'Edge List with Type' (default: 2)")
+    parser.add_argument('--features', type=int, default=5, help="conservation features (default: 5)")
+    parser.add_argument('--metrics', default='google', help="comma separated demographic metrics (default: google)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    pipeline.set_headless()
+    projfile = generate_project(args.directory, args.units, args.shape, args.format, args.connectivity_units,
+                                args.radius, args.times, args.types, args.features,
+                                [m for m in args.metrics.split(',') if m], seed=args.seed)
+    print("Generated " + projfile)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
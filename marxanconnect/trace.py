@@ -0,0 +1,235 @@
+"""
+Stage timing trace
+
+Records the wall time, CPU time (including child processes, e.g. the batch post-hoc workers and Marxan), peak resident
+memory and input file sizes of each pipeline stage and GUI action, so that what is slow on a given project can be found
+from the Debug menu (see TraceForm in MarxanConnectGUI.py) rather than guessed. Stages run inside other stages (e.g.
+calc_metrics inside the "Calculate Metrics" button) are nested, and the trace can be exported in the Chrome trace event
+format (chrome://tracing, https://ui.perfetto.dev).
+
+Only the most recent MAXSPANS stages are kept. If the MARXANCONNECT_TRACE_LOG environment variable is set to a filename,
+each stage is also appended to that file as one JSON record.
+"""
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+from marxanconnect import profiling
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, the peak memory is not recorded
+    resource = None
+
+MAXSPANS = 5000
+
+# the filepaths recorded as the inputs of each pipeline stage (the size of each file which exists)
+STAGE_INPUTS = {
+    'load_pu_shp': ('pu_filepath',),
+    'rescale_demo': ('pu_filepath', 'demo_cu_filepath', 'demo_cu_cm_filepath'),
+    'generate_land': ('pu_filepath', 'land_cu_filepath', 'land_res_mat_filepath', 'land_res_filepath'),
+    'calc_metrics': ('demo_pu_cm_filepath', 'land_pu_cm_filepath'),
+    'export_cf_files': ('orig_cf_filepath',),
+    'export_boundary_file': ('demo_pu_cm_filepath', 'land_pu_cm_filepath', 'orig_bd_filepath'),
+    'export_pudat': ('orig_pudat_filepath',),
+    'run_marxan': ('marxan_input', 'cf_filepath', 'bd_filepath', 'pudat_filepath'),
+    'calc_postHoc': ('demo_pu_cm_filepath', 'land_pu_cm_filepath'),
+    'calc_postHoc_batch': ('demo_pu_cm_filepath', 'land_pu_cm_filepath'),
+    'calc_postHoc_sweep': ('demo_pu_cm_filepath', 'land_pu_cm_filepath'),
+}
+
+T0 = time.perf_counter()
+EPOCH = time.time()
+
+spans = collections.deque(maxlen=MAXSPANS)
+lock = threading.Lock()
+local = threading.local()
+
+
+def peak_rss():
+    """
+    :return: float the peak resident memory of the process so far (MB), or None if it is not available
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+
+def cpu_time():
+    """
+    :return: float the CPU time (user and system) of the process and its finished child processes
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def input_sizes(project, keys=None):
+    """ Input sizes
+
+    :param project: the project dictionary
+    :param keys: the filepath keys to record (default: every file in the project)
+    :return: dict of the size (bytes) of each input file which exists
+    """
+    filepaths = project.get('filepaths', {}) if isinstance(project, dict) else {}
+    sizes = {}
+    for key in keys or filepaths:
+        filepath = filepaths.get(key, '')
+        if isinstance(filepath, str) and os.path.isfile(filepath):
+            sizes[key] = os.path.getsize(filepath)
+    return sizes
+
+
+class Span:
+    """ Span
+
+    Context manager recording the time of one stage. Extra inputs (e.g. the number of planning units) can be added to
+    span.inputs while the stage runs.
+    """
+
+    def __init__(self, name, category='pipeline', inputs=None):
+        self.name = name
+        self.category = category
+        self.inputs = dict(inputs or {})
+        self.record = None
+
+    def __enter__(self):
+        stack = getattr(local, 'stack', None)
+        if stack is None:
+            stack = local.stack = []
+        self.depth = len(stack)
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.cpu = cpu_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        wall = time.perf_counter() - self.start
+        local.stack.pop()
+        self.record = {'name': self.name,
+                       'category': self.category,
+                       'start': round(self.start - T0, 6),
+                       'wall': round(wall, 6),
+                       'cpu': round(cpu_time() - self.cpu, 6),
+                       'peak_rss_mb': peak_rss(),
+                       'inputs': self.inputs,
+                       'depth': self.depth,
+                       'parent': self.parent,
+                       'thread': threading.get_ident(),
+                       'status': 'ok' if exc_type is None else 'error: ' + exc_type.__name__}
+        with lock:
+            spans.append(self.record)
+        logfile = os.environ.get('MARXANCONNECT_TRACE_LOG')
+        if logfile:
+            with open(logfile, 'a') as file:
+                file.write(json.dumps(dict(self.record, timestamp=EPOCH + self.start - T0)) + '\n')
+        return False
+
+
+def span(name, category='pipeline', inputs=None):
+    """
+    :return: Span
+    """
+    return Span(name, category, inputs)
+
+
+def annotate(**inputs):
+    """ Annotate
+
+    Adds inputs (e.g. the number of planning units) to the innermost span being recorded, if any
+
+    :return:
+    """
+    stack = getattr(local, 'stack', None)
+    if stack:
+        stack[-1].inputs.update(inputs)
+
+
+def traced(name=None, category='pipeline', inputs=None):
+    """ Traced
+
+    Decorator recording each call of a pipeline function or GUI event handler as a span. The sizes of the input files
+    are taken from the project dictionary (the 'project' argument, or the project of the GUI). If profiling is armed
+    (see profiling.arm()), the next GUI event handler is also profiled.
+
+    :param name: the span name (default: the function name)
+    :param category: 'pipeline' or 'gui'
+    :param inputs: the filepath keys recorded as inputs (default: STAGE_INPUTS of the function name, or none)
+    """
+    def decorator(function):
+        keys = inputs if inputs is not None else STAGE_INPUTS.get(function.__name__, ())
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            project = kwargs.get('project')
+            if project is None and args:
+                project = args[0] if isinstance(args[0], dict) else getattr(args[0], '__dict__', {}).get('project')
+            with Span(name or function.__name__, category, input_sizes(project, keys) if keys else None) as span:
+                if profiling.armed is not None and category == 'gui' and span.depth == 0:
+                    return profiling.profile_call(span.name, function, *args, **kwargs)
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent(limit=None, category=None):
+    """ Recent spans
+
+    :param limit: the number of top level spans (runs) to return, with the spans nested in them
+    :param category: only the runs of this category
+    :return: list of the span records, most recent run first, each run followed by its nested spans in start order
+    """
+    with lock:
+        records = list(spans)
+    # spans are recorded when they end, so each top level span follows the spans nested in it
+    runs = []
+    for record in reversed(records):
+        if record['depth'] == 0:
+            runs.append([record])
+        elif runs:
+            runs[-1].append(record)
+    runs = [[run[0]] + sorted(run[1:], key=lambda r: r['start']) for run in runs
+            if category is None or run[0]['category'] == category][:limit]
+    return [record for run in runs for record in run]
+
+
+def clear():
+    with lock:
+        spans.clear()
+
+
+def chrome_trace(records=None):
+    """ Chrome trace
+
+    :param records: the span records (default: every span kept)
+    :return: dict in the Chrome trace event format (complete events, times in microseconds)
+    """
+    if records is None:
+        with lock:
+            records = list(spans)
+    events = []
+    for record in records:
+        args = {'cpu_seconds': record['cpu'], 'peak_rss_mb': record['peak_rss_mb'], 'status': record['status']}
+        args.update(record['inputs'])
+        events.append({'name': record['name'], 'cat': record['category'], 'ph': 'X',
+                       'ts': round(record['start'] * 1e6), 'dur': round(record['wall'] * 1e6),
+                       'pid': os.getpid(), 'tid': record['thread'], 'args': args})
+    return {'traceEvents': sorted(events, key=lambda e: e['ts']), 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(filepath, records=None):
+    """ Export the trace (see chrome_trace()) to a JSON file
+
+    :param filepath: the JSON filepath
+    :param records: the span records (default: every span kept)
+    :return:
+    """
+    with open(filepath, 'w') as file:
+        json.dump(chrome_trace(records), file)
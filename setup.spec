@@ -81,6 +81,10 @@ if platform.system() == 'Windows':
         'fiona.schema',
         'descartes',
         'shapely',
+        'cartopy',
+        'cartopy.crs',
+        'cartopy.feature',
+        'marxanconpy',
         'os',
         'sys',
         'pandas',
@@ -172,6 +176,12 @@ if platform.system() == 'Darwin':
         'geopandas.datasets',
         'pytest',
         'pandas._libs.tslibs.timedeltas',
+        'matplotlib.pyplot',
+        'matplotlib.backends.backend_wxagg',
+        'cartopy',
+        'cartopy.crs',
+        'cartopy.feature',
+        'marxanconpy',
     ]
 
     added_files = collect_data_files('geopandas', subdir='datasets') + [
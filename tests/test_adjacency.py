@@ -0,0 +1,45 @@
+import numpy
+import shapely
+
+from marxanconnect import adjacency, boundary
+
+
+def pairs(edges):
+    return sorted(zip(*(e.tolist() for e in edges)))
+
+
+def test_t_junction():
+    geometry = numpy.array([shapely.box(0, 0, 2, 1), shapely.box(0, 1, 1, 2), shapely.box(1, 1, 2, 2)])
+    assert pairs(adjacency.segment_edges(geometry)) == [(0, 1, 1.0), (0, 2, 1.0), (1, 2, 1.0)]
+    assert pairs(adjacency.intersection_edges(geometry)) == [(0, 1, 1.0), (0, 2, 1.0), (1, 2, 1.0)]
+
+
+def test_corner_only():
+    geometry = numpy.array([shapely.box(0, 0, 1, 1), shapely.box(1, 1, 2, 2)])
+    assert pairs(adjacency.segment_edges(geometry)) == []
+    assert pairs(adjacency.intersection_edges(geometry)) == []
+
+
+def test_grid():
+    geometry = numpy.array([shapely.box(x, y, x + 1, y + 1) for y in range(4) for x in range(5)])
+    edges = pairs(adjacency.segment_edges(geometry))
+    assert len(edges) == 4 * 4 + 5 * 3
+    assert all(length == 1 for _, _, length in edges)
+    assert edges == pairs(adjacency.intersection_edges(geometry))
+
+
+def test_partial_edge_length():
+    # the second polygon shares half of its edge with the first, and the edge vertices do not match
+    geometry = numpy.array([shapely.box(0, 0, 1, 1), shapely.box(1, 0.5, 2, 1.5)])
+    assert pairs(adjacency.segment_edges(geometry)) == [(0, 1, 0.5)]
+
+
+def test_points():
+    geometry = numpy.array([shapely.Point(0, 0), shapely.Point(1, 0), shapely.Point(0, 1)])
+    assert pairs(adjacency.planar_edges(geometry)) == [(0, 1, 0.0), (0, 2, 0.0), (1, 2, 0.0)]
+
+
+def test_shared_edge_boundary():
+    geometry = numpy.array([shapely.box(0, 0, 2, 1), shapely.box(0, 1, 1, 2), shapely.box(1, 1, 3, 2)])
+    bound = boundary.shared_edge_boundary(numpy.array([10, 2, 3]), adjacency.planar_edges(geometry))
+    assert bound.values.tolist() == [['2', '3', 1.0], ['2', '10', 1.0], ['3', '10', 1.0]]
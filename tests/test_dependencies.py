@@ -0,0 +1,37 @@
+import pandas
+
+from marxanconnect import dependencies
+from marxanconnect.lazy import marxanconpy
+
+
+def built_project():
+    project = marxanconpy.marcon.new_project()
+    project['connectivityMetrics'] = {'spec_demo_pu': {'google': [0.1, 0.5, 0.9],
+                                                       'google_discrete_median_to_maximum': [0, 1, 1]}}
+    project['spec_dat'] = pandas.DataFrame({'id': [1], 'target': [0.5], 'spf': [1000],
+                                            'name': ['google_discrete_median_to_maximum']}).to_json(orient='split')
+    nodes = dependencies.graph(project)
+    fingerprints = {}
+    project['dependencies'] = {}
+    for name, node in nodes.items():
+        fingerprints[name] = project['dependencies'][name] = dependencies.fingerprint(project, node, fingerprints)
+    return project
+
+
+def test_up_to_date():
+    assert not any(dependencies.status(built_project()).values())
+
+
+def test_new_discrete_metric():
+    project = built_project()
+    project['connectivityMetrics']['spec_demo_pu']['google_discrete_minimum_to_median'] = [1, 1, 0]
+    stale = dependencies.status(project)
+    assert stale['discrete_features'] and stale['spec'] and stale['puvspr'] and stale['inputdat']
+    assert not stale['pu_layer']
+
+
+def test_custom_spec():
+    project = built_project()
+    project['spec_dat'] = project['spec_dat'].replace('1000', '500')
+    stale = dependencies.status(project)
+    assert stale['spec'] and stale['puvspr'] and not stale['discrete_features']
@@ -0,0 +1,21 @@
+import numpy
+import pandas
+
+from marxanconnect import landscape
+
+
+def test_write_habitat_blocks(tmp_path):
+    rng = numpy.random.default_rng(0)
+    n = 7
+    inverse = rng.uniform(0, 1, (n, n))
+    area = rng.uniform(0, 1, n)
+    matrix = landscape.open_matrix(str(tmp_path / ('paths' + landscape.SUFFIX)), n)
+    matrix[:] = inverse
+    filepath = str(tmp_path / 'land.csv')
+    landscape.write_habitat(filepath, 'a', numpy.arange(n) + 1, matrix, inverse.sum(1).max(), area, True, chunksize=10)
+    edges = pandas.read_csv(filepath)
+    expected = inverse / inverse.sum(1).max() * area[:, None] * area[None, :]
+    numpy.testing.assert_allclose(edges['value'].values.reshape(n, n), expected)
+    assert edges['id1'].tolist() == numpy.repeat(numpy.arange(n) + 1, n).tolist()
+    # the paths are not modified
+    numpy.testing.assert_array_equal(matrix, inverse)
@@ -0,0 +1,44 @@
+import json
+
+import pandas
+
+from marxanconnect import pipeline
+from marxanconnect.lazy import marxanconpy
+
+
+def write_project(tmp_path, project):
+    projfile = tmp_path / 'project.MarCon'
+    projfile.write_text(json.dumps(project))
+    return str(projfile)
+
+
+def test_load_project_without_marxanconnect_version(tmp_path):
+    project = marxanconpy.marcon.new_project()
+    project['version'] = {'marxanconpy': marxanconpy.__version__}
+    project = pipeline.load_project(write_project(tmp_path, project))
+    assert project['version'] == {'marxanconpy': marxanconpy.__version__,
+                                  'MarxanConnect': pipeline.read_version()}
+
+
+def test_load_project_without_version(tmp_path, monkeypatch):
+    # older marxanconpy versions load the file without validating it
+    monkeypatch.setattr(marxanconpy.marcon, 'load_project', lambda filename: json.load(open(filename)))
+    project = marxanconpy.marcon.new_project()
+    del project['version']
+    project = pipeline.load_project(write_project(tmp_path, project))
+    assert project['version']['MarxanConnect'] == pipeline.read_version()
+    assert project['filepaths']['projfilename'] == 'project.MarCon'
+
+
+def test_posthoc_categories(tmp_path, monkeypatch):
+    def calc_postHoc(project, category):
+        project['postHoc'] = {'summary': category}
+        return pandas.DataFrame({'Metric': ['Connections'], 'Solution': [len(category)]})
+
+    monkeypatch.setattr(pipeline, 'postHoc_categories', lambda project: ["Landscape Data", "Demographic Data"])
+    monkeypatch.setattr(pipeline, 'calc_postHoc', calc_postHoc)
+    project = {'filepaths': {'posthoc': str(tmp_path / 'posthoc.csv')}}
+    pipeline.calc_postHoc_categories(project)
+    summary = pandas.read_csv(project['filepaths']['posthoc'])
+    assert summary['Category'].tolist() == ["Landscape Data", "Demographic Data"]
+    assert summary['Solution'].tolist() == [14, 16]
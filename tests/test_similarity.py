@@ -0,0 +1,48 @@
+import types
+
+import numpy
+import pandas
+
+from marxanconnect import similarity
+
+
+def restart_store(selections):
+    selections = numpy.asarray(selections, dtype='uint8')
+    return types.SimpleNamespace(NUMREPS=selections.shape[0], n_pu=selections.shape[1],
+                                 solutions=numpy.packbits(selections, axis=1),
+                                 sum=pandas.DataFrame({'Run_Number': numpy.arange(1, selections.shape[0] + 1)}))
+
+
+def test_identical_restarts():
+    store = restart_store([[1, 0, 1, 1, 0]] * 10)
+    table, distances = similarity.restart_clusters(store, k=5)
+    assert (table['Cluster'] == 1).all()
+    assert table['Representative'].sum() == 1
+    assert (table['Distance to Representative'] == 0).all()
+
+
+def test_identical_restarts_kmedoids():
+    medoids, clusters = similarity.kmedoids(numpy.zeros((10, 10)), 5)
+    assert medoids.shape[0] == 1
+    assert (clusters == 0).all()
+
+
+def test_two_solutions_more_clusters():
+    store = restart_store([[1, 0, 1, 0], [0, 1, 0, 1], [1, 0, 1, 0]])
+    table, distances = similarity.restart_clusters(store, k=3)
+    representatives = numpy.flatnonzero(table['Representative'])
+    assert representatives.shape[0] == 2
+    assert distances[representatives[0], representatives[1]] > 0
+    assert table['Cluster'].iloc[0] == table['Cluster'].iloc[2] != table['Cluster'].iloc[1]
+
+
+def test_near_identical_restarts():
+    selections = numpy.ones((8, 200), dtype='uint8')
+    selections[3, 7] = 0
+    selections[5, 9] = 0
+    store = restart_store(selections)
+    table, distances = similarity.restart_clusters(store, k=5)
+    representatives = numpy.flatnonzero(table['Representative'])
+    assert representatives.shape[0] == 3
+    assert (distances[numpy.ix_(representatives, representatives)] + numpy.eye(3) > 0).all()
+    assert table['Cluster'].nunique() == 3
@@ -0,0 +1,63 @@
+import numpy
+import pytest
+import shapely
+
+from marxanconnect import surface
+
+sparse = pytest.importorskip('scipy.sparse')
+csgraph = pytest.importorskip('scipy.sparse.csgraph')
+pytest.importorskip('igraph')
+
+
+def reference(raster, cellsize, pu, cell, n):
+    """ the inverse square least-cost distances between planning units from scipy's Dijkstra """
+    rows, columns = raster.shape
+    first, second, cost = [], [], []
+    for r in range(rows):
+        for c in range(columns):
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if (dr or dc) and 0 <= r + dr < rows and 0 <= c + dc < columns and \
+                            not numpy.isnan(raster[r, c]) and not numpy.isnan(raster[r + dr, c + dc]):
+                        first.append(r * columns + c)
+                        second.append((r + dr) * columns + c + dc)
+                        cost.append(numpy.hypot(dr, dc) * cellsize * (raster[r, c] + raster[r + dr, c + dc]) / 2)
+    graph = sparse.csr_matrix((cost, (first, second)), shape=(rows * columns,) * 2)
+    valid = ~numpy.isnan(raster.reshape(-1))[cell]
+    distance = numpy.full((n, n), numpy.inf)
+    for a in range(n):
+        sources = cell[(pu == a) & valid]
+        if sources.shape[0]:
+            reached = csgraph.dijkstra(graph, indices=sources, min_only=True)
+            for b in range(n):
+                targets = cell[(pu == b) & valid]
+                if targets.shape[0]:
+                    distance[a, b] = reached[targets].min()
+    with numpy.errstate(divide='ignore'):
+        inverse = 1 / (distance * distance)
+    inverse[numpy.isinf(inverse)] = 0
+    return inverse
+
+
+def test_least_cost_paths():
+    pu_geometry = numpy.array([shapely.box(0, 0, 4, 4),
+                               shapely.box(8, 0, 12, 4),
+                               shapely.box(0, 8, 4, 12),
+                               shapely.box(10.2, 10.2, 10.4, 10.4),  # smaller than a cell
+                               shapely.box(8, 8, 9, 9)])  # outside the surface
+    grid = surface.raster_grid(pu_geometry, None, cellsize=1)
+    rng = numpy.random.default_rng(0)
+    raster = rng.uniform(1, 10, grid['shape'])
+    raster[5:8, 3:9] = numpy.nan  # a barrier
+    pu, cell = surface.pu_cells(pu_geometry, grid)
+    raster.reshape(-1)[cell[pu == 4]] = numpy.nan
+    n = pu_geometry.shape[0]
+    assert (pu == 3).sum() == 1
+
+    surface.init_worker(raster, grid['cellsize'], pu, cell, n)
+    start, inverse = surface.path_worker((0, n))
+    assert start == 0
+    expected = reference(raster, grid['cellsize'], pu, cell, n)
+    numpy.testing.assert_allclose(inverse, expected, rtol=1e-12)
+    assert (inverse[4] == 0).all() and (inverse[:, 4] == 0).all()
+    assert (inverse[3, :3] > 0).all()